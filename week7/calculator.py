@@ -1,4 +1,65 @@
 import math
+from collections import namedtuple
+
+import numpy as np
+
+# Result of a batch operation: float64 values (NaN where the scalar method
+# would raise) and a boolean mask of the failed elements
+BatchResult = namedtuple("BatchResult", ["values", "errors"])
+
+
+def _as_array(values, message):
+    """View a number, sequence, NumPy array or buffer as a float64 array."""
+    array = np.asarray(values)
+    if array.dtype.kind not in "biuf":
+        raise ValueError(message)
+    return array.astype(np.float64, copy=False)
+
+
+def _pow(base, exponent):
+    """math.pow, with NaN where it raises."""
+    try:
+        return math.pow(base, exponent)
+    except (OverflowError, ValueError):
+        return math.nan
+
+
+# Elements per math.pow pass in _exact_power; a chunk that raises is redone with _pow
+POWER_CHUNK = 65536
+
+
+def _exact_power(base, exponent):
+    """math.pow element-wise over two same-shape float64 arrays, NaN where it raises.
+    
+    math.pow is the C library pow that ** uses, so the values are bit for bit
+    what the scalar method returns. Domain errors (zero to a negative power,
+    a negative base to a fractional power) are masked out with NumPy first,
+    so math.pow itself can be mapped without a Python-level wrapper; only a
+    chunk where it still raises (overflow) falls back to _pow.
+    """
+    base = np.ascontiguousarray(base).ravel()
+    exponent = np.ascontiguousarray(exponent).ravel()
+    domain = (
+        np.isfinite(base) & np.isfinite(exponent)
+        & (((base < 0) & (exponent != np.floor(exponent))) | ((base == 0) & (exponent < 0)))
+    )
+    if domain.any():
+        base = np.where(domain, np.nan, base)
+    values = np.empty(base.size)
+    # Iterating a memoryview yields Python floats without building lists
+    bases, exponents = memoryview(base), memoryview(exponent)
+    for start in range(0, base.size, POWER_CHUNK):
+        stop = min(start + POWER_CHUNK, base.size)
+        try:
+            values[start:stop] = np.fromiter(
+                map(math.pow, bases[start:stop], exponents[start:stop]), dtype=np.float64, count=stop - start
+            )
+        except (OverflowError, ValueError):
+            values[start:stop] = np.fromiter(
+                map(_pow, bases[start:stop], exponents[start:stop]), dtype=np.float64, count=stop - start
+            )
+    return values
+
 
 class Calculator:
     """A simple calculator class with basic mathematical operations."""
@@ -42,3 +103,75 @@ class Calculator:
         if number < 0:
             raise ValueError("Cannot calculate square root of negative number")
         return math.sqrt(number)
+    
+    # Batch versions: element-wise over NumPy arrays (or anything np.asarray
+    # accepts, including buffers), with broadcasting. Elements are computed
+    # as float64, which gives the scalar methods' results for float arguments.
+    # Instead of raising, failed elements are NaN in values and True in errors;
+    # like float arithmetic, overflow to inf and NaN propagation are silent.
+    
+    def add_batch(self, a, b) -> BatchResult:
+        """Add two arrays element-wise."""
+        a = _as_array(a, "Both arguments must be numbers")
+        b = _as_array(b, "Both arguments must be numbers")
+        with np.errstate(over="ignore", invalid="ignore"):
+            values = np.add(a, b)
+        return BatchResult(values, np.zeros(values.shape, dtype=bool))
+    
+    def subtract_batch(self, a, b) -> BatchResult:
+        """Subtract b from a element-wise."""
+        a = _as_array(a, "Both arguments must be numbers")
+        b = _as_array(b, "Both arguments must be numbers")
+        with np.errstate(over="ignore", invalid="ignore"):
+            values = np.subtract(a, b)
+        return BatchResult(values, np.zeros(values.shape, dtype=bool))
+    
+    def multiply_batch(self, a, b) -> BatchResult:
+        """Multiply two arrays element-wise."""
+        a = _as_array(a, "Both arguments must be numbers")
+        b = _as_array(b, "Both arguments must be numbers")
+        with np.errstate(over="ignore", invalid="ignore"):
+            values = np.multiply(a, b)
+        return BatchResult(values, np.zeros(values.shape, dtype=bool))
+    
+    def divide_batch(self, a, b) -> BatchResult:
+        """Divide a by b element-wise; division by zero is an error."""
+        a = _as_array(a, "Both arguments must be numbers")
+        b = _as_array(b, "Both arguments must be numbers")
+        errors = np.broadcast_to(b == 0, np.broadcast_shapes(a.shape, b.shape)).copy()
+        with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+            # np.where, not values[errors] = nan: 0-d inputs give a NumPy scalar
+            values = np.where(errors, np.nan, np.divide(a, b))
+        return BatchResult(values, errors)
+    
+    def power_batch(self, base, exponent, exact=True) -> BatchResult:
+        """Raise base to exponent element-wise.
+        
+        Errors are the cases where the scalar method raises or returns a
+        complex number: zero to a negative power, a negative base with a
+        fractional exponent and overflow. NumPy's SIMD pow differs from the
+        C library's pow (used by **) in the last bit for a few percent of
+        inputs, integer exponents included, so by default the values are
+        computed with math.pow, one element at a time. exact=False uses
+        np.power instead: far faster, within one unit in the last place.
+        """
+        base = _as_array(base, "Both arguments must be numbers")
+        exponent = _as_array(exponent, "Both arguments must be numbers")
+        base, exponent = np.broadcast_arrays(base, exponent)
+        if exact:
+            values = _exact_power(base, exponent).reshape(base.shape)
+        else:
+            with np.errstate(divide="ignore", over="ignore", invalid="ignore"):
+                values = np.power(base, exponent)
+        # Finite arguments only give a non-finite result where the scalar method fails
+        errors = ~np.isfinite(values) & np.isfinite(base) & np.isfinite(exponent)
+        values = np.where(errors, np.nan, values)
+        return BatchResult(values, errors)
+    
+    def square_root_batch(self, number) -> BatchResult:
+        """Calculate square roots element-wise; negative numbers are errors."""
+        number = _as_array(number, "Argument must be a number")
+        errors = number < 0
+        with np.errstate(invalid="ignore"):
+            values = np.sqrt(number)
+        return BatchResult(values, errors)
@@ -0,0 +1,488 @@
+"""Expression trees over the Calculator operations, evaluated in fused chunks.
+
+Chaining batch calls such as
+``calc.divide_batch(calc.add_batch(a, b).values, calc.square_root_batch(c).values)``
+allocates a full-size array for every intermediate result. An expression
+built from the same operations is instead compiled into a short register
+program and run over cache-sized chunks of the inputs, so intermediates
+only ever occupy a few chunk-sized buffers:
+
+    from expression import var, square_root
+
+    expr = (var("a") + var("b")) / square_root(var("c"))
+    result = expr.evaluate(a=a, b=b, c=c)     # BatchResult(values, errors)
+    expr.evaluate(a=1, b=2, c=4)              # 1.5, through Calculator itself
+
+Formulas can also be written as text; compile_formula() parses them (with
+the ast module, never eval) and keeps the compiled expressions in an LRU
+cache keyed by the formula text:
+
+    compile_formula("(a + b) / sqrt(c) ** 2").evaluate(a=a, b=b, c=c)
+
+Array inputs follow the batch methods: values are float64, NaN where a step
+failed, and errors flags every element where any step failed. Plain number
+inputs go through the scalar Calculator methods and raise the same errors.
+Compiled programs are cached by the shape of the expression (operations,
+variable names, where the constants are), not by the constant values.
+"""
+
+import ast
+import itertools
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from calculator import BatchResult, Calculator, _exact_power
+
+# Compiled formulas kept by compile_formula()
+FORMULA_CACHE_SIZE = 1024
+
+# Elements per chunk: a few 128 KiB float64 registers stay in L2 cache
+CHUNK_SIZE = 16384
+
+OPERATIONS = {
+    "add": 2,
+    "subtract": 2,
+    "multiply": 2,
+    "divide": 2,
+    "power": 2,
+    "square_root": 1,
+}
+
+SYMBOLS = {"add": "+", "subtract": "-", "multiply": "*", "divide": "/", "power": "**"}
+
+# A compiled expression: variable names in operand order, number of constants,
+# number of chunk registers and the instructions (operation, output register, operands).
+# Operands are ("var", i), ("const", i) or ("reg", i); result is the operand holding the value.
+Program = namedtuple("Program", ["variables", "constants", "registers", "instructions", "result"])
+
+_calculator = Calculator()
+
+
+class Expression:
+    """Base class of expression nodes; combine them with + - * / ** or the module functions."""
+
+    # Set on first array evaluation: (program, constants)
+    _compiled = None
+
+    def structure(self):
+        """Hashable description of the expression without its constant values.
+
+        Constants appear as numbered slots, so expressions that differ only in
+        their constants share one compiled program.
+        """
+        return self._structure(itertools.count())
+
+    def _structure(self, slots):
+        raise NotImplementedError
+
+    def constants(self):
+        """Constant values in the order the structure refers to them."""
+        raise NotImplementedError
+
+    def evaluate(self, **values):
+        """Evaluate with numbers (scalar path) or arrays/buffers (fused chunked path)."""
+        if all(isinstance(value, (int, float)) for value in values.values()):
+            return self.evaluate_scalar(values)
+
+        if self._compiled is None:
+            self._compiled = (compile_structure(self.structure()), self.constants())
+        program, constants = self._compiled
+        missing = [name for name in program.variables if name not in values]
+        if missing:
+            raise ValueError(f"Missing values for: {', '.join(missing)}")
+        arrays = []
+        for name in program.variables:
+            array = np.asarray(values[name])
+            if array.dtype.kind not in "biuf":
+                raise ValueError(f"{name} must be a number or an array of numbers")
+            arrays.append(array)
+        return run_program(program, arrays, constants)
+
+    def evaluate_scalar(self, values):
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return Operation("add", self, other)
+
+    def __radd__(self, other):
+        return Operation("add", other, self)
+
+    def __sub__(self, other):
+        return Operation("subtract", self, other)
+
+    def __rsub__(self, other):
+        return Operation("subtract", other, self)
+
+    def __mul__(self, other):
+        return Operation("multiply", self, other)
+
+    def __rmul__(self, other):
+        return Operation("multiply", other, self)
+
+    def __truediv__(self, other):
+        return Operation("divide", self, other)
+
+    def __rtruediv__(self, other):
+        return Operation("divide", other, self)
+
+    def __pow__(self, other):
+        return Operation("power", self, other)
+
+    def __rpow__(self, other):
+        return Operation("power", other, self)
+
+    def __neg__(self):
+        # -1 * x rather than 0 - x, so that -(0.0) is -0.0 as in Python
+        return Operation("multiply", -1, self)
+
+    def __pos__(self):
+        return self
+
+
+def as_expression(value):
+    """Wrap a number as a Constant; expressions are returned unchanged."""
+    if isinstance(value, Expression):
+        return value
+    return Constant(value)
+
+
+class Variable(Expression):
+    """A named input, bound when the expression is evaluated."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def _structure(self, slots):
+        return ("var", self.name)
+
+    def constants(self):
+        return []
+
+    def evaluate_scalar(self, values):
+        if self.name not in values:
+            raise ValueError(f"Missing values for: {self.name}")
+        return values[self.name]
+
+    def __repr__(self):
+        return self.name
+
+
+class Constant(Expression):
+    """A number fixed in the expression."""
+
+    def __init__(self, value):
+        if not isinstance(value, (int, float)):
+            raise ValueError("Constants must be numbers")
+        self.value = value
+
+    def _structure(self, slots):
+        return ("const", next(slots))
+
+    def constants(self):
+        return [self.value]
+
+    def evaluate_scalar(self, values):
+        return self.value
+
+    def __repr__(self):
+        return repr(self.value)
+
+
+class Operation(Expression):
+    """One Calculator operation applied to sub-expressions."""
+
+    def __init__(self, name, *args):
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {name}")
+        if len(args) != OPERATIONS[name]:
+            raise ValueError(f"{name} takes {OPERATIONS[name]} arguments")
+        self.name = name
+        self.args = tuple(as_expression(arg) for arg in args)
+
+    def _structure(self, slots):
+        return (self.name, *(arg._structure(slots) for arg in self.args))
+
+    def constants(self):
+        return [value for arg in self.args for value in arg.constants()]
+
+    def evaluate_scalar(self, values):
+        return getattr(_calculator, self.name)(*(arg.evaluate_scalar(values) for arg in self.args))
+
+    def __repr__(self):
+        if self.name in SYMBOLS:
+            return f"({self.args[0]!r} {SYMBOLS[self.name]} {self.args[1]!r})"
+        return f"{self.name}({', '.join(repr(arg) for arg in self.args)})"
+
+
+def var(name):
+    """A variable named name."""
+    return Variable(name)
+
+
+def add(a, b):
+    return Operation("add", a, b)
+
+
+def subtract(a, b):
+    return Operation("subtract", a, b)
+
+
+def multiply(a, b):
+    return Operation("multiply", a, b)
+
+
+def divide(a, b):
+    return Operation("divide", a, b)
+
+
+def power(base, exponent):
+    return Operation("power", base, exponent)
+
+
+def square_root(number):
+    return Operation("square_root", number)
+
+
+# Formula syntax: binary operators and functions mapped to Operation names
+BINARY_OPERATORS = {
+    ast.Add: "add",
+    ast.Sub: "subtract",
+    ast.Mult: "multiply",
+    ast.Div: "divide",
+    ast.Pow: "power",
+}
+
+FUNCTIONS = {
+    "sqrt": "square_root",
+    "square_root": "square_root",
+    "pow": "power",
+    "power": "power",
+    "add": "add",
+    "subtract": "subtract",
+    "multiply": "multiply",
+    "divide": "divide",
+}
+
+
+def parse(formula):
+    """Parse a formula such as "(a + b) / sqrt(c) ** 2" into an Expression.
+
+    Only numbers, variable names, + - * / **, unary + and - and the
+    FUNCTIONS are accepted; anything else raises ValueError.
+    """
+    if not isinstance(formula, str):
+        raise ValueError("Formula must be a string")
+    formula = formula.strip()
+    try:
+        return _from_node(ast.parse(formula, mode="eval").body, formula)
+    except SyntaxError as e:
+        raise _invalid(formula, e.msg) from None
+    except (RecursionError, MemoryError):
+        raise _invalid(formula, "too deeply nested") from None
+
+
+def _invalid(formula, reason):
+    if len(formula) > 60:
+        formula = formula[:57] + "..."
+    return ValueError(f"Invalid formula {formula!r}: {reason}")
+
+
+def _from_node(node, formula):
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise _invalid(formula, f"{node.value!r} is not a number")
+        try:
+            # Floats, as on the array path: a huge int literal must not mean unbounded int arithmetic
+            return Constant(float(node.value))
+        except OverflowError:
+            raise _invalid(formula, "number is too large") from None
+    if isinstance(node, ast.Name):
+        if node.id in FUNCTIONS:
+            raise _invalid(formula, f"{node.id} is a function")
+        return Variable(node.id)
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        return Operation(
+            BINARY_OPERATORS[type(node.op)], _from_node(node.left, formula), _from_node(node.right, formula)
+        )
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.UAdd, ast.USub)):
+        operand = _from_node(node.operand, formula)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+        if isinstance(operand, Constant):
+            return Constant(-operand.value)
+        return -operand
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+        if node.keywords:
+            raise _invalid(formula, f"{node.func.id} takes no keyword arguments")
+        name = FUNCTIONS[node.func.id]
+        if len(node.args) != OPERATIONS[name]:
+            raise _invalid(formula, f"{node.func.id} takes {OPERATIONS[name]} arguments")
+        return Operation(name, *(_from_node(arg, formula) for arg in node.args))
+    raise _invalid(formula, f"unsupported syntax {ast.get_source_segment(formula, node)!r}")
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(formula):
+    """Parse a formula into an Expression, cached by the formula text.
+
+    The returned expression evaluates numbers through Calculator and arrays
+    through the fused chunked path, and keeps its compiled program, so a
+    repeated formula is neither parsed nor compiled again.
+    """
+    return parse(formula)
+
+
+@lru_cache(maxsize=256)
+def compile_structure(structure):
+    """Compile an expression structure into a register Program.
+
+    Identical sub-expressions are computed once, and a register is reused
+    as soon as the last instruction reading it has run.
+    """
+    variables = []
+    constants = 0
+    uses = {}
+
+    def count(node):
+        uses[node] = uses.get(node, 0) + 1
+        if uses[node] == 1 and node[0] in OPERATIONS:
+            for child in node[1:]:
+                count(child)
+
+    count(structure)
+
+    instructions = []
+    free = []
+    registers = [0]
+    results = {}
+
+    def emit(node):
+        nonlocal constants
+        if node in results:
+            return results[node]
+        kind = node[0]
+        if kind == "var":
+            if node[1] not in variables:
+                variables.append(node[1])
+            operand = ("var", variables.index(node[1]))
+        elif kind == "const":
+            operand = ("const", node[1])
+            constants += 1
+        else:
+            operands = [emit(child) for child in node[1:]]
+            for child, child_operand in zip(node[1:], operands):
+                uses[child] -= 1
+                if child_operand[0] == "reg" and uses[child] == 0:
+                    free.append(child_operand[1])
+            if free:
+                output = free.pop()
+            else:
+                output = registers[0]
+                registers[0] += 1
+            instructions.append((kind, output, tuple(operands)))
+            operand = ("reg", output)
+        results[node] = operand
+        return operand
+
+    result = emit(structure)
+    return Program(tuple(variables), constants, registers[0], tuple(instructions), result)
+
+
+def _add(out, args, errors, scratch):
+    np.add(args[0], args[1], out=out)
+
+
+def _subtract(out, args, errors, scratch):
+    np.subtract(args[0], args[1], out=out)
+
+
+def _multiply(out, args, errors, scratch):
+    np.multiply(args[0], args[1], out=out)
+
+
+def _divide(out, args, errors, scratch):
+    np.equal(args[1], 0, out=scratch)
+    errors |= scratch
+    np.divide(args[0], args[1], out=out)
+
+
+def _square_root(out, args, errors, scratch):
+    np.less(args[0], 0, out=scratch)
+    errors |= scratch
+    np.sqrt(args[0], out=out)
+
+
+def _power(out, args, errors, scratch):
+    # math.pow, not np.power: see Calculator.power_batch
+    base, exponent = np.broadcast_arrays(args[0], args[1], subok=True)
+    base = np.broadcast_to(base, out.shape)
+    exponent = np.broadcast_to(exponent, out.shape)
+    # out may share a register with base or exponent, so check them first
+    finite = np.isfinite(base) & np.isfinite(exponent)
+    out[...] = _exact_power(base, exponent)
+    np.isnan(out, out=scratch)
+    scratch &= finite
+    errors |= scratch
+
+
+# Chunk kernels, matching the Calculator batch methods element for element
+KERNELS = {
+    "add": _add,
+    "subtract": _subtract,
+    "multiply": _multiply,
+    "divide": _divide,
+    "square_root": _square_root,
+    "power": _power,
+}
+
+
+def run_program(program, arrays, constants, chunk_size=CHUNK_SIZE):
+    """Run a compiled program over the (broadcast) input arrays chunk by chunk."""
+    if len(constants) != program.constants:
+        raise ValueError("Constants do not match the compiled expression")
+    if not arrays:
+        # Only constants: evaluate once, as a 0-d array
+        arrays = [np.asarray(0.0)]
+
+    # Operands index one list per chunk: [inputs..., constants..., registers...]
+    base = {"var": 0, "const": len(arrays), "reg": len(arrays) + len(constants)}
+    steps = [
+        (KERNELS[name], base["reg"] + output, [base[kind] + index for kind, index in operands])
+        for name, output, operands in program.instructions
+    ]
+    result_kind, result_index = program.result
+    result = base[result_kind] + result_index
+
+    iterator = np.nditer(
+        [*arrays, None, None],
+        flags=["external_loop", "buffered", "zerosize_ok"],
+        op_flags=[["readonly"]] * len(arrays) + [["writeonly", "allocate"]] * 2,
+        op_dtypes=[np.float64] * (len(arrays) + 1) + [np.bool_],
+        casting="safe",
+        buffersize=chunk_size,
+    )
+    buffers = [np.empty(chunk_size) for _ in range(program.registers)]
+    scratch_buffer = np.empty(chunk_size, dtype=bool)
+    constants = [float(value) for value in constants]
+
+    with iterator, np.errstate(all="ignore"):
+        for chunk in iterator:
+            values, errors = chunk[-2], chunk[-1]
+            size = len(values)
+            slots = [*chunk[:-2], *constants, *(buffer[:size] for buffer in buffers)]
+            if result_kind == "reg":
+                # The final instruction writes straight into the output chunk
+                slots[result] = values
+            scratch = scratch_buffer[:size]
+            errors[...] = False
+
+            for kernel, output, operands in steps:
+                kernel(slots[output], [slots[index] for index in operands], errors, scratch)
+
+            if result_kind != "reg":
+                values[...] = slots[result]
+            np.copyto(values, np.nan, where=errors)
+        values, errors = iterator.operands[-2], iterator.operands[-1]
+    return BatchResult(values, errors)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Run Calculator batch operations on a pool of worker processes.
+
+ParallelCalculator has the same *_batch methods as Calculator. Large inputs
+are copied once into shared memory, split into chunks of chunk_size
+elements and evaluated by the workers, which read their chunk of the
+inputs and write their chunk of the results straight into shared memory;
+only the segment names and chunk bounds are pickled. The results come
+back in input order, identical to Calculator's:
+
+    with ParallelCalculator(workers=4) as calc:
+        result = calc.power_batch(base, exponent)   # BatchResult(values, errors)
+
+Inputs smaller than a chunk are evaluated in the calling process.
+
+Scaling benchmark (speedup against the number of workers):
+
+    python parallel.py --size 20000000 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from calculator import BatchResult, Calculator, _as_array
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+OPERATIONS = ("add", "subtract", "multiply", "divide", "power", "square_root")
+
+_calculator = Calculator()
+
+
+def _run_chunk(operation, inputs, values, errors, size, start, stop):
+    """Worker: evaluate elements start:stop of the shared inputs into the shared outputs."""
+    # Segments can be larger than requested (rounded to pages), so size is passed in.
+    # Workers share the parent's resource tracker, so attaching does not take ownership.
+    segments = [shared_memory.SharedMemory(name=name) for name in (*inputs, values, errors)]
+    try:
+        arrays = [np.ndarray((size,), dtype=np.float64, buffer=segment.buf)[start:stop] for segment in segments[:-2]]
+        result = getattr(_calculator, f"{operation}_batch")(*arrays)
+        np.ndarray((size,), dtype=np.float64, buffer=segments[-2].buf)[start:stop] = result.values
+        np.ndarray((size,), dtype=np.bool_, buffer=segments[-1].buf)[start:stop] = result.errors
+        del arrays, result
+    finally:
+        for segment in segments:
+            segment.close()
+    return stop - start
+
+
+class ParallelCalculator:
+    """Calculator batch operations split into chunks over a process pool."""
+
+    def __init__(self, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut the worker processes down."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def run(self, operation, *args):
+        """Evaluate Calculator.<operation>_batch(*args) over the pool."""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        # Worded as the Calculator method for the operation's arity words it
+        message = "Argument must be a number" if len(args) == 1 else "Both arguments must be numbers"
+        arrays = np.broadcast_arrays(*(_as_array(arg, message) for arg in args))
+        shape = arrays[0].shape
+        size = arrays[0].size
+        if size <= self.chunk_size:
+            return getattr(_calculator, f"{operation}_batch")(*arrays)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        segments = []
+        try:
+            inputs = []
+            for array in arrays:
+                segment = shared_memory.SharedMemory(create=True, size=size * 8)
+                segments.append(segment)
+                np.ndarray(shape, dtype=np.float64, buffer=segment.buf)[...] = array
+                inputs.append(segment.name)
+            values = shared_memory.SharedMemory(create=True, size=size * 8)
+            segments.append(values)
+            errors = shared_memory.SharedMemory(create=True, size=size)
+            segments.append(errors)
+
+            futures = [
+                self._pool.submit(_run_chunk, operation, inputs, values.name, errors.name, size,
+                                  start, min(start + self.chunk_size, size))
+                for start in range(0, size, self.chunk_size)
+            ]
+            for future in futures:
+                future.result()
+            return BatchResult(
+                np.ndarray(shape, dtype=np.float64, buffer=values.buf).copy(),
+                np.ndarray(shape, dtype=np.bool_, buffer=errors.buf).copy(),
+            )
+        finally:
+            for segment in segments:
+                segment.close()
+                segment.unlink()
+
+    def add_batch(self, a, b) -> BatchResult:
+        """Add two arrays element-wise."""
+        return self.run("add", a, b)
+
+    def subtract_batch(self, a, b) -> BatchResult:
+        """Subtract b from a element-wise."""
+        return self.run("subtract", a, b)
+
+    def multiply_batch(self, a, b) -> BatchResult:
+        """Multiply two arrays element-wise."""
+        return self.run("multiply", a, b)
+
+    def divide_batch(self, a, b) -> BatchResult:
+        """Divide a by b element-wise; division by zero is an error."""
+        return self.run("divide", a, b)
+
+    def power_batch(self, base, exponent) -> BatchResult:
+        """Raise base to exponent element-wise."""
+        return self.run("power", base, exponent)
+
+    def square_root_batch(self, number) -> BatchResult:
+        """Square root element-wise; negative numbers are errors."""
+        return self.run("square_root", number)
+
+
+def benchmark(operation="power", size=20_000_000, workers=(1, 2, 4, 8), chunk_size=DEFAULT_CHUNK_SIZE, repeat=3):
+    """Time operation on size elements in process and with each worker count.
+
+    Returns [(workers, best seconds, speedup)], where workers 0 is the plain
+    single-process Calculator the speedups are measured against.
+    """
+    rng = np.random.default_rng(0)
+    args = [rng.uniform(0, 10, size), rng.uniform(-3, 3, size)][:1 if operation == "square_root" else 2]
+    method = f"{operation}_batch"
+
+    def best(function):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function(*args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    baseline = best(getattr(_calculator, method))
+    rows = [(0, baseline, 1.0)]
+    for count in workers:
+        with ParallelCalculator(count, chunk_size) as calc:
+            getattr(calc, method)(*args)  # start the workers before timing
+            seconds = best(getattr(calc, method))
+        rows.append((count, seconds, baseline / seconds))
+    return rows
+
+
+def main(argv=None):
+    """Print the scaling benchmark."""
+    parser = argparse.ArgumentParser(description="Scaling benchmark for ParallelCalculator")
+    parser.add_argument("--operation", choices=OPERATIONS, default="power", help="Operation to time (default: power)")
+    parser.add_argument("--size", type=int, default=20_000_000, help="Elements per input (default: 20000000)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to time")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Elements per task")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per configuration; the best is reported")
+    args = parser.parse_args(argv)
+
+    print(f"{args.operation}_batch on {args.size} elements, chunks of {args.chunk_size}, {os.cpu_count()} CPUs")
+    print(f"{'Workers':>10} {'Seconds':>9} {'Speedup':>8}")
+    for count, seconds, speedup in benchmark(args.operation, args.size, args.workers, args.chunk_size, args.repeat):
+        print(f"{count or 'in-process':>10} {seconds:>9.3f} {speedup:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,15 @@
 import unittest
+import gc
+import json
 import math
+import os
+import tempfile
+from array import array
+import numpy as np
 from calculator import Calculator
+from calculator_cli import evaluate_chunk, main, read_csv
+from parallel import ParallelCalculator, benchmark
+from expression import compile_formula, compile_structure, parse, run_program, square_root, var
 
 class TestCalculator(unittest.TestCase):
     """Test cases for the Calculator class."""
@@ -79,5 +88,396 @@ class TestCalculator(unittest.TestCase):
         with self.assertRaises(ValueError):
             self.calc.power("3", 5)
 
+class TestCalculatorBatch(unittest.TestCase):
+    """Test cases for the batch methods against the scalar methods."""
+    
+    VALUES = [0.0, -0.0, 1.0, -1.0, 2.0, 0.5, -2.5, 3.0, 1e-300, 1e300, 123.456, -7.0,
+              math.pi, math.inf, -math.inf, math.nan]
+    
+    def setUp(self):
+        """Set up every pair of test values as two arrays."""
+        self.calc = Calculator()
+        pairs = [(a, b) for a in self.VALUES for b in self.VALUES]
+        self.a = np.array([a for a, _ in pairs])
+        self.b = np.array([b for _, b in pairs])
+    
+    def assert_matches_scalar(self, result, scalar, *arrays):
+        """Each element equals the scalar result, or is an error where the scalar method fails."""
+        for index, args in enumerate(zip(*(values.tolist() for values in arrays))):
+            try:
+                expected = scalar(*args)
+            except (ValueError, ZeroDivisionError, OverflowError):
+                expected = None
+            if isinstance(expected, complex):
+                expected = None
+            if expected is None:
+                self.assertTrue(result.errors[index], f"{args} should be an error")
+                self.assertTrue(math.isnan(result.values[index]))
+                continue
+            self.assertFalse(result.errors[index], f"{args} should not be an error")
+            actual = result.values[index]
+            if math.isnan(expected):
+                self.assertTrue(math.isnan(actual), f"{args}: expected NaN, got {actual}")
+            else:
+                self.assertEqual(actual, expected, f"{args}")
+                self.assertEqual(math.copysign(1, actual), math.copysign(1, expected), f"{args}: sign")
+    
+    def test_binary_operations_match_scalar(self):
+        """Test add, subtract, multiply, divide and power element by element."""
+        for name in ("add", "subtract", "multiply", "divide", "power"):
+            with self.subTest(operation=name):
+                result = getattr(self.calc, f"{name}_batch")(self.a, self.b)
+                self.assert_matches_scalar(result, getattr(self.calc, name), self.a, self.b)
+    
+    def test_square_root_matches_scalar(self):
+        """Test square root element by element, negative numbers as errors."""
+        values = np.array(self.VALUES + [4.0, 9.0, 2.0, -4.0])
+        result = self.calc.square_root_batch(values)
+        self.assert_matches_scalar(result, self.calc.square_root, values)
+    
+    def test_power_matches_scalar_on_random_values(self):
+        """Test that power gives the same bits as ** (NumPy's own pow may not)."""
+        rng = np.random.default_rng(7)
+        base = rng.uniform(-10, 100, 20000)
+        exponent = np.where(rng.random(20000) < 0.5, rng.integers(-8, 8, 20000), rng.uniform(-5, 5, 20000))
+        result = self.calc.power_batch(base, exponent)
+        self.assert_matches_scalar(result, self.calc.power, base, exponent)
+    
+    def test_power_integer_exponents_and_fast_path(self):
+        """Test broadcast integer exponents, overflow inside a chunk, and exact=False."""
+        rng = np.random.default_rng(3)
+        base = rng.uniform(-10, 100, 3000)
+        for exponent in (2, 3, -1, 0):
+            with self.subTest(exponent=exponent):
+                result = self.calc.power_batch(base, exponent)
+                self.assert_matches_scalar(result, self.calc.power, base, np.full(3000, exponent))
+        exponent = np.where(np.arange(3000) == 1500, 400.0, 2.0)
+        self.assert_matches_scalar(self.calc.power_batch(base, exponent), self.calc.power, base, exponent)
+        self.assertEqual(self.calc.power_batch(2, 10).values, 1024.0)
+    
+        exponent = rng.uniform(-5, 5, 3000)
+        exact = self.calc.power_batch(base, exponent)
+        fast = self.calc.power_batch(base, exponent, exact=False)
+        np.testing.assert_array_equal(fast.errors, exact.errors)
+        np.testing.assert_array_max_ulp(fast.values[~fast.errors], exact.values[~exact.errors], maxulp=1)
+    
+    def test_error_mask(self):
+        """Test that failures are reported per element instead of raised."""
+        result = self.calc.divide_batch([1, 2, 3], [1, 0, -0.0])
+        np.testing.assert_array_equal(result.errors, [False, True, True])
+        self.assertEqual(result.values[0], 1.0)
+        
+        result = self.calc.square_root_batch([4, -4])
+        np.testing.assert_array_equal(result.errors, [False, True])
+        
+        result = self.calc.power_batch([0, -8, 10, 2], [-1, 1 / 3, 400, 10])
+        np.testing.assert_array_equal(result.errors, [True, True, True, False])
+        self.assertEqual(result.values[3], 1024.0)
+    
+    def test_buffers_and_broadcasting(self):
+        """Test buffer inputs and scalar broadcasting."""
+        result = self.calc.multiply_batch(array("d", [1.5, 2.5]), 2)
+        np.testing.assert_array_equal(result.values, [3.0, 5.0])
+        result = self.calc.add_batch(np.arange(3, dtype=np.int32), memoryview(array("d", [0.5, 0.5, 0.5])))
+        np.testing.assert_array_equal(result.values, [0.5, 1.5, 2.5])
+        result = self.calc.divide_batch(np.ones((2, 3)), [1, 0, 2])
+        self.assertEqual(result.errors.shape, (2, 3))
+        np.testing.assert_array_equal(result.errors[:, 1], [True, True])
+        result = self.calc.divide_batch(1, 0)
+        self.assertTrue(result.errors)
+        self.assertTrue(math.isnan(result.values))
+        self.assertEqual(self.calc.divide_batch(1.0, np.float64(2.0)).values, 0.5)
+        for name in ("add", "subtract", "multiply", "power"):
+            with self.subTest(operation=name):
+                self.assertEqual(getattr(self.calc, f"{name}_batch")(3, 2).values, getattr(self.calc, name)(3.0, 2.0))
+        self.assertEqual(self.calc.square_root_batch(np.array(4.0)).values, 2.0)
+    
+    def test_batch_invalid_inputs(self):
+        """Test that non-numeric arrays raise ValueError like the scalar methods."""
+        with self.assertRaises(ValueError):
+            self.calc.add_batch(["3"], [5])
+        with self.assertRaises(ValueError):
+            self.calc.power_batch([1, None], [2, 2])
+        with self.assertRaises(ValueError):
+            self.calc.square_root_batch(["4"])
+
+class TestExpression(unittest.TestCase):
+    """Test cases for the fused expression engine against chained batch calls."""
+    
+    def setUp(self):
+        """Set up random inputs that hit every error case."""
+        self.calc = Calculator()
+        rng = np.random.default_rng(3)
+        self.a = rng.uniform(-5, 5, 50000)
+        self.b = np.where(rng.random(50000) < 0.01, 0.0, rng.uniform(-5, 5, 50000))
+        self.c = rng.uniform(-1, 10, 50000)
+    
+    def test_matches_chained_batch_calls(self):
+        """Test values and the union of error masks against the batch methods."""
+        a, b, c = var("a"), var("b"), var("c")
+        expr = (a * b + a / b) ** 2 - square_root(c) * (a * b)
+        result = expr.evaluate(a=self.a, b=self.b, c=self.c)
+        
+        ab = self.calc.multiply_batch(self.a, self.b)
+        quotient = self.calc.divide_batch(self.a, self.b)
+        total = self.calc.add_batch(ab.values, quotient.values)
+        squared = self.calc.power_batch(total.values, 2)
+        root = self.calc.square_root_batch(self.c)
+        product = self.calc.multiply_batch(root.values, ab.values)
+        expected = self.calc.subtract_batch(squared.values, product.values)
+        errors = quotient.errors | squared.errors | root.errors
+        
+        np.testing.assert_array_equal(result.errors, errors)
+        np.testing.assert_array_equal(result.values, np.where(errors, np.nan, expected.values))
+        self.assertTrue(errors.any())
+    
+    def test_chunk_sizes_agree(self):
+        """Test that the result does not depend on the chunk size."""
+        expr = (var("a") + 1) / var("b")
+        program = compile_structure(expr.structure())
+        expected = run_program(program, [self.a, self.b], expr.constants())
+        for chunk_size in (1, 7, 1000, 100000):
+            with self.subTest(chunk_size=chunk_size):
+                result = run_program(program, [self.a, self.b], expr.constants(), chunk_size)
+                np.testing.assert_array_equal(result.values, expected.values)
+                np.testing.assert_array_equal(result.errors, expected.errors)
+    
+    def test_scalar_path(self):
+        """Test that plain numbers go through the Calculator and raise its errors."""
+        expr = (var("a") + var("b")) / square_root(var("c"))
+        self.assertEqual(expr.evaluate(a=1, b=2, c=4), 1.5)
+        with self.assertRaises(ValueError):
+            expr.evaluate(a=1, b=2, c=0)
+        with self.assertRaises(ValueError):
+            expr.evaluate(a=1, b=2, c=-4)
+    
+    def test_programs_shared_across_constants(self):
+        """Test that constants are not part of the cached program."""
+        x = var("x")
+        first = compile_structure((x * 2 + 1).structure())
+        second = compile_structure((x * 5 + 3).structure())
+        self.assertIs(first, second)
+        np.testing.assert_array_equal((x * 5 + 3).evaluate(x=[1, 2]).values, [8, 13])
+        self.assertNotEqual((x * 2 + 2).structure(), (x * 2 + x).structure())
+    
+    def test_common_subexpressions_and_registers(self):
+        """Test that repeated sub-expressions run once and registers are reused."""
+        a, b = var("a"), var("b")
+        program = compile_structure(((a * b) + (a * b) * (a * b)).structure())
+        self.assertEqual(len(program.instructions), 3)
+        self.assertLessEqual(program.registers, 2)
+    
+    def test_broadcasting_and_invalid_inputs(self):
+        """Test broadcast inputs, missing variables and non-numeric arrays."""
+        result = (var("a") / var("b")).evaluate(a=np.ones((2, 3)), b=[1, 0, 2])
+        self.assertEqual(result.values.shape, (2, 3))
+        np.testing.assert_array_equal(result.errors[:, 1], [True, True])
+        with self.assertRaises(ValueError):
+            (var("a") + var("b")).evaluate(a=[1, 2])
+        with self.assertRaises(ValueError):
+            (var("a") + 1).evaluate(a=["1"])
+        with self.assertRaises(ValueError):
+            var("a") + "1"
+
+class TestFormula(unittest.TestCase):
+    """Test cases for parsing formula strings."""
+    
+    def test_formula_matches_expression(self):
+        """Test that a parsed formula builds the same expression as the operators."""
+        a, b, c = var("a"), var("b"), var("c")
+        self.assertEqual(parse("(a + b) / sqrt(c) ** 2").structure(), ((a + b) / square_root(c) ** 2).structure())
+        self.assertEqual(parse("pow(a, 0.5) - -3 * b").structure(), (a ** 0.5 - (-3) * b).structure())
+        self.assertEqual(parse("-a").evaluate(a=0.0), -0.0)
+        self.assertEqual(parse("2 ** -1").evaluate(), 0.5)
+    
+    def test_integer_literals_are_floats(self):
+        """Test that huge powers overflow as floats instead of running unbounded int arithmetic."""
+        formula = compile_formula("9**9**9")
+        with self.assertRaises(OverflowError):
+            formula.evaluate()
+        self.assertTrue(formula.evaluate(x=np.zeros(2)).errors.all())
+        self.assertIsInstance(parse("2 ** 3").evaluate(), float)
+    
+    def test_scalar_and_array_inputs(self):
+        """Test that one compiled formula serves numbers and arrays."""
+        formula = compile_formula("(a + b) / sqrt(c)")
+        self.assertEqual(formula.evaluate(a=1, b=2, c=4), 1.5)
+        with self.assertRaises(ValueError):
+            formula.evaluate(a=1, b=2, c=-4)
+        result = formula.evaluate(a=[1, 2], b=[2, 2], c=[4, -4])
+        np.testing.assert_array_equal(result.errors, [False, True])
+        self.assertEqual(result.values[0], 1.5)
+    
+    def test_cached_by_text(self):
+        """Test that a repeated formula is not parsed again."""
+        compile_formula.cache_clear()
+        first = compile_formula("x * 2 + 1")
+        self.assertIs(compile_formula("x * 2 + 1"), first)
+        self.assertEqual(compile_formula.cache_info().hits, 1)
+    
+    def test_rejects_unsafe_or_invalid_formulas(self):
+        """Test that anything but arithmetic on numbers and names is a ValueError."""
+        for formula in ("__import__('os').system('ls')", "a.real", "a ^ b", "a < b", "f(a)", "sqrt(a, b)",
+                        "sqrt(a=1)", "sqrt", "True + 1", "'1' + a", "a +", "[a]", "1" + "0" * 400,
+                        "(" * 1000 + "a" + ")" * 1000, 5):
+            with self.subTest(formula=formula):
+                with self.assertRaises(ValueError):
+                    parse(formula)
+
+class TestCalculatorCli(unittest.TestCase):
+    """Test cases for the streaming CSV/NDJSON command-line tool."""
+    
+    CSV = "op,a,b\nadd,3,5\ndivide,1,0\nsquare_root, 16\nsquare_root,-4\nfoo,1,2\nadd,x,1\nadd,1\n\npower,2,0.5\n"
+    
+    def run_cli(self, text, *args, name="ops.csv"):
+        """Run the CLI on text written to a temporary file; returns the output lines."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, name)
+            output = os.path.join(directory, "out")
+            with open(path, "w") as f:
+                f.write(text)
+            main([path, "-o", output, *args])
+            with open(output) as f:
+                return f.read().splitlines()
+    
+    def test_csv_results_and_row_errors(self):
+        """Test one output row per input record, with per-row errors."""
+        self.assertEqual(self.run_cli(self.CSV), [
+            "1,8.0,",
+            "2,,Cannot divide by zero",
+            "3,4.0,",
+            "4,,Cannot calculate square root of negative number",
+            "5,,Unknown operation: foo",
+            "6,,Both arguments must be numbers",
+            "7,,add takes 2 operands",
+            f"8,{2 ** 0.5!r},",
+        ])
+    
+    def test_empty_fields_parsed_the_same_on_every_row(self):
+        """Test that the first data row is parsed like the others, and trailing empty fields are dropped."""
+        self.assertEqual(self.run_cli("add,,5\nadd,,5\nsquare_root,16,\n"), [
+            "1,,Both arguments must be numbers",
+            "2,,Both arguments must be numbers",
+            "3,4.0,",
+        ])
+    
+    def test_ndjson_non_finite_results_are_valid_json(self):
+        """Test that overflowing results are written as strings, not bare Infinity."""
+        lines = self.run_cli("add,1e308,1e308\nsubtract,-1e308,1e308\n", "--output-format", "ndjson")
+        records = [json.loads(line, parse_constant=self.fail) for line in lines]
+        self.assertEqual([record["result"] for record in records], ["inf", "-inf"])
+    
+    def test_chunk_size_does_not_change_output(self):
+        """Test that results are the same whatever the chunk size."""
+        expected = self.run_cli(self.CSV)
+        for chunk_size in ("1", "3", "100"):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self.run_cli(self.CSV, "--chunk-size", chunk_size), expected)
+    
+    def test_ndjson(self):
+        """Test NDJSON input and output, including invalid lines."""
+        lines = [
+            '{"op": "multiply", "operands": [1.5, 4]}',
+            '{"op": "add", "operands": ["3", 5]}',
+            "not json",
+            '{"op": "square_root", "operands": 9}',
+            '{"op": ["add"], "operands": [1, 2]}',
+        ]
+        records = [json.loads(line) for line in self.run_cli("\n".join(lines), name="ops.ndjson")]
+        self.assertEqual([record["row"] for record in records], [1, 2, 3, 4, 5])
+        self.assertEqual([record["result"] for record in records], [6.0, None, None, 3.0, None])
+        self.assertEqual(records[1]["error"], "Both arguments must be numbers")
+        self.assertTrue(records[2]["error"].startswith("Invalid JSON"))
+        self.assertIsNone(records[3]["error"])
+    
+    def test_results_match_scalar_methods(self):
+        """Test that written results round-trip exactly and match the scalar Calculator."""
+        calc = Calculator()
+        rng = np.random.default_rng(5)
+        pairs = list(zip(rng.uniform(0, 10, 200).tolist(), rng.uniform(-3, 3, 200).tolist()))
+        values, errors = evaluate_chunk(calc, [("power", [repr(a), repr(b)]) for a, b in pairs])
+        self.assertEqual(errors, [None] * 200)
+        written = [float(line.split(",")[1]) for line in self.run_cli("".join(f"power,{a!r},{b!r}\n" for a, b in pairs))]
+        self.assertEqual(written, values)
+        self.assertEqual(values, [calc.power(a, b) for a, b in pairs])
+    
+    def test_power_errors(self):
+        """Test that overflow, zero to a negative power and complex results get their own messages."""
+        self.assertEqual(self.run_cli("power,10,400\npower,-10,401\npower,0,-1\npower,-8,0.5\npower,-2,3\n"), [
+            "1,,Result is too large",
+            "2,,Result is too large",
+            "3,,Cannot raise zero to a negative power",
+            "4,,Result is not a real number",
+            "5,-8.0,",
+        ])
+    
+    def test_main_leaves_garbage_collector_alone(self):
+        """Test that calling main() does not change the process-wide garbage collector."""
+        self.run_cli(self.CSV)
+        self.assertTrue(gc.isenabled())
+        gc.disable()
+        try:
+            self.run_cli(self.CSV)
+            self.assertFalse(gc.isenabled())
+        finally:
+            gc.enable()
+    
+    def test_csv_reader_is_lazy(self):
+        """Test that records are read one at a time, not all at once."""
+        def lines():
+            yield "op,a,b\n"
+            yield "add,1,2\n"
+            raise AssertionError("read too far")
+        self.assertEqual(next(read_csv(lines())), ("add", ["1", "2"]))
+
+
+class TestParallelCalculator(unittest.TestCase):
+    """Test cases for the process-pool batch operations."""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Start one small pool with tiny chunks so every input is split."""
+        cls.parallel = ParallelCalculator(workers=2, chunk_size=1000)
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.parallel.close()
+    
+    def setUp(self):
+        self.calc = Calculator()
+        rng = np.random.default_rng(11)
+        self.a = rng.uniform(-10, 10, 7777)
+        self.b = np.where(rng.random(7777) < 0.05, 0.0, rng.uniform(-3, 3, 7777))
+    
+    def test_matches_calculator(self):
+        """Test that values and errors are identical to the single-process methods, in order."""
+        for name in ("add", "subtract", "multiply", "divide", "power"):
+            with self.subTest(operation=name):
+                result = getattr(self.parallel, f"{name}_batch")(self.a, self.b)
+                expected = getattr(self.calc, f"{name}_batch")(self.a, self.b)
+                np.testing.assert_array_equal(result.values, expected.values)
+                np.testing.assert_array_equal(result.errors, expected.errors)
+        result = self.parallel.square_root_batch(self.a)
+        np.testing.assert_array_equal(result.errors, self.a < 0)
+    
+    def test_broadcasting_and_small_inputs(self):
+        """Test broadcast shapes across chunks and inputs smaller than a chunk."""
+        result = self.parallel.divide_batch(self.b[:3000].reshape(30, 100), np.arange(100))
+        self.assertEqual(result.values.shape, (30, 100))
+        self.assertTrue(result.errors[:, 0].all())
+        np.testing.assert_array_equal(self.parallel.add_batch([1, 2], 3).values, [4.0, 5.0])
+        with self.assertRaisesRegex(ValueError, "Both arguments must be numbers"):
+            self.parallel.add_batch(["1"] * 2000, 1)
+        with self.assertRaisesRegex(ValueError, "Argument must be a number"):
+            self.parallel.square_root_batch(["4"] * 2000)
+        with self.assertRaises(ValueError):
+            self.parallel.run("modulo", self.a, self.b)
+    
+    def test_benchmark_rows(self):
+        """Test that the benchmark reports the baseline and each worker count."""
+        rows = benchmark("add", size=5000, workers=(1, 2), chunk_size=1000, repeat=1)
+        self.assertEqual([row[0] for row in rows], [0, 1, 2])
+        self.assertEqual(rows[0][2], 1.0)
+
 if __name__ == '__main__':
     unittest.main()
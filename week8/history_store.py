@@ -0,0 +1,217 @@
+"""
+Per-test duration and outcome history.
+
+Every run of run_tests.py writes a junit_report_<timestamp>.xml file. The
+HistoryStore loads those reports into a small SQLite database so the runner
+can balance shards by duration, order tests (recently failed first, longest
+first, fastest first) and show how each test's duration changes over time.
+Numeric test properties, such as the browser navigation metrics recorded
+with --nav-metrics, are kept alongside the results.
+"""
+
+import glob
+import os
+import re
+import sqlite3
+import xml.etree.ElementTree as ET
+
+DEFAULT_DB = "test_history.db"
+ORDER_MODES = ["failed-first", "longest-first", "fastest-first"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT UNIQUE,
+    started_at TEXT,
+    total_time REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER REFERENCES runs(id),
+    test TEXT,
+    outcome TEXT,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS results_test ON results (test, run_id);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER REFERENCES runs(id),
+    test TEXT,
+    name TEXT,
+    value REAL
+);
+CREATE INDEX IF NOT EXISTS metrics_test ON metrics (test, name, run_id);
+"""
+
+
+def junit_key(nodeid):
+    """Convert a pytest node id to the classname.name key used in JUnit XML."""
+    path, bracket, params = nodeid.partition("[")
+    names = path.split("::")
+    names[0] = re.sub(r"\.py$", "", names[0].replace("/", "."))
+    names[-1] += bracket + params
+    return ".".join(names)
+
+
+def slope(values):
+    """Least-squares slope of values against their index (seconds per run)."""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    variance = sum((x - mean_x) ** 2 for x in range(n))
+    return covariance / variance
+
+
+class HistoryStore:
+    """SQLite store of test durations and outcomes, one row per test per run."""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def ingest_junit(self, junit_file):
+        """Load one JUnit XML report; returns the run id, or None if already loaded."""
+        source = os.path.abspath(junit_file)
+        if self.connection.execute("SELECT 1 FROM runs WHERE source = ?", (source,)).fetchone():
+            return None
+
+        try:
+            root = ET.parse(junit_file).getroot()
+        except (ET.ParseError, OSError):
+            return None
+        suites = [root] if root.tag == "testsuite" else root.findall("testsuite")
+        started_at = suites[0].get("timestamp") if suites else None
+        total_time = sum(float(suite.get("time", 0)) for suite in suites)
+
+        with self.connection:
+            run_id = self.connection.execute(
+                "INSERT INTO runs (source, started_at, total_time) VALUES (?, ?, ?)",
+                (source, started_at, total_time)
+            ).lastrowid
+            rows = []
+            metrics = []
+            for suite in suites:
+                for case in suite.iter("testcase"):
+                    test = f"{case.get('classname')}.{case.get('name')}"
+                    outcome = "passed"
+                    for tag in ("failure", "error", "skipped"):
+                        if case.find(tag) is not None:
+                            outcome = tag
+                    rows.append((run_id, test, outcome, float(case.get("time", 0))))
+                    for prop in case.iter("property"):
+                        try:
+                            metrics.append((run_id, test, prop.get("name"), float(prop.get("value"))))
+                        except (TypeError, ValueError):
+                            continue
+            self.connection.executemany(
+                "INSERT INTO results (run_id, test, outcome, duration) VALUES (?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(
+                "INSERT INTO metrics (run_id, test, name, value) VALUES (?, ?, ?, ?)", metrics
+            )
+        return run_id
+
+    def ingest_reports(self, pattern="junit_report_*.xml"):
+        """Load every report matching pattern that is not in the store yet."""
+        loaded = 0
+        for report in sorted(glob.glob(pattern), key=os.path.getmtime):
+            if self.ingest_junit(report) is not None:
+                loaded += 1
+        return loaded
+
+    def average_durations(self, last_runs=5):
+        """Average duration of each test over its last_runs passing or failing runs."""
+        rows = self.connection.execute(
+            """
+            SELECT test, AVG(duration) FROM (
+                SELECT test, duration,
+                       ROW_NUMBER() OVER (PARTITION BY test ORDER BY run_id DESC) AS position
+                FROM results WHERE outcome != 'skipped'
+            ) WHERE position <= ? GROUP BY test
+            """,
+            (last_runs,)
+        )
+        return dict(rows.fetchall())
+
+    def last_failures(self):
+        """Map each test to the id of the latest run in which it failed."""
+        rows = self.connection.execute(
+            "SELECT test, MAX(run_id) FROM results WHERE outcome IN ('failure', 'error') GROUP BY test"
+        )
+        return dict(rows.fetchall())
+
+    def order(self, tests, mode):
+        """Reorder test keys by history; tests with no history keep their relative order."""
+        if mode not in ORDER_MODES:
+            raise ValueError(f"Unknown order mode: {mode}")
+
+        if mode == "failed-first":
+            failures = self.last_failures()
+            # Most recent failures first, never-failed tests after
+            return sorted(tests, key=lambda test: -failures.get(test, 0))
+
+        durations = self.average_durations()
+        unknown = float("inf") if mode == "fastest-first" else 0.0
+        return sorted(
+            tests,
+            key=lambda test: durations.get(test, unknown),
+            reverse=(mode == "longest-first")
+        )
+
+    def metric_averages(self, pattern=None, name_prefix="nav.", last_runs=10):
+        """Average of each recorded metric per test over the last_runs runs that recorded it.
+
+        Returns {test: {metric name: average}}.
+        """
+        query = """
+            SELECT test, name, AVG(value) FROM (
+                SELECT test, name, value,
+                       DENSE_RANK() OVER (PARTITION BY test ORDER BY run_id DESC) AS position
+                FROM metrics WHERE name LIKE ?
+            ) WHERE position <= ?
+        """
+        params = [f"{name_prefix}%", last_runs]
+        if pattern:
+            query += " AND test LIKE ?"
+            params.append(f"%{pattern}%")
+        query += " GROUP BY test, name ORDER BY test, name"
+
+        averages = {}
+        for test, name, value in self.connection.execute(query, params):
+            averages.setdefault(test, {})[name] = value
+        return averages
+
+    def trends(self, pattern=None, last_runs=10):
+        """Duration trend per test over its last_runs runs, steepest slowdown first.
+
+        Each entry is (test, runs, first, latest, mean, slope) where slope
+        is the least-squares change in seconds per run.
+        """
+        query = "SELECT test, duration FROM results WHERE outcome != 'skipped'"
+        params = []
+        if pattern:
+            query += " AND test LIKE ?"
+            params.append(f"%{pattern}%")
+        query += " ORDER BY run_id"
+
+        history = {}
+        for test, duration in self.connection.execute(query, params):
+            history.setdefault(test, []).append(duration)
+
+        trends = []
+        for test, durations in history.items():
+            durations = durations[-last_runs:]
+            trends.append((
+                test,
+                len(durations),
+                durations[0],
+                durations[-1],
+                sum(durations) / len(durations),
+                slope(durations),
+            ))
+        return sorted(trends, key=lambda entry: entry[5], reverse=True)
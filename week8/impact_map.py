@@ -0,0 +1,288 @@
+"""
+Change-based test selection.
+
+A tracing run (pytest -p impact_map --record-impact PATH) records, for every
+test, the repository files and functions it executed: page-object methods,
+helpers and the modules it imports. Code that runs outside any single test
+(collection, conftest hooks, session-, module- and class-scoped fixtures
+such as the browser pool and the driver resolver) is recorded separately
+as session setup, since every test depends on it. Given a git diff,
+select_tests() maps the changed lines back to functions and returns only
+the tests that ran them. Whenever the map cannot be trusted (missing,
+recorded on a commit that is not an ancestor of HEAD, a new test file, a
+change to shared configuration or session setup, or files the map relies
+on changed in commits made after it was recorded) it reports that a full
+run is needed instead.
+"""
+
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import pytest
+
+# Changes to these files can affect every test
+GLOBAL_FILES = {"conftest.py", "requirements.txt", "run_tests.py", "impact_map.py", "pytest.ini", "setup.cfg"}
+
+HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def git(*args, cwd=None):
+    """Run a git command and return its stdout."""
+    return subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def repo_root(cwd=None):
+    """Top-level directory of the git repository."""
+    return git("rev-parse", "--show-toplevel", cwd=cwd).strip()
+
+
+def load_map(path):
+    """Load an impact map, or return None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_map(path, impact_map):
+    with open(path, "w") as f:
+        json.dump(impact_map, f, indent=1, sort_keys=True)
+
+
+class ImpactRecorder:
+    """pytest plugin that records the repository functions each test executes."""
+
+    def __init__(self, map_path):
+        self.map_path = map_path
+        self.root = repo_root()
+        self.tests = {}
+        # Functions run outside any single test, and so on behalf of all of them
+        self.session = {}
+        self._current = self.session
+
+    def _profile(self, frame, event, arg):
+        if event != "call":
+            return
+        filename = frame.f_code.co_filename
+        if not filename.startswith(self.root) or "site-packages" in filename or filename == __file__:
+            return
+        name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+        self._current.setdefault(os.path.relpath(filename, self.root), set()).add(name)
+
+    def _test_id(self, item):
+        path = os.path.relpath(str(item.path), self.root)
+        return path + item.nodeid[item.nodeid.index("::"):] if "::" in item.nodeid else path
+
+    def start(self):
+        """Trace from now on; until a test starts, calls count as session setup."""
+        sys.setprofile(self._profile)
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        self._current = {}
+        # Modules the test module imports count as used, even at import time
+        for value in vars(item.module).values():
+            module = sys.modules.get(getattr(value, "__module__", None) or "")
+            filename = getattr(module, "__file__", None) or ""
+            if filename.startswith(self.root) and "site-packages" not in filename:
+                self._current.setdefault(os.path.relpath(filename, self.root), set())
+
+        try:
+            yield
+        finally:
+            self.tests[self._test_id(item)] = self._current
+            self._current = self.session
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_fixture_setup(self, fixturedef, request):
+        # A shared fixture is set up by whichever test needs it first, but serves them all
+        if fixturedef.scope == "function":
+            yield
+            return
+        test = self._current
+        self._current = self.session
+        try:
+            yield
+        finally:
+            self._current = test
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_unconfigure(self, config):
+        # After the other plugins' unconfigure hooks (stopping the site servers, ...)
+        sys.setprofile(None)
+        impact_map = load_map(self.map_path) or {"tests": {}}
+        for test_id, files in self.tests.items():
+            impact_map["tests"][test_id] = {
+                path: sorted(functions) for path, functions in files.items()
+            }
+        # Suites are recorded one after another into the same map
+        session = impact_map.setdefault("session", {})
+        for path, functions in self.session.items():
+            session[path] = sorted(set(session.get(path, [])) | functions)
+        impact_map["commit"] = git("rev-parse", "HEAD", cwd=self.root).strip()
+        impact_map["recorded_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        save_map(self.map_path, impact_map)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--record-impact",
+        action="store",
+        default=None,
+        metavar="PATH",
+        help="Record which repository functions each test executes into PATH"
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    path = config.getoption("--record-impact")
+    if path:
+        # Before conftest's pytest_configure, which starts shared services
+        recorder = ImpactRecorder(os.path.abspath(path))
+        config.pluginmanager.register(recorder, "impact-recorder")
+        recorder.start()
+
+
+def changed_lines(base, root, target=None):
+    """Map each changed file (repo-relative) to the set of changed line numbers.
+
+    Compares the working tree with base, so uncommitted edits count, or the
+    commit target with base if given. A file mapped to None is new, deleted
+    or (working tree only) untracked.
+    """
+    changes = {}
+    old = current = None
+    for line in git("diff", "-U0", "--no-color", base, *([target] if target else []), cwd=root).splitlines():
+        if line.startswith("--- "):
+            old = None if line[4:] == "/dev/null" else line[6:]
+        elif line.startswith("+++ "):
+            current = None if line[4:] == "/dev/null" else line[6:]
+            if current is None:
+                changes[old] = None
+            else:
+                changes[current] = set() if old is not None else None
+        elif current is not None and changes.get(current) is not None:
+            match = HUNK_HEADER.match(line)
+            if match:
+                start = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                # A pure deletion touches the line where the text used to be
+                changes[current].update(range(start, start + max(count, 1)))
+
+    if target is None:
+        for path in git("ls-files", "--others", "--exclude-standard", cwd=root).splitlines():
+            changes[path] = None
+    return changes
+
+
+def changed_functions(path, lines):
+    """Qualified names of the functions containing the changed lines.
+
+    Returns None if a change falls outside every function (module level
+    code, imports, class attributes), meaning every user of the file is
+    affected.
+    """
+    try:
+        with open(path) as f:
+            tree = ast.parse(f.read())
+    except (OSError, SyntaxError):
+        return None
+
+    spans = []
+
+    def visit(node, prefix):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                name = f"{prefix}{child.name}"
+                first = min([child.lineno] + [d.lineno for d in child.decorator_list])
+                spans.append((first, child.end_lineno, name))
+                visit(child, f"{name}.<locals>.")
+            elif isinstance(child, ast.ClassDef):
+                visit(child, f"{prefix}{child.name}.")
+
+    visit(tree, "")
+
+    functions = set()
+    for line in lines:
+        containing = [span for span in spans if span[0] <= line <= span[1]]
+        if not containing:
+            return None
+        # Innermost function wins
+        functions.add(max(containing, key=lambda span: span[0])[2])
+    return functions
+
+
+def select_tests(map_path, base="HEAD"):
+    """Decide which tests a change affects.
+
+    Returns (tests, reason): tests is a sorted list of repo-relative test
+    ids, or None when the full suite must run; reason explains the choice.
+    """
+    impact_map = load_map(map_path)
+    if impact_map is None:
+        return None, "no impact map recorded"
+
+    root = repo_root()
+    try:
+        git("merge-base", "--is-ancestor", impact_map["commit"], "HEAD", cwd=root)
+    except subprocess.CalledProcessError:
+        return None, f"impact map commit {impact_map['commit'][:8]} is not an ancestor of HEAD"
+
+    tests = impact_map["tests"]
+    session = {path: set(functions) for path, functions in impact_map.get("session", {}).items()}
+    test_files = {test_id.split("::")[0] for test_id in tests}
+    used_files = {}
+    for test_id, files in tests.items():
+        for path, functions in files.items():
+            used_files.setdefault(path, []).append((test_id, set(functions)))
+
+    # Commits made after the recording may have added call edges or tests the
+    # map does not know about, so the map only holds if they left its files alone
+    stale = sorted(
+        path for path in changed_lines(impact_map["commit"], root, "HEAD") if path in used_files or path in session
+    )
+    if stale:
+        more = f" and {len(stale) - 1} more" if len(stale) > 1 else ""
+        return None, f"impact map is stale: {stale[0]}{more} changed since {impact_map['commit'][:8]}"
+
+    # Changes since base, plus anything since the recording that base already contains
+    changes = changed_lines(impact_map["commit"], root)
+    for path, lines in changed_lines(base, root).items():
+        if path in changes and lines is not None and changes[path] is not None:
+            changes[path] |= lines
+        elif path not in changes or lines is None:
+            changes[path] = lines
+
+    selected = set()
+    for path, lines in changes.items():
+        name = os.path.basename(path)
+        if name in GLOBAL_FILES:
+            return None, f"{path} affects every test"
+        if not path.endswith(".py"):
+            continue
+        if name.startswith("test_") and path not in test_files:
+            return None, f"{path} is not in the impact map"
+        if path not in used_files and path not in session:
+            continue
+
+        # Test files are in used_files too, since each test's own function is recorded
+        functions = None if lines is None else changed_functions(os.path.join(root, path), lines)
+        if functions is not None:
+            # Without co_qualname (Python < 3.11) only bare function names are recorded
+            functions |= {function.rsplit(".", 1)[-1] for function in functions}
+        if path in session and (functions & session[path] if functions is not None else path not in used_files):
+            # Module-level changes to a file tests use directly still select just those tests
+            return None, f"{path} runs in session setup shared by every test"
+        for test_id, used in used_files.get(path, []):
+            if functions is None or functions & used:
+                selected.add(test_id)
+
+    return sorted(selected), f"{len(selected)} of {len(tests)} tests affected"
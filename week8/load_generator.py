@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Load generator for the identify-triangle API.
+
+Drives POST /api/identify-triangle over a pool of keep-alive HTTP/1.1
+connections with asyncio and prints a JSON report of throughput and
+latency percentiles.
+
+Two modes:
+
+  closed  N workers each send a request, wait for the answer and send the
+          next one (throughput is whatever the server sustains)
+  open    requests are issued at a fixed rate whether or not earlier ones
+          have finished; latency is measured from each request's scheduled
+          start, so queueing behind a slow server is counted
+
+Examples:
+  python load_generator.py --local --mode closed --concurrency 16 --duration 10
+  python load_generator.py --local --mode open --rate 500 --duration 10
+  python load_generator.py --url https://msse-640-2025summer.vercel.app/api/identify-triangle --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import ssl
+import subprocess
+import sys
+import time
+from itertools import cycle
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8000/api/identify-triangle"
+
+# A mix of every outcome the route can produce
+DEFAULT_TRIANGLES = [
+    {"sideA": 5, "sideB": 5, "sideC": 5},
+    {"sideA": 5, "sideB": 5, "sideC": 3},
+    {"sideA": 3, "sideB": 4, "sideC": 5},
+    {"sideA": 1, "sideB": 2, "sideC": 3},
+    {"sideA": 0, "sideB": 3, "sideC": 4},
+    {"sideA": "abc", "sideB": 3, "sideC": 4},
+]
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class HttpConnection:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port, use_ssl):
+        self.host = host
+        self.port = port
+        self.ssl = ssl.create_default_context() if use_ssl else None
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def post(self, path, body):
+        """Send one POST and return (status, response body); reconnects once if the server closed the connection."""
+        for attempt in range(2):
+            if self.writer is None:
+                await self.connect()
+            request = (
+                f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+            try:
+                self.writer.write(request)
+                await self.writer.drain()
+                return await self._read_response()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    async def _read_response(self):
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        status = int(status_line.split(" ", 2)[1])
+        headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = bytearray()
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                body.extend(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            body = bytes(body)
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+
+class LoadGenerator:
+    """Sends requests over a connection pool and records their latencies."""
+
+    def __init__(self, url, connections, triangles=None):
+        parts = urlsplit(url)
+        self.path = parts.path or "/"
+        use_ssl = parts.scheme == "https"
+        port = parts.port or (443 if use_ssl else 80)
+        self.pool = asyncio.Queue()
+        for _ in range(connections):
+            self.pool.put_nowait(HttpConnection(parts.hostname, port, use_ssl))
+        self.bodies = cycle([json.dumps(t).encode() for t in (triangles or DEFAULT_TRIANGLES)])
+        self.latencies = []
+        self.statuses = {}
+        self.failures = 0
+
+    async def request(self, scheduled=None):
+        """Send one request; latency runs from scheduled (open loop) or from now."""
+        start = scheduled if scheduled is not None else time.perf_counter()
+        connection = await self.pool.get()
+        try:
+            status, _ = await connection.post(self.path, next(self.bodies))
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.latencies.append(time.perf_counter() - start)
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            self.failures += 1
+            connection.close()
+        finally:
+            self.pool.put_nowait(connection)
+
+    async def run_closed(self, concurrency, duration=None, requests=None):
+        deadline = time.perf_counter() + duration if duration else None
+        sent = 0
+
+        async def worker():
+            nonlocal sent
+            while (deadline is None or time.perf_counter() < deadline) and (requests is None or sent < requests):
+                sent += 1
+                await self.request()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    async def run_open(self, rate, duration=None, requests=None):
+        total = requests if requests is not None else int(rate * duration)
+        start = time.perf_counter()
+        tasks = []
+        for index in range(total):
+            scheduled = start + index / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(self.request(scheduled)))
+        await asyncio.gather(*tasks)
+
+    def close(self):
+        while not self.pool.empty():
+            self.pool.get_nowait().close()
+
+    def report(self, elapsed):
+        latencies = sorted(self.latencies)
+        completed = len(latencies)
+
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+
+        return {
+            "requests": completed + self.failures,
+            "completed": completed,
+            "failures": self.failures,
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(completed / elapsed, 1) if elapsed else None,
+            "latency_ms": {
+                "mean": ms(sum(latencies) / completed) if completed else None,
+                "p50": ms(percentile(latencies, 0.50)),
+                "p95": ms(percentile(latencies, 0.95)),
+                "p99": ms(percentile(latencies, 0.99)),
+                "max": ms(latencies[-1] if latencies else None),
+            },
+        }
+
+
+async def run_load(url, mode="closed", concurrency=8, rate=100.0, duration=None, requests=None,
+                   connections=None, triangles=None):
+    """Run one load test and return the report dictionary."""
+    if duration is None and requests is None:
+        raise ValueError("Either duration or requests is required")
+    if mode not in ("closed", "open"):
+        raise ValueError(f"Unknown mode: {mode}")
+
+    generator = LoadGenerator(url, connections or concurrency, triangles)
+    start = time.perf_counter()
+    try:
+        if mode == "closed":
+            await generator.run_closed(concurrency, duration, requests)
+        else:
+            await generator.run_open(rate, duration, requests)
+    finally:
+        generator.close()
+    report = generator.report(time.perf_counter() - start)
+
+    settings = {"url": url, "mode": mode, "connections": connections or concurrency}
+    if mode == "closed":
+        settings["concurrency"] = concurrency
+    else:
+        settings["rate_rps"] = rate
+    return {**settings, **report}
+
+
+def start_local_service():
+    """Start triangle_service.py on a free port; returns (process, url)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+
+    service = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triangle_service.py")
+    process = subprocess.Popen(
+        [sys.executable, service, "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/api/identify-triangle"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("Local triangle service did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the identify-triangle API",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__.split("Examples:")[1]
+    )
+    parser.add_argument("--url", default=DEFAULT_URL, help="Endpoint to load")
+    parser.add_argument("--local", action="store_true", help="Start triangle_service.py locally and load it")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: requests in flight")
+    parser.add_argument("--rate", type=float, default=100.0, help="Open loop: requests per second")
+    parser.add_argument("--connections", type=int, help="Keep-alive connections (default: concurrency)")
+    parser.add_argument("--duration", type=float, help="Seconds to run")
+    parser.add_argument("--requests", type=int, help="Number of requests to send")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    process = None
+    url = args.url
+    if args.local:
+        process, url = start_local_service()
+    try:
+        report = asyncio.run(run_load(
+            url, args.mode, args.concurrency, args.rate, args.duration, args.requests, args.connections
+        ))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0 if report["failures"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
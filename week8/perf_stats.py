@@ -0,0 +1,196 @@
+"""
+Baselines and regression checks for the performance suite.
+
+Each performance test measures a metric over several iterations. Instead
+of failing on one slow sample against a fixed threshold, the samples are
+compared with the baseline samples stored in perf_baselines.json using a
+one-sided Mann-Whitney U test. A metric regresses only when it is both
+statistically significant (p < ALPHA) and practically significant (the
+median grew by more than MIN_SLOWDOWN).
+"""
+
+import json
+import math
+import os
+import time
+from collections import namedtuple
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_baselines.json")
+
+# Significance level of the one-sided test
+ALPHA = 0.01
+
+# Smallest relative slowdown of the median that counts as a regression
+MIN_SLOWDOWN = 0.10
+
+# Largest sample sizes for which the exact U distribution is computed
+EXACT_LIMIT = 30
+
+Comparison = namedtuple(
+    "Comparison", "metric baseline_median current_median change p_value regressed"
+)
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def _ranks(values):
+    """Ranks of values (1-based), averaging tied ranks."""
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2 + 1
+        i = j + 1
+    return ranks
+
+
+def _exact_upper_tail(u, m, n):
+    """P(U >= u) under the null hypothesis, for samples without ties."""
+    # counts[j][k] = number of orderings of j baseline and k current values with U == index
+    counts = {(0, 0): [1]}
+    for total in range(1, m + n + 1):
+        for j in range(max(0, total - n), min(m, total) + 1):
+            k = total - j
+            size = j * k + 1
+            row = [0] * size
+            # The largest value is either a current value (beating all j baseline values) or a baseline value
+            if k > 0:
+                for index, count in enumerate(counts[(j, k - 1)]):
+                    row[index + j] += count
+            if j > 0:
+                for index, count in enumerate(counts[(j - 1, k)]):
+                    row[index] += count
+            counts[(j, k)] = row
+    distribution = counts[(m, n)]
+    return sum(distribution[math.ceil(u):]) / sum(distribution)
+
+
+def mann_whitney_greater(baseline, current):
+    """One-sided Mann-Whitney U test that current tends to be larger than baseline.
+
+    Returns (U, p value) where U counts the (baseline, current) pairs in
+    which the current sample is larger, ties counting one half.
+    """
+    m, n = len(baseline), len(current)
+    if m == 0 or n == 0:
+        raise ValueError("Both samples must be non-empty")
+
+    combined = list(baseline) + list(current)
+    ranks = _ranks(combined)
+    u = sum(ranks[m:]) - n * (n + 1) / 2
+
+    ties = len(set(combined)) < len(combined)
+    if not ties and m <= EXACT_LIMIT and n <= EXACT_LIMIT:
+        return u, _exact_upper_tail(u, m, n)
+
+    # Normal approximation with tie and continuity corrections
+    total = m + n
+    tie_term = 0.0
+    for value in set(combined):
+        t = combined.count(value)
+        tie_term += t ** 3 - t
+    variance = m * n / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return u, 1.0
+    z = (u - m * n / 2 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(metric, baseline, current, alpha=ALPHA, min_slowdown=MIN_SLOWDOWN):
+    """Compare current samples with baseline samples of one metric."""
+    baseline_median = median(baseline)
+    current_median = median(current)
+    change = (current_median - baseline_median) / baseline_median if baseline_median else 0.0
+    _, p_value = mann_whitney_greater(baseline, current)
+    regressed = p_value < alpha and change > min_slowdown
+    return Comparison(metric, baseline_median, current_median, change, p_value, regressed)
+
+
+def describe(comparison):
+    """One-line summary of a comparison."""
+    return (
+        f"{comparison.metric}: median {comparison.current_median * 1000:.0f}ms vs "
+        f"baseline {comparison.baseline_median * 1000:.0f}ms ({comparison.change:+.0%}, "
+        f"p={comparison.p_value:.4f}){' REGRESSED' if comparison.regressed else ''}"
+    )
+
+
+class BaselineStore:
+    """Baseline samples per metric, kept in a JSON file."""
+
+    def __init__(self, path=DEFAULT_BASELINES):
+        self.path = path
+        self.baselines = {}
+        self.updated = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.baselines = json.load(f)
+
+    def samples(self, metric):
+        entry = self.baselines.get(metric)
+        return entry["samples"] if entry else None
+
+    def update(self, metric, samples):
+        entry = {"samples": list(samples), "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        self.baselines[metric] = entry
+        self.updated[metric] = entry
+
+    def save(self):
+        """Write updated metrics, keeping metrics other processes may have written meanwhile."""
+        if not self.updated:
+            return
+        baselines = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                baselines = json.load(f)
+        baselines.update(self.updated)
+        with open(self.path, "w") as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+
+
+class PerfSuite:
+    """Measures metrics for the performance tests and checks them against baselines."""
+
+    def __init__(self, store, iterations=10, update=False):
+        self.store = store
+        self.iterations = iterations
+        self.update = update
+        self.results = []
+
+    def measure(self, action, setup=None, warmup=1):
+        """Time action() over the configured iterations; setup() runs untimed before each."""
+        samples = []
+        for index in range(warmup + self.iterations):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            action()
+            elapsed = time.perf_counter() - start
+            if index >= warmup:
+                samples.append(elapsed)
+        return samples
+
+    def check(self, metric, samples):
+        """Compare samples with the metric's baseline, or store them as the baseline.
+
+        Returns a Comparison, or None when there is no baseline to compare with.
+        """
+        baseline = self.store.samples(metric)
+        if self.update:
+            self.store.update(metric, samples)
+        if self.update or not baseline:
+            self.results.append((metric, samples, None))
+            return None
+        comparison = compare(metric, baseline, samples)
+        self.results.append((metric, samples, comparison))
+        return comparison
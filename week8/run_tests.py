@@ -10,9 +10,28 @@ This script runs automated web tests for:
 
 import os
 import sys
+import subprocess
 import pytest
 import argparse
 from datetime import datetime
+from sharding import run_sharded
+from history_store import HistoryStore, ORDER_MODES
+from impact_map import select_tests
+from site_archive import MODES as SITE_MODES, start_sites, stop_sites
+
+TEST_PATHS = ["selenium_tests/"]
+
+# Suites covered by change-based selection: directory under the repo root -> test paths
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPACT_SUITES = {
+    "week8": [
+        "selenium_tests/", "test_triangle_rules.py", "test_triangle_service.py", "test_impact_map.py",
+        "test_perf_stats.py", "test_history_store.py", "test_sharding.py", "test_load_generator.py",
+        "test_site_archive.py",
+    ],
+    "week7": ["test_calculator.py"],
+}
+IMPACT_MAP = os.path.join(REPO_ROOT, "week8", "impact_map.json")
 
 def create_screenshots_directory():
     """Create screenshots directory if it doesn't exist."""
@@ -20,51 +39,108 @@ def create_screenshots_directory():
         os.makedirs("screenshots")
         print("Created screenshots directory")
 
-def run_tests_with_options(test_type=None, browser_visible=False, generate_report=True):
+def execute_tests(pytest_options, workers=1, xml_report=None, html_report=None, order=None, test_paths=None):
+    """Run pytest serially, or sharded across worker processes, and record the results."""
+    test_paths = test_paths or TEST_PATHS
+    xml_report = xml_report or default_xml_report()
+    if order:
+        pytest_options = pytest_options + ["--history-order", order]
+    
+    if workers > 1:
+        print(f"Running tests across {workers} worker processes...")
+        exit_code = run_sharded(test_paths, pytest_options, workers, xml_report, html_report)
+    else:
+        pytest_args = test_paths + pytest_options
+        if html_report:
+            pytest_args.extend([
+                "--html", html_report,
+                "--self-contained-html",
+                "--css", "style.css"
+            ])
+        pytest_args.extend(["--junitxml", xml_report])
+        
+        print(f"Running tests with arguments: {' '.join(pytest_args)}")
+        exit_code = pytest.main(pytest_args)
+    
+    # Keep the durations and outcomes of this run in the history store
+    store = HistoryStore()
+    store.ingest_junit(xml_report)
+    store.close()
+    return exit_code
+
+def print_trends(pattern=None, last_runs=10):
+    """Print per-test duration trends from the history store."""
+    store = HistoryStore()
+    trends = store.trends(pattern, last_runs)
+    store.close()
+    
+    if not trends:
+        print("No test history recorded yet")
+        return
+    
+    print(f"{'Test':<70} {'Runs':>4} {'First':>7} {'Latest':>7} {'Mean':>7} {'s/run':>7}")
+    for test, runs, first, latest, mean, change in trends:
+        print(f"{test[-70:]:<70} {runs:>4} {first:>7.2f} {latest:>7.2f} {mean:>7.2f} {change:>+7.3f}")
+
+def print_nav_metrics(pattern=None, last_runs=10):
+    """Print the average browser navigation metrics per test from the history store."""
+    store = HistoryStore()
+    averages = store.metric_averages(pattern, last_runs=last_runs)
+    store.close()
+    
+    if not averages:
+        print("No navigation metrics recorded yet (run pytest with --nav-metrics)")
+        return
+    
+    for test, metrics in averages.items():
+        print(test)
+        for name, value in metrics.items():
+            print(f"  {name[len('nav.'):]:<60} {value:>12.1f}")
+
+def default_xml_report():
+    """Timestamped JUnit XML report file name."""
+    return f"junit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
+
+def run_tests_with_options(test_type=None, browser_visible=False, generate_report=True, workers=1, order=None):
     """Run tests with specified options."""
     
     # Create necessary directories
     create_screenshots_directory()
     
-    # Base pytest arguments
+    # Base pytest options
     pytest_args = [
-        "selenium_tests/",
         "-v",  # Verbose output
         "--tb=short",  # Short traceback format
     ]
     
-    # Add markers based on test type
+    # Add markers based on test type; slow (performance) tests only run with --performance
     if test_type == "ecommerce":
         pytest_args.append("-m")
-        pytest_args.append("ecommerce")
+        pytest_args.append("ecommerce and not slow")
         print("Running E-commerce tests only...")
     elif test_type == "mathematical":
         pytest_args.append("-m")
-        pytest_args.append("mathematical")
+        pytest_args.append("mathematical and not slow")
         print("Running Mathematical application tests only...")
     else:
-        print("Running all tests...")
+        pytest_args.append("-m")
+        pytest_args.append("not slow")
+        print("Running all tests (except the slow performance tests)...")
     
     # Add HTML report generation
+    report_file = None
     if generate_report:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_file = f"test_report_{timestamp}.html"
-        pytest_args.extend([
-            "--html", report_file,
-            "--self-contained-html",
-            "--css", "style.css"
-        ])
         print(f"HTML report will be generated: {report_file}")
     
     # Add JUnit XML report
-    xml_report = f"junit_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xml"
-    pytest_args.extend(["--junitxml", xml_report])
+    xml_report = default_xml_report()
     
     # Run tests
-    print(f"Running tests with arguments: {' '.join(pytest_args)}")
     print("=" * 60)
     
-    exit_code = pytest.main(pytest_args)
+    exit_code = execute_tests(pytest_args, workers, xml_report, report_file, order)
     
     print("=" * 60)
     if exit_code == 0:
@@ -74,29 +150,84 @@ def run_tests_with_options(test_type=None, browser_visible=False, generate_repor
     
     return exit_code
 
-def run_specific_test(test_name):
+def run_specific_test(test_name, workers=1, order=None):
     """Run a specific test by name."""
     pytest_args = [
-        "selenium_tests/",
         "-v",
         "-k", test_name,
         "--tb=short"
     ]
     
     print(f"Running specific test: {test_name}")
-    return pytest.main(pytest_args)
+    return execute_tests(pytest_args, workers, order=order)
 
-def run_performance_tests():
+def run_performance_tests(workers=1, order=None, iterations=None, update_baselines=False):
     """Run performance-focused tests."""
     pytest_args = [
-        "selenium_tests/",
         "-v",
         "-m", "slow",
         "--tb=short"
     ]
+    if iterations:
+        pytest_args.extend(["--perf-iterations", str(iterations)])
+    if update_baselines:
+        pytest_args.append("--update-baselines")
     
     print("Running performance tests...")
-    return pytest.main(pytest_args)
+    return execute_tests(pytest_args, workers, order=order)
+
+def run_suite_subprocess(suite, test_paths, extra_args=None):
+    """Run pytest for one suite in its own directory."""
+    env = dict(os.environ)
+    # The impact recorder plugin lives next to this script
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.join(REPO_ROOT, "week8"), env.get("PYTHONPATH")]))
+    command = [sys.executable, "-m", "pytest", "-v", "--tb=short", *test_paths, *(extra_args or [])]
+    print(f"Running {suite} tests: {' '.join(command[3:])}")
+    return subprocess.call(command, cwd=os.path.join(REPO_ROOT, suite), env=env)
+
+def record_impact_map():
+    """Run every suite under the impact recorder to rebuild the impact map."""
+    if os.path.exists(IMPACT_MAP):
+        os.remove(IMPACT_MAP)
+    
+    exit_code = 0
+    for suite, test_paths in IMPACT_SUITES.items():
+        code = run_suite_subprocess(suite, test_paths, ["-p", "impact_map", "--record-impact", IMPACT_MAP])
+        if code not in (0, 5):
+            exit_code = exit_code or code
+    print(f"Impact map written to {IMPACT_MAP}")
+    return exit_code
+
+def run_impacted_tests(base="HEAD", workers=1, order=None):
+    """Run only the tests affected by changes since base, or everything if the map is stale."""
+    tests, reason = select_tests(IMPACT_MAP, base)
+    print(f"Impact analysis against {base}: {reason}")
+    
+    if tests is None:
+        print("Falling back to a full run")
+        selected = {suite: list(test_paths) for suite, test_paths in IMPACT_SUITES.items()}
+    else:
+        selected = {}
+        for test_id in tests:
+            suite, _, test_path = test_id.partition("/")
+            selected.setdefault(suite, []).append(test_path)
+    
+    if not selected:
+        print("No tests affected")
+        return 0
+    
+    # Like a regular run, leave the slow performance suite to --performance
+    markers = ["-m", "not slow"]
+    exit_code = 0
+    for suite, test_paths in selected.items():
+        if suite == "week8":
+            create_screenshots_directory()
+            code = execute_tests(["-v", "--tb=short"] + markers, workers, order=order, test_paths=test_paths)
+        else:
+            code = run_suite_subprocess(suite, test_paths, markers)
+        if code not in (0, 5):
+            exit_code = exit_code or code
+    return exit_code
 
 def main():
     """Main function to handle command line arguments and run tests."""
@@ -110,7 +241,15 @@ Examples:
   python run_tests.py --mathematical     # Run only mathematical tests
   python run_tests.py --test test_homepage_loading  # Run specific test
   python run_tests.py --performance      # Run performance tests
+  python run_tests.py --performance --update-baselines  # Record new performance baselines
   python run_tests.py --no-report        # Run without HTML report
+  python run_tests.py --workers 8        # Split tests across 8 processes
+  python run_tests.py --order failed-first  # Run recently failed tests first
+  python run_tests.py --trends           # Show per-test duration trends
+  python run_tests.py --nav-report       # Show recorded browser navigation metrics
+  python run_tests.py --record-impact    # Trace which code each test runs
+  python run_tests.py --impact main      # Run tests affected by changes since main
+  python run_tests.py --sites replay     # Test against the recorded site archive
         """
     )
     
@@ -138,6 +277,18 @@ Examples:
         help="Run performance tests only"
     )
     
+    parser.add_argument(
+        "--perf-iterations",
+        type=int,
+        help="Timed iterations per metric in the performance tests (default 10)"
+    )
+    
+    parser.add_argument(
+        "--update-baselines",
+        action="store_true",
+        help="Save the performance results as the new baselines instead of comparing"
+    )
+    
     parser.add_argument(
         "--no-report",
         action="store_true",
@@ -150,8 +301,71 @@ Examples:
         help="Run tests with visible browser (for debugging)"
     )
     
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Split tests across N worker processes, balanced by past durations"
+    )
+    
+    parser.add_argument(
+        "--order",
+        choices=ORDER_MODES,
+        help="Order tests using past results"
+    )
+    
+    parser.add_argument(
+        "--trends",
+        nargs="?",
+        const="",
+        metavar="PATTERN",
+        help="Show duration trends for tests matching PATTERN and exit"
+    )
+    
+    parser.add_argument(
+        "--nav-report",
+        nargs="?",
+        const="",
+        metavar="PATTERN",
+        help="Show average navigation metrics for tests matching PATTERN and exit"
+    )
+    
+    parser.add_argument(
+        "--impact",
+        nargs="?",
+        const="HEAD",
+        metavar="BASE",
+        help="Run only tests affected by changes since BASE (default HEAD, i.e. uncommitted changes)"
+    )
+    
+    parser.add_argument(
+        "--record-impact",
+        action="store_true",
+        help="Run all suites with tracing to rebuild the test impact map"
+    )
+    
+    parser.add_argument(
+        "--sites",
+        choices=SITE_MODES,
+        default="live",
+        help="Test the live sites, record them into site_archives/, or replay the archive locally"
+    )
+    
     args = parser.parse_args()
     
+    # Load reports from earlier runs into the history store
+    store = HistoryStore()
+    store.ingest_reports()
+    store.close()
+    
+    if args.trends is not None:
+        print_trends(args.trends or None)
+        return 0
+    
+    if args.nav_report is not None:
+        print_nav_metrics(args.nav_report or None)
+        return 0
+    
     # Print header
     print("=" * 60)
     print("Selenium Test Runner - Assignment 7")
@@ -165,17 +379,36 @@ Examples:
     elif args.mathematical:
         test_type = "mathematical"
     
+    # One set of site servers serves every shard; they export the base URLs to the tests
+    site_servers = start_sites(args.sites)
+    
     # Run appropriate tests
-    if args.test:
-        exit_code = run_specific_test(args.test)
-    elif args.performance:
-        exit_code = run_performance_tests()
-    else:
-        exit_code = run_tests_with_options(
-            test_type=test_type,
-            browser_visible=args.visible,
-            generate_report=not args.no_report
-        )
+    try:
+        if args.record_impact:
+            exit_code = record_impact_map()
+        elif args.impact:
+            exit_code = run_impacted_tests(args.impact, workers=args.workers, order=args.order)
+        elif args.test:
+            exit_code = run_specific_test(args.test, workers=args.workers, order=args.order)
+        elif args.performance:
+            exit_code = run_performance_tests(
+                workers=args.workers,
+                order=args.order,
+                iterations=args.perf_iterations,
+                update_baselines=args.update_baselines
+            )
+        else:
+            exit_code = run_tests_with_options(
+                test_type=test_type,
+                browser_visible=args.visible,
+                generate_report=not args.no_report,
+                workers=args.workers,
+                order=args.order
+            )
+    finally:
+        stop_sites(site_servers)
+        for server in site_servers:
+            print(server.summary())
     
     # Print summary
     print("\n" + "=" * 60)
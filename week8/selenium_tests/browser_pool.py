@@ -0,0 +1,98 @@
+"""
+Browser pool for the Selenium test suite.
+
+Starting Chrome costs one to three seconds, so instead of launching a new
+browser for every test the fixtures in conftest.py borrow one from a
+BrowserPool. Each browser is reset (cookies, storage, extra tabs, window
+size) before it is handed to the next test and is replaced after a fixed
+number of uses or as soon as it stops responding.
+"""
+
+from selenium.common.exceptions import WebDriverException
+
+
+class BrowserPool:
+    """Pool of warm WebDriver sessions shared by the tests of one session."""
+
+    def __init__(self, factory, max_uses=25, window_size=(1920, 1080)):
+        self.factory = factory
+        self.max_uses = max(1, max_uses)
+        self.window_size = window_size
+        self._idle = []
+        self._uses = {}
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.crashed = 0
+
+    def acquire(self):
+        """Return a clean browser, reusing an idle one when possible."""
+        if self._idle:
+            self.hits += 1
+            return self._idle.pop()
+
+        self.misses += 1
+        driver = self.factory()
+        self._uses[id(driver)] = 0
+        return driver
+
+    def release(self, driver):
+        """Give a browser back to the pool after a test has finished."""
+        self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+
+        if self._uses[id(driver)] >= self.max_uses:
+            self.recycled += 1
+            self._discard(driver)
+            return
+
+        try:
+            self.reset(driver)
+        except Exception:
+            # Browser crashed or chromedriver went away; replace it
+            self.crashed += 1
+            self._discard(driver)
+            return
+
+        self._idle.append(driver)
+
+    def reset(self, driver):
+        """Clear cookies, storage and extra tabs left behind by a test."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        # Storage can only be cleared from a page on the same origin
+        driver.execute_script(
+            "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+        )
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except (AttributeError, WebDriverException):
+            driver.delete_all_cookies()
+
+        driver.get("about:blank")
+        driver.set_window_size(*self.window_size)
+
+    def close(self):
+        """Quit every idle browser at the end of the session."""
+        while self._idle:
+            self._discard(self._idle.pop())
+
+    def summary(self):
+        """Return a one-line description of pool usage."""
+        total = self.hits + self.misses
+        hit_rate = (self.hits / total * 100) if total else 0.0
+        return (
+            f"{total} checkouts, {self.hits} hits, {self.misses} misses "
+            f"({hit_rate:.0f}% hit rate), {self.recycled} recycled, "
+            f"{self.crashed} crashed"
+        )
+
+    def _discard(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
@@ -0,0 +1,164 @@
+"""
+WebDriver command profiler for the Selenium tests.
+
+With --profile-commands the driver fixtures wrap each test's driver so that
+every WebDriver command (find_element, send_keys, get, execute_script, ...)
+and every time.sleep is timed and tagged with the page object methods on
+the call stack, e.g.
+
+  test_add_to_cart;CymbalShopsPage.add_product_to_cart;CymbalShopsPage.click_product;get
+
+At the end of the session the profiler prints a per-test table (where each
+test's time went: commands, sleeps, everything else) and an aggregate table
+per command and per page object method, and writes the stacks in the
+collapsed format that flamegraph.pl and speedscope read.
+"""
+
+import os
+import sys
+import threading
+import time
+
+PAGE_OBJECTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_objects")
+
+DEFAULT_FOLDED = "command_profile.folded"
+
+_real_sleep = time.sleep
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return getattr(code, "co_qualname", code.co_name)
+
+
+def page_object_stack(frame):
+    """Page object functions on the call stack above frame, outermost first."""
+    names = []
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(PAGE_OBJECTS_DIR):
+            names.append(_frame_name(frame))
+        frame = frame.f_back
+    return tuple(reversed(names))
+
+
+class TestProfile:
+    """Timed commands of one test."""
+
+    def __init__(self, test):
+        self.test = test
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        # (page object stack, command) -> [count, seconds]
+        self.calls = {}
+
+    def add(self, stack, command, seconds):
+        entry = self.calls.setdefault((stack, command), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def total(self, sleeps):
+        return sum(seconds for (_, command), (_, seconds) in self.calls.items() if (command == "sleep") == sleeps)
+
+
+class CommandProfiler:
+    """Times the WebDriver commands and sleeps of each test."""
+
+    def __init__(self):
+        self.profiles = []
+        self._current = None
+        self._thread = None
+
+    def attach(self, driver, test):
+        """Start profiling a test: wrap driver.execute and time.sleep until detach()."""
+        profile = TestProfile(test)
+        self._current = profile
+        self._thread = threading.current_thread()
+        execute = driver.execute
+
+        def timed_execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return execute(driver_command, params)
+            finally:
+                self._record(driver_command, time.perf_counter() - start)
+
+        def timed_sleep(seconds):
+            start = time.perf_counter()
+            try:
+                _real_sleep(seconds)
+            finally:
+                self._record("sleep", time.perf_counter() - start)
+
+        # Instance attribute: shadows WebDriver.execute, which WebElements also go through
+        driver.execute = timed_execute
+        time.sleep = timed_sleep
+        return profile
+
+    def detach(self, driver):
+        """Stop profiling the current test and restore the driver and time.sleep."""
+        profile = self._current
+        self._current = None
+        time.sleep = _real_sleep
+        driver.__dict__.pop("execute", None)
+        if profile is not None:
+            profile.duration = time.perf_counter() - profile.start
+            self.profiles.append(profile)
+        return profile
+
+    def _record(self, command, seconds):
+        # Sleeps of other threads (site servers, pools) are not part of the test
+        if self._current is None or threading.current_thread() is not self._thread:
+            return
+        self._current.add(page_object_stack(sys._getframe(2)), command, seconds)
+
+    def test_rows(self):
+        """(test, total, commands, command seconds, sleep seconds, other seconds) per test, slowest first."""
+        rows = []
+        for profile in self.profiles:
+            commands = sum(count for (_, command), (count, _) in profile.calls.items() if command != "sleep")
+            command_time = profile.total(sleeps=False)
+            sleep_time = profile.total(sleeps=True)
+            other = max(0.0, profile.duration - command_time - sleep_time)
+            rows.append((profile.test, profile.duration, commands, command_time, sleep_time, other))
+        return sorted(rows, key=lambda row: row[1], reverse=True)
+
+    def aggregate(self, by="command"):
+        """{command or innermost page object method: [count, seconds]} over all tests."""
+        totals = {}
+        for profile in self.profiles:
+            for (stack, command), (count, seconds) in profile.calls.items():
+                key = command if by == "command" else (stack[-1] if stack else "(test body)")
+                entry = totals.setdefault(key, [0, 0.0])
+                entry[0] += count
+                entry[1] += seconds
+        return dict(sorted(totals.items(), key=lambda item: item[1][1], reverse=True))
+
+    def write_folded(self, path=DEFAULT_FOLDED):
+        """Write collapsed stacks (test;method;...;command microseconds), one line per stack."""
+        lines = {}
+        for profile in self.profiles:
+            test = profile.test.replace(";", ":").replace(" ", "_")
+            for (stack, command), (_, seconds) in profile.calls.items():
+                key = ";".join((test, *stack, command))
+                lines[key] = lines.get(key, 0) + seconds
+            other = profile.duration - profile.total(sleeps=False) - profile.total(sleeps=True)
+            if other > 0:
+                lines[f"{test};(other)"] = lines.get(f"{test};(other)", 0) + other
+        with open(path, "w") as f:
+            for key, seconds in sorted(lines.items()):
+                f.write(f"{key} {round(seconds * 1e6)}\n")
+        return path
+
+    def report_lines(self, top=15):
+        """Per-test and aggregate tables as text lines."""
+        lines = [f"{'Test':<60} {'Total':>7} {'Cmds':>5} {'Cmd s':>7} {'Sleep s':>7} {'Other s':>7}"]
+        for test, total, commands, command_time, sleep_time, other in self.test_rows():
+            lines.append(
+                f"{test[-60:]:<60} {total:>7.2f} {commands:>5} {command_time:>7.2f} {sleep_time:>7.2f} {other:>7.2f}"
+            )
+        for by, title in (("command", "Command"), ("method", "Page object method")):
+            lines.append("")
+            lines.append(f"{title:<60} {'Calls':>7} {'Total s':>7} {'Mean ms':>7}")
+            for key, (count, seconds) in list(self.aggregate(by).items())[:top]:
+                lines.append(f"{key[-60:]:<60} {count:>7} {seconds:>7.2f} {seconds / count * 1000:>7.1f}")
+        return lines
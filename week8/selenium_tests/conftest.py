@@ -1,46 +1,326 @@
+import os
+import sys
 import pytest
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 
-@pytest.fixture(scope="function")
-def driver():
-    """Setup and teardown WebDriver for each test."""
+# Let the test modules import page_objects whatever directory pytest runs from
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from history_store import HistoryStore, ORDER_MODES, DEFAULT_DB, junit_key
+from site_archive import MODES as SITE_MODES, DEFAULT_ARCHIVE_DIR, start_sites, stop_sites
+from perf_stats import BaselineStore, PerfSuite, DEFAULT_BASELINES, describe, median
+from selenium_tests.browser_pool import BrowserPool
+from selenium_tests.driver_resolver import resolve_chromedriver
+from selenium_tests.command_profiler import CommandProfiler, DEFAULT_FOLDED
+from selenium_tests.resource_blocker import ResourceBlocker, RESOURCE_PATTERNS, blocked_patterns, resource_cache_dir
+from page_objects.navigation_metrics import NavigationMetrics
+from page_objects.screenshots import default_pipeline
+from page_objects.visual_compare import DEFAULT_BASELINE_DIR, MISSING_BASELINE, configure_baselines
+
+# Browser pools created during the session, reported at session end
+_browser_pools = {}
+
+# Seconds spent starting each browser, reported at session end
+_startup_times = []
+
+# Local record/replay servers standing in for the tested sites
+_site_servers = []
+
+# Performance suite of the session, reported and saved at session end
+_perf_suites = []
+
+# Resource blocker of the session, reported at session end
+_resource_blockers = []
+
+# Command profiler of the session and its collapsed-stack file, reported at session end
+_command_profilers = []
+
+# Visual baseline store of the session, reported at session end
+_visual_baselines = []
+
+def pytest_addoption(parser):
+    """Add the command line options of the browser tests."""
+    parser.addoption(
+        "--pool-max-uses",
+        action="store",
+        type=int,
+        default=25,
+        help="Number of tests a pooled browser serves before it is replaced (1 disables reuse)"
+    )
+    parser.addoption(
+        "--history-order",
+        action="store",
+        choices=ORDER_MODES,
+        default=None,
+        help="Order tests using the duration/outcome history store"
+    )
+    parser.addoption(
+        "--history-db",
+        action="store",
+        default=DEFAULT_DB,
+        help="Path of the test history database"
+    )
+    parser.addoption(
+        "--sites",
+        action="store",
+        choices=SITE_MODES,
+        default="live",
+        help="Test the live sites, record them into the site archive, or replay the archive locally"
+    )
+    parser.addoption(
+        "--site-archive",
+        action="store",
+        default=DEFAULT_ARCHIVE_DIR,
+        help="Directory of the recorded site archives"
+    )
+    parser.addoption(
+        "--perf-iterations",
+        action="store",
+        type=int,
+        default=10,
+        help="Timed iterations per metric in the performance tests"
+    )
+    parser.addoption(
+        "--update-baselines",
+        action="store_true",
+        default=False,
+        help="Store this run's performance samples as the new baselines instead of comparing"
+    )
+    parser.addoption(
+        "--perf-baselines",
+        action="store",
+        default=DEFAULT_BASELINES,
+        help="Path of the performance baselines file"
+    )
+    parser.addoption(
+        "--nav-metrics",
+        action="store_true",
+        default=False,
+        help="Collect browser performance metrics for each page object navigation"
+    )
+    parser.addoption(
+        "--block-resources",
+        action="store",
+        default="",
+        metavar="CATEGORIES",
+        help=f"Comma separated resource categories to block ({', '.join(RESOURCE_PATTERNS)})"
+    )
+    parser.addoption(
+        "--block-url",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Also block URLs matching PATTERN (* wildcards, may be repeated)"
+    )
+    parser.addoption(
+        "--resource-cache",
+        action="store_true",
+        default=False,
+        help="Keep the browsers' HTTP cache on disk so static assets load locally across tests and runs"
+    )
+    parser.addoption(
+        "--profile-commands",
+        action="store",
+        nargs="?",
+        const=DEFAULT_FOLDED,
+        default=None,
+        metavar="FOLDED_FILE",
+        help=f"Time every WebDriver command and sleep per page object method (collapsed stacks to {DEFAULT_FOLDED})"
+    )
+    parser.addoption(
+        "--update-visual-baselines",
+        action="store_true",
+        default=False,
+        help="Save the visual checks' screenshots as the new baselines instead of comparing"
+    )
+    parser.addoption(
+        "--visual-baselines",
+        action="store",
+        default=DEFAULT_BASELINE_DIR,
+        help="Directory of the visual baseline screenshots"
+    )
+    parser.addoption(
+        "--no-failure-screenshots",
+        action="store_true",
+        default=False,
+        help="Do not capture a screenshot when a test fails"
+    )
+
+def create_chrome_driver(driver_path, headless=True, cache_dir=None, network_log=False):
+    """Start a new Chrome WebDriver session."""
     # Setup Chrome options
     chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run in headless mode
+    if headless:
+        chrome_options.add_argument("--headless")  # Run in headless mode
+        chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1920,1080")
-    
+    if cache_dir:
+        chrome_options.add_argument(f"--disk-cache-dir={cache_dir}")
+    if network_log:
+        # Network events for the resource blocker's savings report
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
     # Setup WebDriver
-    service = Service(ChromeDriverManager().install())
+    start = time.perf_counter()
+    service = Service(driver_path)
     driver = webdriver.Chrome(service=service, options=chrome_options)
     driver.implicitly_wait(10)
-    
+    _startup_times.append(time.perf_counter() - start)
+    return driver
+
+@pytest.fixture(scope="session")
+def chromedriver_path():
+    """Resolve the chromedriver binary once for the whole session."""
+    return resolve_chromedriver().path
+
+def chrome_factory(config, driver_path, headless):
+    """Browser factory for a pool, with the disk cache and network log the options ask for."""
+    cache_dir = None
+    if config.getoption("--resource-cache"):
+        cache_dir = resource_cache_dir("headless" if headless else "visible")
+    network_log = bool(
+        config.getoption("--resource-cache") or config.getoption("--block-resources") or config.getoption("--block-url")
+    )
+    return lambda: create_chrome_driver(driver_path, headless, cache_dir, network_log)
+
+@pytest.fixture(scope="session")
+def browser_pool(request, chromedriver_path):
+    """Session-wide pool of headless browsers."""
+    pool = BrowserPool(
+        chrome_factory(request.config, chromedriver_path, headless=True),
+        max_uses=request.config.getoption("--pool-max-uses")
+    )
+    _browser_pools["headless"] = pool
+
+    yield pool
+
+    pool.close()
+
+@pytest.fixture(scope="session")
+def visible_browser_pool(request, chromedriver_path):
+    """Session-wide pool of visible browsers for debugging."""
+    pool = BrowserPool(
+        chrome_factory(request.config, chromedriver_path, headless=False),
+        max_uses=request.config.getoption("--pool-max-uses")
+    )
+    _browser_pools["visible"] = pool
+
+    yield pool
+
+    pool.close()
+
+@pytest.fixture(scope="session")
+def resource_blocker(request):
+    """Blocks the configured resources in every test's browser; None when nothing is blocked or cached."""
+    config = request.config
+    if not (config.getoption("--block-resources") or config.getoption("--block-url") or config.getoption("--resource-cache")):
+        yield None
+        return
+
+    blocker = ResourceBlocker(
+        blocked_patterns(config.getoption("--block-resources"), config.getoption("--block-url"))
+    )
+    _resource_blockers.append(blocker)
+
+    yield blocker
+
+    blocker.save()
+
+@pytest.fixture(scope="session")
+def command_profiler(request):
+    """Profiler timing each test's WebDriver commands; None unless --profile-commands is given."""
+    path = request.config.getoption("--profile-commands")
+    if not path:
+        yield None
+        return
+
+    profiler = CommandProfiler()
+    _command_profilers.append((profiler, path))
+
+    yield profiler
+
+    profiler.write_folded(path)
+
+def attach_resource_blocker(blocker, driver):
+    """Block the session's resource patterns in a freshly borrowed browser."""
+    if blocker is not None:
+        blocker.apply(driver)
+
+def detach_resource_blocker(request, blocker, driver):
+    """Add the requests and bytes the blocker saved in this test to its report as properties."""
+    if blocker is None:
+        return
+    stats = blocker.collect(driver)
+    request.node.user_properties.extend((f"net.{key}", value) for key, value in stats.items())
+
+def attach_nav_metrics(request, driver):
+    """Let the page objects record navigation metrics when --nav-metrics is given."""
+    if request.config.getoption("--nav-metrics"):
+        driver.nav_metrics = NavigationMetrics(driver)
+        driver.nav_metrics.enable()
+
+def detach_nav_metrics(request, driver):
+    """Add the test's navigation metrics to its report (and JUnit XML) as properties."""
+    metrics = getattr(driver, "nav_metrics", None)
+    if metrics is None:
+        return
+    request.node.user_properties.extend(metrics.properties())
+    del driver.nav_metrics
+
+@pytest.fixture(scope="function")
+def driver(request, browser_pool, resource_blocker, command_profiler):
+    """Borrow a clean WebDriver from the pool for each test."""
+    driver = browser_pool.acquire()
+    attach_resource_blocker(resource_blocker, driver)
+    attach_nav_metrics(request, driver)
+    if command_profiler is not None:
+        command_profiler.attach(driver, request.node.nodeid)
+
     yield driver
-    
-    # Teardown
-    driver.quit()
+
+    # Teardown: reset the browser and return it to the pool
+    if command_profiler is not None:
+        command_profiler.detach(driver)
+    detach_nav_metrics(request, driver)
+    detach_resource_blocker(request, resource_blocker, driver)
+    browser_pool.release(driver)
 
 @pytest.fixture(scope="function")
-def driver_visible():
-    """Setup WebDriver with visible browser for debugging."""
-    chrome_options = Options()
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--window-size=1920,1080")
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    driver.implicitly_wait(10)
-    
+def driver_visible(request, visible_browser_pool, resource_blocker, command_profiler):
+    """Borrow a visible WebDriver from the pool for debugging."""
+    driver = visible_browser_pool.acquire()
+    attach_resource_blocker(resource_blocker, driver)
+    attach_nav_metrics(request, driver)
+    if command_profiler is not None:
+        command_profiler.attach(driver, request.node.nodeid)
+
     yield driver
-    
-    driver.quit()
+
+    if command_profiler is not None:
+        command_profiler.detach(driver)
+    detach_nav_metrics(request, driver)
+    detach_resource_blocker(request, resource_blocker, driver)
+    visible_browser_pool.release(driver)
+
+@pytest.fixture(scope="session")
+def perf(request):
+    """Performance measurements compared with (or saved as) the stored baselines."""
+    store = BaselineStore(request.config.getoption("--perf-baselines"))
+    suite = PerfSuite(
+        store,
+        iterations=request.config.getoption("--perf-iterations"),
+        update=request.config.getoption("--update-baselines")
+    )
+    _perf_suites.append(suite)
+
+    yield suite
+
+    store.save()
 
 def pytest_configure(config):
     """Configure pytest with custom markers."""
@@ -53,3 +333,149 @@ def pytest_configure(config):
     config.addinivalue_line(
         "markers", "slow: marks tests as slow running"
     )
+
+    # Reject unknown resource categories before any browser starts
+    try:
+        blocked_patterns(config.getoption("--block-resources"))
+    except ValueError as error:
+        raise pytest.UsageError(str(error))
+
+    _visual_baselines.append(configure_baselines(
+        config.getoption("--visual-baselines"), config.getoption("--update-visual-baselines")
+    ))
+
+    # Point the page objects at local servers before any test creates one
+    try:
+        _site_servers.extend(
+            start_sites(config.getoption("--sites"), config.getoption("--site-archive"))
+        )
+    except FileNotFoundError as error:
+        raise pytest.UsageError(str(error))
+
+def pytest_unconfigure(config):
+    """Stop the site servers, saving the archive when recording."""
+    stop_sites(_site_servers)
+    _site_servers.clear()
+    _visual_baselines.clear()
+
+def pytest_collection_modifyitems(config, items):
+    """Reorder the collected tests when --history-order is given."""
+    mode = config.getoption("--history-order")
+    if not mode:
+        return
+
+    store = HistoryStore(config.getoption("--history-db"))
+    by_key = {}
+    for item in items:
+        by_key.setdefault(junit_key(item.nodeid), []).append(item)
+    ordered = store.order(list(by_key), mode)
+    store.close()
+
+    items[:] = [item for key in ordered for item in by_key[key]]
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """Capture the browser of a failed test (before its driver goes back to the pool)."""
+    outcome = yield
+    report = outcome.get_result()
+    if report.when != "call" or not report.failed or item.config.getoption("--no-failure-screenshots"):
+        return
+
+    driver = item.funcargs.get("driver") or item.funcargs.get("driver_visible")
+    if driver is None:
+        return
+    try:
+        path = default_pipeline().capture(driver, f"failure_{item.nodeid}")
+    except Exception:
+        return
+    item.user_properties.append(("screenshot", path))
+
+def pytest_sessionfinish(session):
+    """Let the screenshot pipeline finish writing before the session ends."""
+    default_pipeline().flush()
+
+def report_sites(terminalreporter):
+    """Requests each site server answered (or could not)."""
+    if not _site_servers:
+        return
+    terminalreporter.section("sites")
+    for server in _site_servers:
+        terminalreporter.write_line(server.summary())
+
+def report_performance(terminalreporter):
+    """Each performance metric, compared with its baseline when there is one."""
+    for suite in _perf_suites:
+        terminalreporter.section("performance")
+        for metric, samples, comparison in suite.results:
+            if comparison is not None:
+                terminalreporter.write_line(describe(comparison))
+            else:
+                status = "saved as baseline" if suite.update else "no baseline (run with --update-baselines)"
+                terminalreporter.write_line(
+                    f"{metric}: median {median(samples) * 1000:.0f}ms over "
+                    f"{len(samples)} runs, {status}"
+                )
+
+def report_visual_checks(terminalreporter):
+    """Visual check totals and the checks that did not pass."""
+    for baselines in _visual_baselines:
+        if not baselines.results:
+            continue
+        terminalreporter.section("visual checks")
+        terminalreporter.write_line(baselines.summary())
+        for result in baselines.results:
+            if not result.passed:
+                diff = f", diff in {result.diff_path}" if result.diff_path else ""
+                if result.status == MISSING_BASELINE:
+                    diff = " (record it with --update-visual-baselines and commit visual_baselines/)"
+                terminalreporter.write_line(f"{result.name}: {result.status}{diff}")
+
+def report_resources(terminalreporter):
+    """Requests and bytes the resource blocker saved."""
+    for blocker in _resource_blockers:
+        terminalreporter.section("resources")
+        terminalreporter.write_line(blocker.summary())
+
+def report_command_profile(terminalreporter):
+    """Slowest WebDriver commands and where the collapsed stacks were written."""
+    for profiler, path in _command_profilers:
+        terminalreporter.section("command profile")
+        for line in profiler.report_lines():
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f"collapsed stacks: {path}")
+
+def report_screenshots(terminalreporter):
+    """Screenshots the pipeline wrote."""
+    screenshots = default_pipeline()
+    if screenshots.captured:
+        terminalreporter.section("screenshots")
+        terminalreporter.write_line(screenshots.summary())
+
+def report_browser_pools(terminalreporter):
+    """chromedriver resolution, browser startup times and pool usage."""
+    if not _browser_pools:
+        return
+
+    terminalreporter.section("browser pool")
+    resolution = resolve_chromedriver()
+    terminalreporter.write_line(
+        f"chromedriver: {resolution.path} ({resolution.source}, resolved in {resolution.seconds:.3f}s)"
+    )
+    if _startup_times:
+        terminalreporter.write_line(
+            f"browser startup: {len(_startup_times)} launches, "
+            f"{sum(_startup_times) / len(_startup_times):.2f}s average, "
+            f"{sum(_startup_times):.2f}s total"
+        )
+    for name, pool in _browser_pools.items():
+        terminalreporter.write_line(f"{name}: {pool.summary()}")
+
+def pytest_terminal_summary(terminalreporter):
+    """Report what the session's services measured."""
+    report_sites(terminalreporter)
+    report_performance(terminalreporter)
+    report_visual_checks(terminalreporter)
+    report_resources(terminalreporter)
+    report_command_profile(terminalreporter)
+    report_screenshots(terminalreporter)
+    report_browser_pools(terminalreporter)
@@ -0,0 +1,167 @@
+"""
+ChromeDriver resolution for offline test runs.
+
+ChromeDriverManager().install() looks up the latest driver version (and
+usually downloads something) every time it is called. The resolver below
+runs once per process and checks, in order:
+
+1. CHROMEDRIVER_PATH, an explicitly configured driver binary (a warning is
+   logged if it does not exist)
+2. the on-disk cache, keyed by the installed Chrome version
+3. a chromedriver found on PATH
+4. only then the network: webdriver-manager, unless CHROMEDRIVER_OFFLINE is
+   set; the downloaded driver is copied into the cache for the next run
+
+Every local source is tried before the download, so a machine without
+network access never waits on a connection timeout when a driver exists.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "msse640", "chromedriver")
+CHROME_BINARIES = [
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+    "chrome",
+]
+
+DriverResolution = namedtuple("DriverResolution", ["path", "source", "chrome_version", "seconds"])
+
+_resolution = None
+
+
+def driver_filename():
+    """Name of the chromedriver executable on this platform."""
+    return "chromedriver.exe" if sys.platform.startswith("win") else "chromedriver"
+
+
+def cache_dir():
+    """Directory holding cached drivers, one subdirectory per Chrome version."""
+    return os.environ.get("CHROMEDRIVER_CACHE_DIR", DEFAULT_CACHE_DIR)
+
+
+def detect_chrome_version():
+    """Return the installed Chrome version string, or None if not found."""
+    binaries = [os.environ["CHROME_BINARY"]] if os.environ.get("CHROME_BINARY") else CHROME_BINARIES
+    for binary in binaries:
+        try:
+            output = subprocess.run(
+                [binary, "--version"], capture_output=True, text=True, timeout=10
+            ).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+        if match:
+            return match.group(0)
+
+    # Fall back to webdriver-manager, which also knows the Windows and macOS locations
+    try:
+        from webdriver_manager.core.os_manager import OperationSystemManager, ChromeType
+        return OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception:
+        return None
+
+
+def find_cached_driver(chrome_version):
+    """Find a cached driver for this Chrome version (or the same major version)."""
+    if not chrome_version:
+        return None
+
+    exact = os.path.join(cache_dir(), chrome_version, driver_filename())
+    if os.path.isfile(exact):
+        return exact
+
+    # ChromeDriver is compatible across a major version
+    major = chrome_version.split(".")[0]
+    if os.path.isdir(cache_dir()):
+        for version in sorted(os.listdir(cache_dir()), reverse=True):
+            candidate = os.path.join(cache_dir(), version, driver_filename())
+            if version.split(".")[0] == major and os.path.isfile(candidate):
+                return candidate
+    return None
+
+
+def store_in_cache(driver_path, chrome_version):
+    """Copy a downloaded driver into the cache and return the cached path."""
+    target_dir = os.path.join(cache_dir(), chrome_version)
+    os.makedirs(target_dir, exist_ok=True)
+    target = os.path.join(target_dir, driver_filename())
+    shutil.copy2(driver_path, target)
+    return target
+
+
+def download_driver(chrome_version):
+    """Install a driver with webdriver-manager and cache it."""
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    if chrome_version:
+        try:
+            path = store_in_cache(path, chrome_version)
+        except OSError as e:
+            logger.warning("Could not cache chromedriver: %s", e)
+    return path
+
+
+def resolve_chromedriver(refresh=False):
+    """Resolve the chromedriver binary once per process.
+
+    Returns a DriverResolution with the driver path, where it came from
+    ("configured", "cache", "download" or "system") and how long the
+    lookup took.
+    """
+    global _resolution
+    if _resolution is not None and not refresh:
+        return _resolution
+
+    start = time.perf_counter()
+    chrome_version = None
+    path = None
+    source = None
+
+    configured = os.environ.get("CHROMEDRIVER_PATH")
+    if configured:
+        if os.path.isfile(configured):
+            path, source = configured, "configured"
+        else:
+            logger.warning("CHROMEDRIVER_PATH %s does not exist; looking for chromedriver elsewhere", configured)
+
+    if path is None:
+        chrome_version = detect_chrome_version()
+        path = find_cached_driver(chrome_version)
+        source = "cache"
+
+    if path is None:
+        path = shutil.which("chromedriver")
+        source = "system"
+
+    if path is None and not os.environ.get("CHROMEDRIVER_OFFLINE"):
+        try:
+            path = download_driver(chrome_version)
+            source = "download"
+        except Exception as e:
+            logger.warning("webdriver-manager could not install chromedriver: %s", e)
+
+    if path is None:
+        raise RuntimeError(
+            "No chromedriver found. Set CHROMEDRIVER_PATH, put chromedriver on PATH, "
+            f"or place it in {cache_dir()}/<chrome version>/"
+        )
+
+    _resolution = DriverResolution(path, source, chrome_version, time.perf_counter() - start)
+    logger.info(
+        "Resolved chromedriver %s from %s in %.3fs (Chrome %s)",
+        path, source, _resolution.seconds, chrome_version or "unknown"
+    )
+    return _resolution
@@ -1,21 +1,61 @@
+import os
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import Select
-import time
+from page_objects.waits import WaitEngine, document_ready, staleness_of, url_changed
+from page_objects.page_agent import PageAgent
+from page_objects.navigation_metrics import measure_navigation
+from page_objects.screenshots import default_pipeline
+from page_objects.visual_compare import check_element
+
+# Reads every product card on the page in one round trip
+CATALOG_SCRIPT = """
+return Array.prototype.map.call(document.querySelectorAll('.hot-product-card'), function (card) {
+  var link = card.querySelector("a[href^='/product/']");
+  var name = card.querySelector('.hot-product-card-name');
+  var price = card.querySelector('.hot-product-card-price');
+  var href = link ? link.getAttribute('href') : null;
+  return {
+    id: href ? href.substring('/product/'.length) : null,
+    name: name ? name.innerText.trim() : null,
+    price: price ? price.innerText.trim() : null,
+    link: link ? link.href : null
+  };
+});
+"""
 
 class CymbalShopsPage:
     """Page Object Model for Cymbal Shops e-commerce website."""
     
+    CURRENCY_SELECT = (By.CSS_SELECTOR, "select[name='currency_code']")
+    PRODUCT_GRID = (By.XPATH, "(//div[contains(@class, 'hot-product-card')])[1]/..")
+    
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
-        self.base_url = "https://cymbal-shops.retail.cymbal.dev/"
+        self.waits = WaitEngine(driver)
+        self.agent = PageAgent(driver, self.waits)
+        self.agent.install()
+        self._catalog = None
+        # Overridden to point at a local record/replay server (see site_archive.py)
+        self.base_url = os.environ.get("CYMBAL_SHOPS_URL", "https://cymbal-shops.retail.cymbal.dev/")
     
     def navigate_to_homepage(self):
         """Navigate to Cymbal Shops homepage."""
-        self.driver.get(self.base_url)
-        time.sleep(2)  # Allow page to load
+        self._catalog = None
+        with measure_navigation(self.driver, "navigate_to_homepage"):
+            self.driver.get(self.base_url)
+            self.agent.wait_for_selector(
+                ".hot-product-card", label="navigate_to_homepage", raise_on_timeout=False
+            )
+    
+    def _wait_for_navigation(self, old_url, label):
+        """Wait for a click to load a new page."""
+        self._catalog = None
+        self.waits.until(url_changed(old_url), label=label, raise_on_timeout=False)
+        self.waits.until(document_ready(), label=label)
     
     def get_hot_products_title(self):
         """Get the Hot Products section title."""
@@ -25,31 +65,41 @@ class CymbalShopsPage:
         """Get all product cards on the homepage."""
         return self.driver.find_elements(By.CSS_SELECTOR, ".hot-product-card")
     
+    def get_catalog_records(self, refresh=False):
+        """Get every product card as a record with id, name, price and link, in page order.
+        
+        The records are read with a single script call and kept until the
+        page object navigates or changes currency.
+        """
+        if self._catalog is None or refresh:
+            self._catalog = self.driver.execute_script(CATALOG_SCRIPT)
+        return self._catalog
+    
+    def get_catalog(self, refresh=False):
+        """Get the product card records indexed by product ID."""
+        catalog = {}
+        for record in self.get_catalog_records(refresh):
+            # The first card wins, as with find_element
+            catalog.setdefault(record["id"], record)
+        return catalog
+    
     def get_product_price(self, product_id):
         """Get price of specific product by ID."""
-        try:
-            product_card = self.driver.find_element(
-                By.CSS_SELECTOR, f"a[href='/product/{product_id}']"
-            ).find_element(By.XPATH, "..")
-            return product_card.find_element(By.CSS_SELECTOR, ".hot-product-card-price").text
-        except:
-            return None
+        record = self.get_catalog().get(product_id)
+        return record["price"] if record else None
     
     def get_product_name(self, product_id):
         """Get name of specific product by ID."""
-        try:
-            product_card = self.driver.find_element(
-                By.CSS_SELECTOR, f"a[href='/product/{product_id}']"
-            ).find_element(By.XPATH, "..")
-            return product_card.find_element(By.CSS_SELECTOR, ".hot-product-card-name").text
-        except:
-            return None
+        record = self.get_catalog().get(product_id)
+        return record["name"] if record else None
     
     def click_product(self, product_id):
         """Click on a specific product to view details."""
         product_link = self.driver.find_element(By.CSS_SELECTOR, f"a[href='/product/{product_id}']")
-        product_link.click()
-        time.sleep(2)
+        old_url = self.driver.current_url
+        with measure_navigation(self.driver, "click_product"):
+            product_link.click()
+            self._wait_for_navigation(old_url, "click_product")
     
     def add_product_to_cart(self, product_id):
         """Add product to cart from product detail page."""
@@ -60,15 +110,17 @@ class CymbalShopsPage:
             add_button = self.wait.until(
                 EC.element_to_be_clickable((By.CSS_SELECTOR, "button[data-testid='add-to-cart']"))
             )
+            old_url = self.driver.current_url
             add_button.click()
-            time.sleep(1)
+            self._wait_for_navigation(old_url, "add_product_to_cart")
             return True
         except:
             # If button not found, try alternative selectors
             try:
                 add_button = self.driver.find_element(By.CSS_SELECTOR, "button:contains('Add to Cart')")
+                old_url = self.driver.current_url
                 add_button.click()
-                time.sleep(1)
+                self._wait_for_navigation(old_url, "add_product_to_cart")
                 return True
             except:
                 return False
@@ -77,8 +129,9 @@ class CymbalShopsPage:
         """Get the current cart total."""
         try:
             cart_link = self.driver.find_element(By.CSS_SELECTOR, ".cart-link")
+            old_url = self.driver.current_url
             cart_link.click()
-            time.sleep(2)
+            self._wait_for_navigation(old_url, "get_cart_total")
             
             # Look for cart total
             cart_total = self.driver.find_element(By.CSS_SELECTOR, ".cart-total")
@@ -89,10 +142,16 @@ class CymbalShopsPage:
     def change_currency(self, currency_code):
         """Change currency display."""
         try:
-            currency_select = self.driver.find_element(By.CSS_SELECTOR, "select[name='currency_code']")
+            currency_select = self.driver.find_element(*self.CURRENCY_SELECT)
             select = Select(currency_select)
+            if select.first_selected_option.get_attribute("value") == currency_code:
+                return True
             select.select_by_value(currency_code)
-            time.sleep(2)  # Allow currency conversion to complete
+            self._catalog = None
+            # Selecting a currency submits the form and reloads the page;
+            # wait for the new page to finish its requests and rendering
+            self.waits.until(staleness_of(currency_select), label="change_currency")
+            self.agent.wait_for_quiet(label="change_currency")
             return True
         except:
             return False
@@ -108,15 +167,7 @@ class CymbalShopsPage:
     
     def get_all_product_prices(self):
         """Get all product prices currently displayed."""
-        prices = []
-        product_cards = self.get_product_cards()
-        for card in product_cards:
-            try:
-                price = card.find_element(By.CSS_SELECTOR, ".hot-product-card-price").text
-                prices.append(price)
-            except:
-                continue
-        return prices
+        return [record["price"] for record in self.get_catalog_records() if record["price"] is not None]
     
     def verify_page_loaded(self):
         """Verify that the page has loaded completely."""
@@ -132,6 +183,14 @@ class CymbalShopsPage:
         """Get the page title."""
         return self.driver.title
     
+    def check_product_grid_visual(self, name="product_grid", ignore=()):
+        """Compare the hot products grid with its baseline screenshot (see visual_compare.py)."""
+        return check_element(self.driver, self.PRODUCT_GRID, f"cymbal_{name}", ignore)
+    
     def take_screenshot(self, filename):
-        """Take a screenshot of the current page."""
-        self.driver.save_screenshot(f"screenshots/{filename}.png")
+        """Take a screenshot of the current page; it is written in the background.
+
+        Returns the path of the file, screenshots/<filename>.jpg with Pillow (.png
+        without), or of an earlier identical screenshot.
+        """
+        return default_pipeline().capture(self.driver, filename)
@@ -0,0 +1,53 @@
+"""
+Element cache for the page objects.
+
+Each find_element is a WebDriver round trip, and the page objects look up
+the same inputs and buttons many times per test. LocatorCache keeps the
+WebElement for each locator until the page object navigates or the element
+goes stale, and counts hits and misses.
+"""
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+
+class LocatorCache:
+    """Caches WebElements by locator, refinding them when they go stale."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self._elements = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def find(self, locator):
+        """Return the cached element for locator, finding it on a miss."""
+        element = self._elements.get(locator)
+        if element is not None:
+            self.hits += 1
+            return element
+
+        self.misses += 1
+        element = self.driver.find_element(*locator)
+        self._elements[locator] = element
+        return element
+
+    def call(self, locator, action):
+        """Return action(element), refinding the element once if it has gone stale."""
+        try:
+            return action(self.find(locator))
+        except StaleElementReferenceException:
+            self.stale += 1
+            self.invalidate(locator)
+            return action(self.find(locator))
+
+    def invalidate(self, locator=None):
+        """Forget one cached element, or all of them (e.g. after navigation)."""
+        if locator is None:
+            self._elements.clear()
+        else:
+            self._elements.pop(locator, None)
+
+    def stats(self):
+        """Return hit, miss and stale counts."""
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale}
@@ -0,0 +1,177 @@
+"""
+Browser-side performance metrics for page object navigations.
+
+A test's wall-clock time mixes the app, the network and the harness
+(WebDriver round trips, waits). NavigationMetrics records what the browser
+itself measured for each navigation:
+
+- Navigation Timing: DNS, connect, TTFB, response, DOMContentLoaded, load
+- Resource Timing: request count, transferred bytes, slowest resource
+- PerformanceObserver: largest contentful paint, cumulative layout shift,
+  long tasks
+- the CDP Performance domain: script, layout, style and task time spent by
+  the renderer during the navigation, JS heap size and DOM node count
+
+harness_ms is the wall time of the page object call not covered by the
+browser's own navigation (load event), i.e. waiting and WebDriver overhead.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+from selenium.common.exceptions import WebDriverException
+
+OBSERVER_SCRIPT = """
+(function () {
+  if (window.__navMetrics || !window.PerformanceObserver) { return; }
+  var metrics = window.__navMetrics = { lcp: null, cls: 0, longTasks: 0, longTaskTime: 0 };
+  function observe(type, callback) {
+    try {
+      new PerformanceObserver(function (list) { list.getEntries().forEach(callback); })
+        .observe({ type: type, buffered: true });
+    } catch (e) {}
+  }
+  observe('largest-contentful-paint', function (entry) { metrics.lcp = entry.startTime; });
+  observe('layout-shift', function (entry) { if (!entry.hadRecentInput) { metrics.cls += entry.value; } });
+  observe('longtask', function (entry) { metrics.longTasks++; metrics.longTaskTime += entry.duration; });
+})();
+"""
+
+COLLECT_SCRIPT = OBSERVER_SCRIPT + """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var observed = window.__navMetrics || {};
+var slowest = null, bytes = 0;
+resources.forEach(function (entry) {
+  bytes += entry.transferSize || 0;
+  if (!slowest || entry.duration > slowest.duration) { slowest = entry; }
+});
+function span(start, end) { return nav && nav[end] > 0 ? nav[end] - nav[start] : null; }
+return {
+  navigation: nav ? {
+    dns_ms: span('domainLookupStart', 'domainLookupEnd'),
+    connect_ms: span('connectStart', 'connectEnd'),
+    ttfb_ms: span('requestStart', 'responseStart'),
+    response_ms: span('responseStart', 'responseEnd'),
+    dom_content_loaded_ms: span('startTime', 'domContentLoadedEventEnd'),
+    load_ms: span('startTime', 'loadEventEnd'),
+    transfer_bytes: nav.transferSize
+  } : {},
+  resources: {
+    count: resources.length,
+    transfer_bytes: bytes,
+    slowest_ms: slowest ? slowest.duration : null,
+    slowest_url: slowest ? slowest.name : null
+  },
+  vitals: {
+    lcp_ms: observed.lcp === undefined ? null : observed.lcp,
+    cls: observed.cls === undefined ? null : observed.cls,
+    long_tasks: observed.longTasks === undefined ? null : observed.longTasks,
+    long_task_ms: observed.longTaskTime === undefined ? null : observed.longTaskTime
+  }
+};
+"""
+
+# CDP Performance.getMetrics values: cumulative durations (seconds) are reported as deltas
+CDP_DURATIONS = {
+    "ScriptDuration": "script_ms",
+    "LayoutDuration": "layout_ms",
+    "RecalcStyleDuration": "style_ms",
+    "TaskDuration": "task_ms",
+}
+CDP_GAUGES = {"JSHeapUsedSize": "js_heap_bytes", "Nodes": "dom_nodes"}
+
+
+class NavigationMetrics:
+    """Collects browser performance metrics around page object navigations."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.records = []
+        self.cdp = True
+
+    def enable(self):
+        """Observe every new document and turn on the CDP Performance domain (Chrome only)."""
+        try:
+            if not getattr(self.driver, "_nav_observer_registered", False):
+                self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": OBSERVER_SCRIPT})
+                self.driver._nav_observer_registered = True
+            self.driver.execute_cdp_cmd("Performance.enable", {})
+        except (AttributeError, WebDriverException):
+            self.cdp = False
+        return self.cdp
+
+    def _cdp_metrics(self):
+        if not self.cdp:
+            return {}
+        try:
+            result = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+        except WebDriverException:
+            return {}
+        return {metric["name"]: metric["value"] for metric in result.get("metrics", [])}
+
+    @contextmanager
+    def measure(self, label):
+        """Record the metrics of the navigation performed inside the with block."""
+        before = self._cdp_metrics()
+        start = time.perf_counter()
+        yield
+        self.collect(label, time.perf_counter() - start, before)
+
+    def collect(self, label, wall_seconds, before=None):
+        """Read the current page's metrics and append a record for this navigation."""
+        record = self.driver.execute_script(COLLECT_SCRIPT)
+        after = self._cdp_metrics()
+        before = before or {}
+        renderer = {}
+        for name, key in CDP_DURATIONS.items():
+            if name in after:
+                renderer[key] = (after[name] - before.get(name, 0)) * 1000
+        for name, key in CDP_GAUGES.items():
+            if name in after:
+                renderer[key] = after[name]
+
+        wall_ms = wall_seconds * 1000
+        browser_ms = record["navigation"].get("load_ms") or 0
+        record.update({
+            "label": label,
+            "wall_ms": wall_ms,
+            "harness_ms": max(0.0, wall_ms - browser_ms),
+            "renderer": renderer,
+        })
+        self.records.append(record)
+        return record
+
+    def properties(self):
+        """Numeric metrics as (name, value) pairs, averaged per navigation label.
+
+        Names look like nav.navigate_to_app.navigation.ttfb_ms, which is how
+        they appear in the JUnit XML and the history store.
+        """
+        totals = {}
+        counts = {}
+        for record in self.records:
+            label = record["label"]
+            counts[label] = counts.get(label, 0) + 1
+            flat = {"wall_ms": record["wall_ms"], "harness_ms": record["harness_ms"]}
+            for group in ("navigation", "resources", "vitals", "renderer"):
+                for key, value in record[group].items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        flat[f"{group}.{key}"] = value
+            for key, value in flat.items():
+                name = f"nav.{label}.{key}"
+                totals.setdefault(name, []).append(value)
+
+        properties = [(f"nav.{label}.count", count) for label, count in counts.items()]
+        properties.extend((name, round(sum(values) / len(values), 3)) for name, values in totals.items())
+        return properties
+
+
+def measure_navigation(driver, label):
+    """Context manager recording a navigation when metrics are enabled for the driver.
+
+    The conftest attaches a NavigationMetrics to the driver as nav_metrics
+    when --nav-metrics is given; otherwise this does nothing.
+    """
+    metrics = getattr(driver, "nav_metrics", None)
+    return metrics.measure(label) if metrics is not None else nullcontext()
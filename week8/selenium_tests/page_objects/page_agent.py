@@ -0,0 +1,135 @@
+"""
+In-page readiness agent for the page objects.
+
+Polling find_element costs one WebDriver round trip per poll. The agent is
+a small script that lives in the page, counts in-flight fetch/XHR requests
+and timestamps DOM mutations, so Python can block on a single async script
+call until the page is quiet or a selector appears.
+
+On Chrome the agent is registered with Page.addScriptToEvaluateOnNewDocument
+so it sees requests made while the page loads. Every wait script also
+installs it if it is missing, so the waits work without CDP as well.
+"""
+
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from page_objects.waits import WaitRecord
+
+AGENT_SCRIPT = """
+(function () {
+  if (window.__pageAgent) { return; }
+  var agent = window.__pageAgent = { inflight: 0, lastActivity: Date.now(), listeners: [] };
+  function touch() {
+    agent.lastActivity = Date.now();
+    agent.listeners.slice().forEach(function (listener) { listener(); });
+  }
+  function started() { agent.inflight++; touch(); }
+  function finished() { agent.inflight = Math.max(0, agent.inflight - 1); touch(); }
+
+  new MutationObserver(touch).observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true
+  });
+
+  if (window.fetch) {
+    var originalFetch = window.fetch;
+    window.fetch = function () {
+      started();
+      return originalFetch.apply(this, arguments).then(
+        function (response) { finished(); return response; },
+        function (error) { finished(); throw error; }
+      );
+    };
+  }
+
+  var originalSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function () {
+    started();
+    this.addEventListener('loadend', finished, { once: true });
+    return originalSend.apply(this, arguments);
+  };
+})();
+"""
+
+WAIT_SCRIPT = """
+var selector = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+""" + AGENT_SCRIPT + """
+var agent = window.__pageAgent, start = Date.now(), timer = null, deadline = null, finished = false;
+
+function finish(status, element) {
+  if (finished) { return; }
+  finished = true;
+  clearTimeout(timer);
+  clearTimeout(deadline);
+  agent.listeners.splice(agent.listeners.indexOf(check), 1);
+  done({ status: status, elapsed: Date.now() - start, inflight: agent.inflight, element: element || null });
+}
+
+function check() {
+  if (selector) {
+    var element = document.querySelector(selector);
+    if (element) { finish('ready', element); }
+    return;
+  }
+  var idle = Date.now() - agent.lastActivity;
+  if (agent.inflight === 0 && idle >= quietMs) {
+    finish('ready');
+    return;
+  }
+  clearTimeout(timer);
+  if (agent.inflight === 0) {
+    timer = setTimeout(check, Math.max(quietMs - idle, 10));
+  }
+}
+
+agent.listeners.push(check);
+deadline = setTimeout(function () { finish('timeout'); }, timeoutMs);
+check();
+"""
+
+
+class PageAgent:
+    """Waits on the in-page agent with one async script call per wait."""
+
+    def __init__(self, driver, waits=None, timeout=10, quiet_ms=100):
+        self.driver = driver
+        # Optional WaitEngine whose records also collect the agent waits
+        self.waits = waits
+        self.timeout = timeout
+        self.quiet_ms = quiet_ms
+
+    def install(self):
+        """Register the agent for every new document in this browser (Chrome only)."""
+        if getattr(self.driver, "_page_agent_registered", False):
+            return True
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": AGENT_SCRIPT})
+        except (AttributeError, WebDriverException):
+            return False
+        self.driver._page_agent_registered = True
+        return True
+
+    def wait_for_quiet(self, quiet_ms=None, timeout=None, label="wait_for_quiet", raise_on_timeout=True):
+        """Block until no requests are in flight and the DOM has not changed for quiet_ms."""
+        quiet_ms = self.quiet_ms if quiet_ms is None else quiet_ms
+        return self._wait(None, quiet_ms, timeout, label, raise_on_timeout)
+
+    def wait_for_selector(self, selector, timeout=None, label="wait_for_selector", raise_on_timeout=True):
+        """Block until an element matching the CSS selector exists and return it."""
+        result = self._wait(selector, 0, timeout, label, raise_on_timeout)
+        return result["element"] if result["status"] == "ready" else None
+
+    def _wait(self, selector, quiet_ms, timeout, label, raise_on_timeout):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        # The driver's script timeout (30 s by default) must exceed the in-page timeout
+        result = self.driver.execute_async_script(WAIT_SCRIPT, selector, quiet_ms, int(timeout * 1000))
+        timed_out = result["status"] == "timeout"
+
+        if self.waits is not None:
+            self.waits.records.append(WaitRecord(label, time.perf_counter() - start, timed_out))
+        if timed_out and raise_on_timeout:
+            raise TimeoutException(f"{label}: page not ready after {timeout}s")
+        return result
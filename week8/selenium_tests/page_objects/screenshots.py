@@ -0,0 +1,169 @@
+"""
+Background screenshot pipeline for the page objects.
+
+driver.save_screenshot() decodes the base64 PNG and writes the full-size
+file on the test thread. ScreenshotPipeline only grabs and hashes the PNG
+bytes on the test thread and leaves the rest to a worker thread:
+
+- identical frames (same bytes as an earlier screenshot) are not written
+  again; capture() returns the path of the earlier file instead
+- images are downscaled to max_width and stored as JPEG with Pillow (in
+  requirements.txt); without it the PNG is written as is. The extension
+  follows: <name>.jpg with Pillow, <name>.png without, so callers should
+  use the path capture() returns
+- the oldest screenshots are deleted once the directory holds more than
+  max_files files or max_bytes bytes
+
+The page objects' take_screenshot() and the capture-on-failure hook in
+conftest.py share the pipeline returned by default_pipeline().
+"""
+
+import hashlib
+import io
+import os
+import queue
+import re
+import threading
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg")
+
+
+def safe_filename(name):
+    """A file name made of name's letters, digits, dots, dashes and underscores."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_") or "screenshot"
+
+
+class ScreenshotPipeline:
+    """Encodes, deduplicates and writes screenshots on a background thread."""
+
+    def __init__(self, directory="screenshots", max_width=1280, jpeg_quality=70,
+                 max_files=200, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_width = max_width
+        self.jpeg_quality = jpeg_quality
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.extension = ".jpg" if Image is not None else ".png"
+        self._queue = queue.Queue()
+        # PNG digest -> path of its file; shared with the worker, which forgets pruned files
+        self._seen = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.captured = 0
+        self.written = 0
+        self.duplicates = 0
+        self.pruned = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.errors = 0
+
+    def capture(self, driver, name):
+        """Grab a screenshot and queue it for writing; returns the path of its file.
+
+        A frame identical to an earlier screenshot is not queued: the path of
+        the earlier file is returned, so callers never get a path that will
+        not be written.
+        """
+        png = driver.get_screenshot_as_png()
+        path = os.path.join(self.directory, safe_filename(name) + self.extension)
+        digest = hashlib.sha1(png).hexdigest()
+        self.captured += 1
+        self.bytes_in += len(png)
+        with self._lock:
+            earlier = self._seen.get(digest)
+            if earlier is None:
+                # A new frame under an earlier name replaces that file
+                self._forget(path)
+                self._seen[digest] = path
+        if earlier is not None:
+            self.duplicates += 1
+            return earlier
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._work, name="screenshots", daemon=True)
+            self._thread.start()
+        self._queue.put((path, png))
+        return path
+
+    def _work(self):
+        while True:
+            path, png = self._queue.get()
+            try:
+                self._write(path, png)
+            except Exception:
+                self.errors += 1
+                with self._lock:
+                    self._forget(path)
+            finally:
+                self._queue.task_done()
+
+    def _forget(self, path):
+        """Drop the digests of the file at path (the caller holds _lock)."""
+        for digest in [digest for digest, seen in self._seen.items() if seen == path]:
+            del self._seen[digest]
+
+    def _write(self, path, png):
+        data = png
+        if Image is not None:
+            image = Image.open(io.BytesIO(png))
+            if self.max_width and image.width > self.max_width:
+                image.thumbnail((self.max_width, image.height * self.max_width // image.width))
+            output = io.BytesIO()
+            image.convert("RGB").save(output, "JPEG", quality=self.jpeg_quality, optimize=True)
+            data = output.getvalue()
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.written += 1
+        self.bytes_out += len(data)
+        self._prune()
+
+    def _prune(self):
+        """Delete the oldest screenshots beyond max_files / max_bytes."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(IMAGE_EXTENSIONS):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        while files and (len(files) > self.max_files or total > self.max_bytes):
+            _, size, path = files.pop(0)
+            with self._lock:
+                # Identical frames captured from now on are written again
+                self._forget(path)
+            os.remove(path)
+            total -= size
+            self.pruned += 1
+
+    def flush(self):
+        """Wait until every queued screenshot has been written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def summary(self):
+        """Return a one-line description of the screenshots handled."""
+        ratio = (self.bytes_out / self.bytes_in * 100) if self.bytes_in else 0.0
+        return (
+            f"{self.captured} captured, {self.written} written to {self.directory}/ "
+            f"({self.bytes_out / 1024:.0f} KiB, {ratio:.0f}% of the raw PNGs), "
+            f"{self.duplicates} duplicates skipped, {self.pruned} old files pruned, "
+            f"{self.errors} errors"
+        )
+
+
+_default = None
+
+
+def default_pipeline():
+    """The screenshot pipeline shared by the page objects and the failure hook."""
+    global _default
+    if _default is None:
+        _default = ScreenshotPipeline()
+    return _default
@@ -1,20 +1,95 @@
+import os
+import time
+
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-import time
+from page_objects.waits import WaitEngine, WaitRecord
+from page_objects.page_agent import AGENT_SCRIPT, PageAgent
+from page_objects.locator_cache import LocatorCache
+from page_objects.navigation_metrics import measure_navigation
+from page_objects.screenshots import default_pipeline
+from page_objects.visual_compare import check_element
+
+# Fills the three sides, clicks classify and waits for the analysis in one
+# async script call. The inputs are React-controlled, so the value is set
+# through the native setter and an input event tells React about it.
+FILL_AND_CLASSIFY_SCRIPT = """
+var values = arguments[0], quietMs = arguments[1], timeoutMs = arguments[2];
+var done = arguments[arguments.length - 1];
+""" + AGENT_SCRIPT + """
+var agent = window.__pageAgent, start = Date.now(), clicked = false;
+var setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+var inputs = ['sideA', 'sideB', 'sideC'].map(function (id) { return document.getElementById(id); });
+var button = document.querySelector('button');
+
+inputs.forEach(function (input, index) {
+  setValue.call(input, values[index]);
+  input.dispatchEvent(new Event('input', { bubbles: true }));
+});
+// A number input drops text it cannot parse, and the button stays disabled while any side is empty
+var disabled = inputs.some(function (input) { return input.value === ''; });
+
+function finish(status) {
+  var card = document;
+  Array.prototype.forEach.call(document.querySelectorAll('h2'), function (heading) {
+    if (heading.textContent.trim() === 'Triangle Analysis') { card = heading.parentElement; }
+  });
+  var result = card.querySelector('.text-center');
+  var error = card.querySelector('.text-red-300');
+  done({
+    status: status,
+    clicked: clicked,
+    elapsed: Date.now() - start,
+    result: result ? result.innerText : null,
+    error: error ? error.innerText : null
+  });
+}
+
+function poll() {
+  if (Date.now() - start > timeoutMs) { finish('timeout'); return; }
+  if (!clicked) {
+    // Wait for React to render the new values before clicking
+    if (button.disabled !== disabled) { setTimeout(poll, 10); return; }
+    if (disabled) { finish('disabled'); return; }
+    clicked = true;
+    button.click();
+  }
+  var busy = agent.inflight > 0 || button.textContent.indexOf('Classifying') !== -1;
+  if (busy || Date.now() - agent.lastActivity < quietMs) { setTimeout(poll, 10); return; }
+  finish('ready');
+}
+
+// Let React commit the input events before the first check
+setTimeout(poll, 0);
+"""
 
 class TriangleClassifierPage:
     """Page Object Model for Triangle Classifier application."""
     
+    SIDE_A = (By.ID, "sideA")
+    SIDE_B = (By.ID, "sideB")
+    SIDE_C = (By.ID, "sideC")
+    CLASSIFY_BUTTON = (By.CSS_SELECTOR, "button")
+    RESULT_PANEL = (By.XPATH, "//h2[normalize-space()='Triangle Analysis']/..")
+    
     def __init__(self, driver):
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
-        self.base_url = "https://msse-640-2025summer.vercel.app/"
+        self.waits = WaitEngine(driver)
+        self.agent = PageAgent(driver, self.waits)
+        self.agent.install()
+        self.elements = LocatorCache(driver)
+        # Overridden to point at a local record/replay server (see site_archive.py)
+        self.base_url = os.environ.get("TRIANGLE_APP_URL", "https://msse-640-2025summer.vercel.app/")
     
     def navigate_to_app(self):
         """Navigate to Triangle Classifier application."""
-        self.driver.get(self.base_url)
-        time.sleep(2)  # Allow page to load
+        self.elements.invalidate()
+        with measure_navigation(self.driver, "navigate_to_app"):
+            self.driver.get(self.base_url)
+            self.agent.wait_for_selector("#sideA", label="navigate_to_app")
     
     def get_page_title(self):
         """Get the page title."""
@@ -22,43 +97,54 @@ class TriangleClassifierPage:
     
     def get_side_a_input(self):
         """Get the Side A input field."""
-        return self.driver.find_element(By.ID, "sideA")
+        return self.elements.find(self.SIDE_A)
     
     def get_side_b_input(self):
         """Get the Side B input field."""
-        return self.driver.find_element(By.ID, "sideB")
+        return self.elements.find(self.SIDE_B)
     
     def get_side_c_input(self):
         """Get the Side C input field."""
-        return self.driver.find_element(By.ID, "sideC")
+        return self.elements.find(self.SIDE_C)
     
     def get_classify_button(self):
         """Get the Classify Triangle button."""
-        return self.driver.find_element(By.CSS_SELECTOR, "button")
+        return self.elements.find(self.CLASSIFY_BUTTON)
     
     def input_sides(self, side_a, side_b, side_c):
         """Input triangle side lengths."""
-        side_a_input = self.get_side_a_input()
-        side_b_input = self.get_side_b_input()
-        side_c_input = self.get_side_c_input()
+        sides = ((self.SIDE_A, side_a), (self.SIDE_B, side_b), (self.SIDE_C, side_c))
         
         # Clear existing values
-        side_a_input.clear()
-        side_b_input.clear()
-        side_c_input.clear()
+        for locator, _ in sides:
+            self.elements.call(locator, lambda element: element.clear())
         
         # Input new values
-        side_a_input.send_keys(str(side_a))
-        side_b_input.send_keys(str(side_b))
-        side_c_input.send_keys(str(side_c))
+        for locator, value in sides:
+            self.elements.call(locator, lambda element: element.send_keys(str(value)))
         
-        time.sleep(0.5)  # Allow input to register
+        # Wait for each input to hold the typed value
+        for locator, value in sides:
+            expected = self._expected_input_value(value)
+            self.waits.until(
+                lambda driver: self.elements.call(locator, lambda element: element.get_attribute("value")) == expected,
+                timeout=2, label="input_sides", raise_on_timeout=False
+            )
     
     def classify_triangle(self):
         """Click classify button."""
-        classify_button = self.get_classify_button()
-        classify_button.click()
-        time.sleep(1)  # Allow processing
+        self.elements.call(self.CLASSIFY_BUTTON, lambda element: element.click())
+        # The click starts the API request; wait until it returns and the result has rendered
+        self.agent.wait_for_quiet(timeout=5, label="classify_triangle", raise_on_timeout=False)
+    
+    @staticmethod
+    def _expected_input_value(value):
+        """Value a number input reports after typing value (non-numbers are dropped)."""
+        try:
+            float(str(value))
+            return str(value)
+        except ValueError:
+            return ""
     
     def get_result_text(self):
         """Get the classification result text."""
@@ -82,14 +168,13 @@ class TriangleClassifierPage:
     
     def is_button_enabled(self):
         """Check if the classify button is enabled."""
-        classify_button = self.get_classify_button()
-        return classify_button.is_enabled()
+        return self.elements.call(self.CLASSIFY_BUTTON, lambda element: element.is_enabled())
     
     def get_placeholder_text(self):
         """Get placeholder text from input fields."""
-        side_a_placeholder = self.get_side_a_input().get_attribute("placeholder")
-        side_b_placeholder = self.get_side_b_input().get_attribute("placeholder")
-        side_c_placeholder = self.get_side_c_input().get_attribute("placeholder")
+        side_a_placeholder = self.elements.call(self.SIDE_A, lambda element: element.get_attribute("placeholder"))
+        side_b_placeholder = self.elements.call(self.SIDE_B, lambda element: element.get_attribute("placeholder"))
+        side_c_placeholder = self.elements.call(self.SIDE_C, lambda element: element.get_attribute("placeholder"))
         return {
             "sideA": side_a_placeholder,
             "sideB": side_b_placeholder,
@@ -118,19 +203,14 @@ class TriangleClassifierPage:
     
     def clear_all_inputs(self):
         """Clear all input fields."""
-        side_a_input = self.get_side_a_input()
-        side_b_input = self.get_side_b_input()
-        side_c_input = self.get_side_c_input()
-        
-        side_a_input.clear()
-        side_b_input.clear()
-        side_c_input.clear()
+        for locator in (self.SIDE_A, self.SIDE_B, self.SIDE_C):
+            self.elements.call(locator, lambda element: element.clear())
     
     def get_input_values(self):
         """Get current values in input fields."""
-        side_a_value = self.get_side_a_input().get_attribute("value")
-        side_b_value = self.get_side_b_input().get_attribute("value")
-        side_c_value = self.get_side_c_input().get_attribute("value")
+        side_a_value = self.elements.call(self.SIDE_A, lambda element: element.get_attribute("value"))
+        side_b_value = self.elements.call(self.SIDE_B, lambda element: element.get_attribute("value"))
+        side_c_value = self.elements.call(self.SIDE_C, lambda element: element.get_attribute("value"))
         
         return {
             "sideA": side_a_value,
@@ -138,8 +218,41 @@ class TriangleClassifierPage:
             "sideC": side_c_value
         }
     
-    def test_triangle_classification(self, side_a, side_b, side_c, expected_result=None):
+    def classify_fast(self, side_a, side_b, side_c, timeout=5):
+        """Fill the sides, classify and read the result in a single WebDriver call.
+        
+        Values are set directly rather than typed, so use input_sides and
+        classify_triangle for tests that need real keystrokes. Raises
+        TimeoutException if no result settles within timeout seconds.
+        """
+        start = time.perf_counter()
+        result = self.driver.execute_async_script(
+            FILL_AND_CLASSIFY_SCRIPT,
+            [str(side_a), str(side_b), str(side_c)],
+            self.agent.quiet_ms,
+            int(timeout * 1000)
+        )
+        self.waits.records.append(
+            WaitRecord("classify_fast", time.perf_counter() - start, result["status"] == "timeout")
+        )
+        
+        # Only a "ready" status means the text on the card belongs to these sides
+        if result["status"] == "timeout":
+            raise TimeoutException(
+                f"classify_fast: no result for ({side_a}, {side_b}, {side_c}) after {timeout}s"
+            )
+        if result["status"] == "disabled":
+            return {"type": "error", "message": "Classify button is disabled: a side is empty or not a number"}
+        if result["error"]:
+            return {"type": "error", "message": result["error"]}
+        else:
+            return {"type": "success", "result": result["result"]}
+    
+    def test_triangle_classification(self, side_a, side_b, side_c, expected_result=None, fast=False):
         """Complete triangle classification test."""
+        if fast:
+            return self.classify_fast(side_a, side_b, side_c)
+        
         self.input_sides(side_a, side_b, side_c)
         self.classify_triangle()
         
@@ -151,6 +264,14 @@ class TriangleClassifierPage:
         else:
             return {"type": "success", "result": result_text}
     
+    def check_result_panel_visual(self, name, ignore=()):
+        """Compare the Triangle Analysis card with its baseline screenshot (see visual_compare.py)."""
+        return check_element(self.driver, self.RESULT_PANEL, f"triangle_{name}", ignore)
+    
     def take_screenshot(self, filename):
-        """Take a screenshot of the current page."""
-        self.driver.save_screenshot(f"screenshots/{filename}.png")
+        """Take a screenshot of the current page; it is written in the background.
+
+        Returns the path of the file, screenshots/<filename>.jpg with Pillow (.png
+        without), or of an earlier identical screenshot.
+        """
+        return default_pipeline().capture(self.driver, filename)
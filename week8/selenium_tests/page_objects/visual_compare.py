@@ -0,0 +1,341 @@
+"""
+Visual regression checks against stored baseline screenshots.
+
+VisualBaselines compares a screenshot with the baseline of the same name in
+visual_baselines/ in increasingly expensive steps and stops at the first
+one that decides:
+
+1. identical PNG bytes (SHA-1 of the file) -> "identical"
+2. same difference hash (dHash of the image with the ignore regions
+   blanked out) -> "unchanged"
+3. per-pixel diff with NumPy, ignoring the given regions; the image passes
+   when at most max_diff_ratio of the pixels differ by more than tolerance
+   in some channel -> "within tolerance" or "changed"
+
+The baseline's hashes are kept in index.json so unchanged screenshots never
+decode the baseline image. A changed image gets a <name>.diff.png next to
+its baseline with the differing pixels in red. Baselines are only written
+when updating (--update-visual-baselines); outside that a screenshot with
+no baseline is a "missing baseline" failure, so a fresh checkout without
+visual_baselines/ cannot pass by recording whatever it sees.
+
+Element screenshots are taken with the CDP Page.captureScreenshot command
+and optimizeForSpeed, for which Chrome writes unfiltered, lightly
+compressed PNGs: the NumPy decoder below reads those in about a
+millisecond. Other PNGs (WebDriver's element screenshot when CDP is not
+available, Average/Paeth filtered rows) are decoded with Pillow, which is
+in requirements.txt; without it they raise ValueError rather than falling
+back to a per-byte Python loop.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import os
+import struct
+import zlib
+from collections import namedtuple
+
+import numpy as np
+from selenium.common.exceptions import WebDriverException
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+DEFAULT_BASELINE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "visual_baselines"
+)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+PASSING = ("identical", "unchanged", "within tolerance", "new baseline")
+
+MISSING_BASELINE = "missing baseline"
+
+
+class VisualResult(namedtuple("VisualResult", "name status distance diff_ratio diff_path")):
+    """Outcome of one check; distance is the dHash Hamming distance, diff_ratio the changed pixel fraction."""
+
+    @property
+    def passed(self):
+        return self.status in PASSING
+
+
+def _unfilter_row(kind, row, previous, bpp):
+    """Undo the None, Sub or Up filter of one row; Average and Paeth are left to Pillow."""
+    if kind == 0:
+        return row
+    if kind == 1:
+        # Sub: running sum per channel, modulo 256
+        return np.cumsum(row.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+    if kind == 2:
+        return row + previous
+    raise ValueError(f"Unknown PNG filter type {kind}")
+
+
+def decode_png(data):
+    """Decode a PNG into an RGB uint8 array of shape (height, width, 3)."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Not a PNG image")
+    position = len(PNG_SIGNATURE)
+    idat = []
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        if kind == b"IHDR":
+            width, height, depth, color, _, _, interlace = struct.unpack(">IIBBBBB", body)
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+        position += length + 12
+    if depth != 8 or color not in (2, 6) or interlace:
+        if Image is not None:
+            return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+        raise ValueError("Only 8-bit, non-interlaced RGB/RGBA PNGs can be decoded without Pillow")
+
+    bpp = 3 if color == 2 else 4
+    stride = width * bpp
+    raw = np.frombuffer(zlib.decompress(b"".join(idat)), dtype=np.uint8).reshape(height, stride + 1)
+    filters = raw[:, 0]
+    rows = raw[:, 1:]
+    if not filters.any():
+        pixels = rows
+    elif (filters > 2).any():
+        # Average and Paeth rows depend on the byte decoded just before, which NumPy cannot vectorize
+        if Image is None:
+            raise ValueError("PNGs with Average/Paeth filtered rows need Pillow (pip install -r requirements.txt)")
+        return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
+    else:
+        pixels = np.empty_like(rows)
+        previous = np.zeros(stride, dtype=np.uint8)
+        for y in range(height):
+            previous = pixels[y] = _unfilter_row(int(filters[y]), rows[y], previous, bpp)
+    return pixels.reshape(height, width, bpp)[:, :, :3]
+
+
+def encode_png(pixels):
+    """Encode an RGB uint8 array as a PNG (no filtering)."""
+    height, width, _ = pixels.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, -1)
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def ignore_mask(shape, ignore):
+    """Boolean (height, width) mask that is True inside the ignore regions (x, y, width, height)."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x, y, width, height in ignore:
+        mask[max(0, y):max(0, y + height), max(0, x):max(0, x + width)] = True
+    return mask
+
+
+def _bands(size, count):
+    """Start and end offsets of count (nearly) equal bands over size."""
+    edges = np.linspace(0, size, count + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def dhash(pixels, hash_size=16, ignore=()):
+    """Difference hash: whether each cell of a hash_size x (hash_size + 1) grayscale grid is brighter than its right neighbour.
+
+    Pixels inside the ignore regions count as black.
+    """
+    height, width = pixels.shape[:2]
+    if height < hash_size or width < hash_size + 1:
+        raise ValueError("Image is smaller than the hash grid")
+    if ignore:
+        pixels = pixels.copy()
+        for x, y, w, h in ignore:
+            pixels[max(0, y):max(0, y + h), max(0, x):max(0, x + w)] = 0
+
+    # Sum row bands first (a contiguous reduction), then column bands of the small result
+    flat = pixels.reshape(height, -1)
+    rows = np.stack([flat[start:end].sum(axis=0, dtype=np.uint32) for start, end in _bands(height, hash_size)])
+    rows = rows.reshape(hash_size, width, 3)
+    columns = _bands(width, hash_size + 1)
+    sums = np.stack([rows[:, start:end].sum(axis=1) for start, end in columns], axis=1)
+    counts = np.array([end - start for start, end in columns])
+    gray = (sums @ np.array([0.299, 0.587, 0.114])) / counts
+
+    bits = gray[:, 1:] > gray[:, :-1]
+    return np.packbits(bits).tobytes().hex()
+
+
+def hamming(first, second):
+    """Number of differing bits between two hex hashes."""
+    difference = np.frombuffer(bytes.fromhex(first), dtype=np.uint8) ^ np.frombuffer(bytes.fromhex(second), dtype=np.uint8)
+    return int(np.unpackbits(difference).sum())
+
+
+def pixel_diff(expected, actual, tolerance=16, ignore=()):
+    """(changed fraction, changed-pixel mask) between two equally sized RGB arrays.
+
+    A pixel has changed when any channel differs by more than tolerance.
+    """
+    # |a - b| without widening: max - min stays within uint8
+    difference = np.maximum(expected, actual)
+    difference -= np.minimum(expected, actual)
+    changed = difference[:, :, 0] > tolerance
+    changed |= difference[:, :, 1] > tolerance
+    changed |= difference[:, :, 2] > tolerance
+
+    compared = changed.size
+    if ignore:
+        mask = ignore_mask(changed.shape, ignore)
+        changed &= ~mask
+        compared -= int(mask.sum())
+    return (int(changed.sum()) / compared if compared else 0.0), changed
+
+
+class VisualBaselines:
+    """Baseline screenshots in a directory and the checks against them."""
+
+    def __init__(self, directory=DEFAULT_BASELINE_DIR, update=False, hash_size=16, tolerance=16,
+                 max_diff_ratio=0.001):
+        self.directory = directory
+        self.update = update
+        self.hash_size = hash_size
+        self.tolerance = tolerance
+        self.max_diff_ratio = max_diff_ratio
+        self.index_path = os.path.join(directory, "index.json")
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        self._decoded = {}
+        self.results = []
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.png")
+
+    def check(self, name, png, ignore=()):
+        """Compare PNG bytes with the baseline called name; returns a VisualResult."""
+        ignore = [tuple(region) for region in ignore]
+        digest = hashlib.sha1(png).hexdigest()
+        entry = self.index.get(name)
+
+        if entry is not None and not self.update and entry["sha1"] == digest:
+            return self._result(name, "identical", 0, 0.0)
+
+        pixels = decode_png(png)
+        current_hash = dhash(pixels, self.hash_size, ignore)
+
+        if self.update:
+            self._save(name, png, pixels, digest, current_hash, ignore)
+            return self._result(name, "new baseline", None, None)
+        if entry is None:
+            return self._result(name, MISSING_BASELINE, None, None)
+
+        # The stored hash only applies if it was taken with the same regions blanked out
+        same_regions = entry.get("ignore", []) == [list(region) for region in ignore]
+        if same_regions and entry["dhash"] == current_hash:
+            return self._result(name, "unchanged", 0, None)
+        distance = hamming(entry["dhash"], current_hash) if same_regions and len(entry["dhash"]) == len(current_hash) else None
+
+        expected = self._baseline_pixels(name)
+        if expected.shape != pixels.shape:
+            return self._result(name, "size changed", distance, 1.0)
+        ratio, changed = pixel_diff(expected, pixels, self.tolerance, ignore)
+        if ratio <= self.max_diff_ratio:
+            return self._result(name, "within tolerance", distance, ratio)
+        return self._result(name, "changed", distance, ratio, self._write_diff(name, pixels, changed))
+
+    def _result(self, name, status, distance, ratio, diff_path=None):
+        result = VisualResult(name, status, distance, ratio, diff_path)
+        self.results.append(result)
+        return result
+
+    def _baseline_pixels(self, name):
+        if name not in self._decoded:
+            with open(self.path(name), "rb") as f:
+                self._decoded[name] = decode_png(f.read())
+        return self._decoded[name]
+
+    def _save(self, name, png, pixels, digest, image_hash, ignore):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path(name), "wb") as f:
+            f.write(png)
+        self.index[name] = {
+            "sha1": digest,
+            "dhash": image_hash,
+            "size": [int(pixels.shape[1]), int(pixels.shape[0])],
+            "ignore": [list(region) for region in ignore],
+        }
+        self._decoded[name] = pixels
+        with open(self.index_path, "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+
+    def _write_diff(self, name, pixels, changed):
+        highlighted = (pixels // 3).astype(np.uint8)
+        highlighted[changed] = (255, 0, 0)
+        path = os.path.join(self.directory, f"{name}.diff.png")
+        with open(path, "wb") as f:
+            f.write(encode_png(highlighted))
+        return path
+
+    def summary(self):
+        """Return a one-line count of the check outcomes."""
+        counts = {}
+        for result in self.results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+        return ", ".join(f"{count} {status}" for status, count in counts.items())
+
+
+_default = None
+
+
+def default_baselines():
+    """The baseline store shared by the page objects (configured by conftest.py)."""
+    global _default
+    if _default is None:
+        _default = VisualBaselines()
+    return _default
+
+
+def configure_baselines(directory=DEFAULT_BASELINE_DIR, update=False):
+    """Replace the shared baseline store, e.g. to record new baselines."""
+    global _default
+    _default = VisualBaselines(directory, update)
+    return _default
+
+
+def element_png(driver, element):
+    """PNG screenshot of one element, fast-encoded by Chrome when CDP is available."""
+    x, y, width, height = driver.execute_script(
+        "var r = arguments[0].getBoundingClientRect();"
+        "return [r.left + window.scrollX, r.top + window.scrollY, r.width, r.height];",
+        element
+    )
+    try:
+        result = driver.execute_cdp_cmd("Page.captureScreenshot", {
+            "format": "png",
+            "optimizeForSpeed": True,
+            "captureBeyondViewport": True,
+            "clip": {"x": x, "y": y, "width": width, "height": height, "scale": 1},
+        })
+    except (AttributeError, WebDriverException):
+        return element.screenshot_as_png
+    return base64.b64decode(result["data"])
+
+
+def check_element(driver, locator, name, ignore=()):
+    """Screenshot the element at locator and check it against the shared baselines.
+
+    ignore lists (x, y, width, height) regions in element pixels whose
+    content may change between runs.
+    """
+    element = driver.find_element(*locator)
+    return default_baselines().check(name, element_png(driver, element), ignore)
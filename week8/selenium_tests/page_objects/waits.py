@@ -0,0 +1,119 @@
+"""
+Condition-based waits shared by the page objects.
+
+Page-object actions wait for the page to reach the state they need instead
+of sleeping for a fixed time. Every wait is recorded with the time it
+actually took, so slow pages show up in WaitEngine.records.
+"""
+
+import time
+from collections import namedtuple
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+WaitRecord = namedtuple("WaitRecord", ["label", "seconds", "timed_out"])
+
+
+def element_visible(locator):
+    """Wait until the element is present and visible; returns the element."""
+    return EC.visibility_of_element_located(locator)
+
+
+def element_present(locator):
+    """Wait until the element is in the DOM; returns the element."""
+    return EC.presence_of_element_located(locator)
+
+
+def text_changed(locator, old_text):
+    """Wait until the element's text differs from old_text; returns the element."""
+    def condition(driver):
+        try:
+            element = driver.find_element(*locator)
+            return element if element.text != old_text else False
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+    return condition
+
+
+def attribute_equals(locator, name, value):
+    """Wait until the element's attribute equals value; returns the element."""
+    def condition(driver):
+        try:
+            element = driver.find_element(*locator)
+            return element if element.get_attribute(name) == value else False
+        except (NoSuchElementException, StaleElementReferenceException):
+            return False
+    return condition
+
+
+def url_changed(old_url):
+    """Wait until the current URL differs from old_url."""
+    return EC.url_changes(old_url)
+
+
+def staleness_of(element):
+    """Wait until element has been removed from the DOM (e.g. by a page load)."""
+    return EC.staleness_of(element)
+
+
+def document_ready():
+    """Wait until the document has finished loading."""
+    def condition(driver):
+        return driver.execute_script("return document.readyState") == "complete"
+    return condition
+
+
+class WaitEngine:
+    """Polls conditions with per-call timeouts and records how long each wait took."""
+
+    def __init__(self, driver, timeout=10, poll_frequency=0.1, implicit_wait=10):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        # Implicit wait the fixtures configure; restored after every wait
+        self.implicit_wait = implicit_wait
+        self.records = []
+
+    def until(self, condition, timeout=None, poll_frequency=None, label=None, raise_on_timeout=True):
+        """Wait for condition and return its result.
+
+        With raise_on_timeout=False a timeout returns False instead of
+        raising TimeoutException.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        poll_frequency = self.poll_frequency if poll_frequency is None else poll_frequency
+        label = label or getattr(condition, "__qualname__", "condition").split(".<locals>")[0]
+
+        # The implicit wait would make each poll block, breaking the per-call timeout
+        self.driver.implicitly_wait(0)
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, timeout, poll_frequency=poll_frequency).until(condition)
+        except TimeoutException:
+            self.records.append(WaitRecord(label, time.perf_counter() - start, True))
+            if raise_on_timeout:
+                raise
+            return False
+        finally:
+            self.driver.implicitly_wait(self.implicit_wait)
+
+        self.records.append(WaitRecord(label, time.perf_counter() - start, False))
+        return result
+
+    def total_time(self):
+        """Total seconds spent waiting."""
+        return sum(record.seconds for record in self.records)
+
+    def summary(self):
+        """Return {label: (count, total seconds, timeouts)} for the recorded waits."""
+        summary = {}
+        for record in self.records:
+            count, seconds, timeouts = summary.get(record.label, (0, 0.0, 0))
+            summary[record.label] = (count + 1, seconds + record.seconds, timeouts + int(record.timed_out))
+        return summary
@@ -0,0 +1,178 @@
+"""
+Resource blocking and caching for faster page loads.
+
+Most of what the Cymbal Shops pages download (product images, web fonts,
+analytics scripts) is never looked at by a test assertion. A
+ResourceBlocker uses the CDP Network domain to block URL patterns, grouped
+into categories so whole resource types can be switched off at once:
+
+  images     png, jpg, gif, webp, svg, ico, avif
+  fonts      woff, ttf, otf, eot and Google Fonts
+  analytics  Google Analytics / Tag Manager, DoubleClick
+
+Chrome can only block by URL pattern (request interception with rewritten
+responses needs a DevTools event connection, which plain Selenium does not
+have), so resource types are matched by file extension.
+
+Static assets that are still needed can be served from a local cache: with
+resource_cache_dir() Chrome keeps its HTTP disk cache in a persistent
+directory, so cacheable scripts, styles and images are loaded from disk on
+later tests and later runs instead of over the network.
+
+The savings are measured from Chrome's performance log: requests that were
+blocked or answered from the cache, and their size. The size of a blocked
+request is only known if the URL was downloaded before (e.g. in a run with
+the cache but without blocking); those sizes are remembered in
+resource_sizes.json next to the cache.
+"""
+
+import json
+import os
+
+from selenium.common.exceptions import WebDriverException
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "msse640", "chrome-cache")
+
+RESOURCE_PATTERNS = {
+    "images": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*"],
+    "fonts": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*", "*fonts.googleapis.com*", "*fonts.gstatic.com*"],
+    "analytics": ["*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*"],
+}
+
+# Performance log events the savings are computed from
+NETWORK_EVENTS = (
+    "Network.requestWillBeSent",
+    "Network.responseReceived",
+    "Network.requestServedFromCache",
+    "Network.loadingFinished",
+    "Network.loadingFailed",
+)
+
+
+def blocked_patterns(categories, extra_patterns=()):
+    """URL patterns for the given categories (comma separated or a list) plus extra patterns."""
+    if isinstance(categories, str):
+        categories = [name.strip() for name in categories.split(",") if name.strip()]
+    patterns = []
+    for name in categories:
+        if name not in RESOURCE_PATTERNS:
+            raise ValueError(f"Unknown resource category: {name} (choose from {', '.join(RESOURCE_PATTERNS)})")
+        patterns.extend(RESOURCE_PATTERNS[name])
+    patterns.extend(extra_patterns)
+    return patterns
+
+
+def resource_cache_dir(name="headless"):
+    """Disk cache directory for one browser pool.
+
+    Chrome does not share a cache directory between running browsers, so
+    each pool of each shard process (TEST_SHARD, set by sharding.py) gets
+    its own, which stays warm from one run to the next.
+    """
+    base = os.environ.get("CHROME_CACHE_DIR", DEFAULT_CACHE_DIR)
+    return os.path.join(base, f"{name}-shard{os.environ.get('TEST_SHARD', '0')}")
+
+
+class ResourceBlocker:
+    """Blocks resource patterns in each test's browser and records what that saved."""
+
+    def __init__(self, patterns=(), sizes_file=None):
+        self.patterns = list(patterns)
+        self.sizes_file = sizes_file or os.path.join(
+            os.environ.get("CHROME_CACHE_DIR", DEFAULT_CACHE_DIR), "resource_sizes.json"
+        )
+        self.sizes = {}
+        if os.path.exists(self.sizes_file):
+            with open(self.sizes_file) as f:
+                self.sizes = json.load(f)
+        self.tests = 0
+        self.totals = {}
+
+    def apply(self, driver):
+        """Block the patterns in this browser and discard log entries from earlier tests."""
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+        self._read_log(driver)
+
+    def collect(self, driver):
+        """Savings of the current test, from the browser's performance log."""
+        requests = {}
+        cached = set()
+        stats = dict.fromkeys(
+            ("requests", "transfer_bytes", "blocked_requests", "blocked_bytes", "blocked_unknown",
+             "cached_requests", "cached_bytes"),
+            0
+        )
+        for method, params in self._read_log(driver):
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                requests[request_id] = params["request"]["url"]
+                stats["requests"] += 1
+            elif method == "Network.requestServedFromCache" and request_id not in cached:
+                cached.add(request_id)
+                self._count_cached(stats, requests.get(request_id), None)
+            elif method == "Network.responseReceived" and request_id not in cached:
+                response = params["response"]
+                if response.get("fromDiskCache") or response.get("fromPrefetchCache"):
+                    cached.add(request_id)
+                    self._count_cached(stats, response["url"], response.get("headers", {}))
+            elif method == "Network.loadingFinished":
+                url = requests.get(request_id)
+                size = params.get("encodedDataLength", 0)
+                stats["transfer_bytes"] += size
+                if url and size > 0:
+                    self.sizes[url] = size
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                url = requests.get(request_id)
+                stats["blocked_requests"] += 1
+                if url in self.sizes:
+                    stats["blocked_bytes"] += self.sizes[url]
+                else:
+                    stats["blocked_unknown"] += 1
+
+        self.tests += 1
+        for key, value in stats.items():
+            self.totals[key] = self.totals.get(key, 0) + value
+        return stats
+
+    def _count_cached(self, stats, url, headers):
+        stats["cached_requests"] += 1
+        length = {name.lower(): value for name, value in (headers or {}).items()}.get("content-length")
+        if length and length.isdigit():
+            stats["cached_bytes"] += int(length)
+        elif url in self.sizes:
+            stats["cached_bytes"] += self.sizes[url]
+
+    def _read_log(self, driver):
+        try:
+            entries = driver.get_log("performance")
+        except WebDriverException:
+            return []
+        events = []
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            if message.get("method") in NETWORK_EVENTS:
+                events.append((message["method"], message.get("params", {})))
+        return events
+
+    def save(self):
+        """Remember the sizes of downloaded resources for estimating later blocked bytes."""
+        if not self.sizes:
+            return
+        os.makedirs(os.path.dirname(self.sizes_file), exist_ok=True)
+        with open(self.sizes_file, "w") as f:
+            json.dump(self.sizes, f)
+
+    def summary(self):
+        """Return a one-line description of the requests and bytes saved."""
+        totals = self.totals
+        saved = totals.get("blocked_bytes", 0) + totals.get("cached_bytes", 0)
+        line = (
+            f"{self.tests} tests, {totals.get('requests', 0)} requests "
+            f"({totals.get('transfer_bytes', 0) / 1024:.0f} KiB transferred); "
+            f"{totals.get('blocked_requests', 0)} blocked, {totals.get('cached_requests', 0)} from cache, "
+            f"~{saved / 1024:.0f} KiB saved"
+        )
+        if totals.get("blocked_unknown"):
+            line += f" ({totals['blocked_unknown']} blocked requests of unknown size)"
+        return line
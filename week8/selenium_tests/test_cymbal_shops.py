@@ -202,3 +202,15 @@ class TestCymbalShops:
         assert page.verify_page_loaded(), "Page failed to load after performance test"
         
         print(f"PASS: Page loaded in {load_time:.2f} seconds")
+    
+    @pytest.mark.ecommerce
+    def test_product_grid_visual(self, driver):
+        """Test that the hot products grid looks like its baseline screenshot."""
+        page = CymbalShopsPage(driver)
+        page.navigate_to_homepage()
+        assert page.verify_page_loaded(), "Page failed to load"
+        
+        result = page.check_product_grid_visual()
+        assert result.passed, f"Product grid does not match its baseline: {result}"
+        
+        print(f"PASS: Product grid visual check ({result.status})")
@@ -0,0 +1,77 @@
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from unittest import mock
+import driver_resolver
+from driver_resolver import driver_filename, resolve_chromedriver
+
+
+class TestResolveChromedriver(unittest.TestCase):
+    """Test the order in which chromedriver is looked up, without Chrome or the network."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.bin_dir = os.path.join(self.directory, "bin")
+        self.cache = os.path.join(self.directory, "cache")
+        os.makedirs(self.bin_dir)
+        patches = [
+            mock.patch.dict(os.environ, {"PATH": self.bin_dir, "CHROMEDRIVER_CACHE_DIR": self.cache}),
+            mock.patch.object(driver_resolver, "detect_chrome_version", return_value="120.0.6099.109"),
+            mock.patch.object(driver_resolver, "download_driver", side_effect=AssertionError("no download expected")),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        for name in ("CHROMEDRIVER_PATH", "CHROMEDRIVER_OFFLINE"):
+            os.environ.pop(name, None)
+        # Keep the session's real resolution for the browser tests
+        resolution = driver_resolver._resolution
+        self.addCleanup(setattr, driver_resolver, "_resolution", resolution)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def executable(self, *parts):
+        path = os.path.join(self.directory, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write("#!/bin/sh\n")
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return path
+
+    def test_local_sources_before_download(self):
+        """Test configured path, then the cache, then PATH, and no download while one exists."""
+        on_path = self.executable("bin", driver_filename())
+        self.assertEqual(resolve_chromedriver(refresh=True)[:2], (on_path, "system"))
+
+        cached = self.executable("cache", "120.0.6099.71", driver_filename())
+        self.assertEqual(resolve_chromedriver(refresh=True)[:2], (cached, "cache"))
+
+        configured = self.executable("configured", driver_filename())
+        os.environ["CHROMEDRIVER_PATH"] = configured
+        self.assertEqual(resolve_chromedriver(refresh=True)[:2], (configured, "configured"))
+
+    def test_missing_configured_path_warns(self):
+        """Test that a CHROMEDRIVER_PATH that does not exist is logged, then the other sources are used."""
+        on_path = self.executable("bin", driver_filename())
+        os.environ["CHROMEDRIVER_PATH"] = os.path.join(self.directory, "missing", driver_filename())
+        with self.assertLogs(driver_resolver.logger, "WARNING") as logs:
+            self.assertEqual(resolve_chromedriver(refresh=True).path, on_path)
+        self.assertIn("CHROMEDRIVER_PATH", logs.output[0])
+
+    def test_download_last(self):
+        """Test that the download is the last resort, and is skipped offline."""
+        downloaded = self.executable("downloaded", driver_filename())
+        with mock.patch.object(driver_resolver, "download_driver", return_value=downloaded) as download:
+            self.assertEqual(resolve_chromedriver(refresh=True)[:2], (downloaded, "download"))
+            download.assert_called_once_with("120.0.6099.109")
+
+            os.environ["CHROMEDRIVER_OFFLINE"] = "1"
+            with self.assertRaises(RuntimeError):
+                resolve_chromedriver(refresh=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import pytest
+from itertools import cycle
+from page_objects.cymbal_shops_page import CymbalShopsPage
+from page_objects.triangle_classifier_page import TriangleClassifierPage
+from perf_stats import describe
+
+def assert_no_regression(perf, metric, samples):
+    """Fail if the samples are significantly slower than the stored baseline."""
+    comparison = perf.check(metric, samples)
+    if comparison is not None:
+        print(describe(comparison))
+        assert not comparison.regressed, describe(comparison)
+
+@pytest.mark.slow
+class TestPerformance:
+    """Repeated timings compared with stored baselines (see perf_stats.py)."""
+
+    @pytest.mark.mathematical
+    def test_triangle_page_load(self, driver, perf):
+        """Time loading the Triangle Classifier until the inputs are rendered."""
+        page = TriangleClassifierPage(driver)
+        samples = perf.measure(page.navigate_to_app)
+        assert page.verify_page_loaded(), "Page failed to load"
+        assert_no_regression(perf, "triangle_page_load", samples)
+
+    @pytest.mark.mathematical
+    def test_time_to_first_classification(self, driver, perf):
+        """Time from opening the app to the first classification result."""
+        page = TriangleClassifierPage(driver)
+        results = []
+
+        def first_classification():
+            page.navigate_to_app()
+            page.input_sides(3, 4, 5)
+            page.classify_triangle()
+            results.append(page.get_result_text())
+
+        samples = perf.measure(first_classification)
+        assert results[-1] and "scalene" in results[-1].lower(), f"Unexpected result: {results[-1]}"
+        assert_no_regression(perf, "triangle_first_classification", samples)
+
+    @pytest.mark.ecommerce
+    def test_homepage_load(self, driver, perf):
+        """Time loading the Cymbal Shops homepage until the product cards are rendered."""
+        page = CymbalShopsPage(driver)
+        samples = perf.measure(page.navigate_to_homepage)
+        assert page.verify_page_loaded(), "Page failed to load"
+        assert_no_regression(perf, "cymbal_homepage_load", samples)
+
+    @pytest.mark.ecommerce
+    def test_currency_switch(self, driver, perf):
+        """Time switching the display currency back and forth."""
+        page = CymbalShopsPage(driver)
+        page.navigate_to_homepage()
+        currencies = cycle(["EUR", "USD"])
+        switched = []
+
+        samples = perf.measure(lambda: switched.append(page.change_currency(next(currencies))))
+        assert all(switched), "Currency change failed"
+        assert_no_regression(perf, "cymbal_currency_switch", samples)
+
+    @pytest.mark.ecommerce
+    def test_add_to_cart(self, driver, perf):
+        """Time opening a product and adding it to the cart, starting from the homepage."""
+        page = CymbalShopsPage(driver)
+        added = []
+
+        samples = perf.measure(
+            lambda: added.append(page.add_product_to_cart("OLJCESPC7Z")),  # Sunglasses
+            setup=page.navigate_to_homepage
+        )
+        # add_product_to_cart returns False instead of raising, and a failed add is no round trip to time
+        assert all(added), "Adding the product to the cart failed"
+        assert_no_regression(perf, "cymbal_add_to_cart", samples)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from page_objects.screenshots import ScreenshotPipeline, safe_filename
+from page_objects.visual_compare import encode_png
+
+FRAME_ONE = encode_png(np.zeros((4, 4, 3), dtype=np.uint8))
+FRAME_TWO = encode_png(np.full((4, 4, 3), 255, dtype=np.uint8))
+
+
+class FakeDriver:
+    """Returns the PNG bytes it is given instead of a browser screenshot."""
+
+    def __init__(self):
+        self.png = b""
+
+    def get_screenshot_as_png(self):
+        return self.png
+
+
+class TestScreenshotPipeline(unittest.TestCase):
+    """Test the background screenshot pipeline without a browser."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.driver = FakeDriver()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def capture(self, pipeline, png, name):
+        self.driver.png = png
+        return pipeline.capture(self.driver, name)
+
+    def test_duplicates_return_the_written_file(self):
+        """Test that an identical frame gets the earlier file's path, which exists once flushed."""
+        pipeline = ScreenshotPipeline(self.directory)
+        first = self.capture(pipeline, FRAME_ONE, "first")
+        second = self.capture(pipeline, FRAME_ONE, "failure_test_page.py::test_x")
+        third = self.capture(pipeline, FRAME_TWO, "third")
+        pipeline.flush()
+
+        self.assertEqual(second, first)
+        for path in (first, third):
+            self.assertTrue(os.path.exists(path), path)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+        self.assertEqual((pipeline.captured, pipeline.written, pipeline.duplicates), (3, 2, 1))
+
+    def test_reused_name_and_pruned_files(self):
+        """Test that frames are written again once their file was replaced or pruned."""
+        pipeline = ScreenshotPipeline(self.directory, max_files=1)
+        first = self.capture(pipeline, FRAME_ONE, "page")
+        self.capture(pipeline, FRAME_TWO, "page")
+        pipeline.flush()
+        os.utime(first, (1, 1))  # oldest, whatever the file system's mtime resolution
+        # "page" now holds frame two, so frame one needs a file of its own
+        again = self.capture(pipeline, FRAME_ONE, "other")
+        self.assertNotEqual(again, first)
+        pipeline.flush()
+        self.assertEqual(os.listdir(self.directory), ["other" + pipeline.extension])
+        os.utime(again, (1, 1))
+        # max_files=1 pruned "page" (frame two), so frame two is written again
+        last = self.capture(pipeline, FRAME_TWO, "last")
+        self.assertEqual(last, os.path.join(self.directory, "last" + pipeline.extension))
+        pipeline.flush()
+        self.assertEqual(os.listdir(self.directory), ["last" + pipeline.extension])
+        self.assertEqual(pipeline.duplicates, 0)
+
+    def test_safe_filename(self):
+        """Test that test ids become plain file names."""
+        self.assertEqual(safe_filename("failure_test_page.py::test_x[a/b]"), "failure_test_page.py_test_x_a_b")
+        self.assertEqual(safe_filename("::"), "screenshot")
+
+
+if __name__ == "__main__":
+    unittest.main()
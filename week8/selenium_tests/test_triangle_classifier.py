@@ -184,7 +184,8 @@ class TestTriangleClassifier:
             result = page.test_triangle_classification(
                 test_case["sides"][0],
                 test_case["sides"][1],
-                test_case["sides"][2]
+                test_case["sides"][2],
+                fast=True
             )
             
             if result["type"] == "success":
@@ -195,6 +196,20 @@ class TestTriangleClassifier:
         
         print("PASS: Multiple triangle types classified correctly")
     
+    @pytest.mark.mathematical
+    def test_result_panel_visual(self, driver):
+        """Test that the result panel of a scalene triangle looks like its baseline screenshot."""
+        page = TriangleClassifierPage(driver)
+        page.navigate_to_app()
+        
+        result = page.test_triangle_classification(3, 4, 5, fast=True)
+        assert result["type"] == "success", f"Classification failed: {result}"
+        
+        visual = page.check_result_panel_visual("scalene_3_4_5")
+        assert visual.passed, f"Result panel does not match its baseline: {visual}"
+        
+        print(f"PASS: Result panel visual check ({visual.status})")
+    
     @pytest.mark.mathematical
     def test_triangle_types_information_display(self, driver):
         """Test that triangle type information is displayed on the page."""
@@ -0,0 +1,155 @@
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zlib
+import numpy as np
+from page_objects import visual_compare
+from page_objects.visual_compare import (
+    MISSING_BASELINE, PNG_SIGNATURE, VisualBaselines, decode_png, dhash, encode_png, hamming, pixel_diff
+)
+
+
+def filtered_png(pixels, filters):
+    """Encode RGB pixels as a PNG using the given filter types, cycling over the rows."""
+    height, width, channels = pixels.shape
+    rows = pixels.reshape(height, -1).astype(int)
+    previous = np.zeros(width * channels, dtype=int)
+    raw = []
+    for y in range(height):
+        kind = filters[y % len(filters)]
+        row = rows[y]
+        left = np.concatenate([np.zeros(channels, dtype=int), row[:-channels]])
+        upper_left = np.concatenate([np.zeros(channels, dtype=int), previous[:-channels]])
+        if kind == 0:
+            predictor = 0
+        elif kind == 1:
+            predictor = left
+        elif kind == 2:
+            predictor = previous
+        elif kind == 3:
+            predictor = (left + previous) >> 1
+        else:
+            p = left + previous - upper_left
+            pa, pb, pc = abs(p - left), abs(p - previous), abs(p - upper_left)
+            predictor = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, previous, upper_left))
+        raw.append(bytes([kind]) + ((row - predictor) % 256).astype(np.uint8).tobytes())
+        previous = row
+
+    def chunk(kind, body):
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (
+        PNG_SIGNATURE
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"".join(raw)))
+        + chunk(b"IEND", b"")
+    )
+
+
+def panel():
+    """A 120x200 light image with a few dark blocks."""
+    pixels = np.full((120, 200, 3), 240, dtype=np.uint8)
+    pixels[20:50, 20:180] = (30, 30, 200)
+    pixels[70:100, 10:120] = 20
+    return pixels
+
+
+class TestPngCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        pixels = np.random.default_rng(1).integers(0, 256, (31, 17, 3), dtype=np.uint8)
+        np.testing.assert_array_equal(decode_png(encode_png(pixels)), pixels)
+
+    def test_decodes_every_filter_type(self):
+        pixels = np.random.default_rng(2).integers(0, 256, (25, 19, 3), dtype=np.uint8)
+        np.testing.assert_array_equal(decode_png(filtered_png(pixels, [0, 1, 2, 3, 4])), pixels)
+
+
+class TestHashesAndDiff(unittest.TestCase):
+
+    def test_dhash_ignores_blanked_regions(self):
+        pixels = panel()
+        changed = pixels.copy()
+        changed[0:40, 150:200] = 0
+        self.assertNotEqual(dhash(pixels), dhash(changed))
+        self.assertEqual(dhash(pixels, ignore=[(150, 0, 50, 40)]), dhash(changed, ignore=[(150, 0, 50, 40)]))
+        self.assertEqual(hamming(dhash(pixels), dhash(pixels)), 0)
+
+    def test_pixel_diff_tolerance_and_ignore(self):
+        pixels = panel()
+        changed = pixels.copy()
+        changed[0, 0] = (250, 240, 240)  # within tolerance
+        changed[5:10, 5:10] = 0
+        ratio, mask = pixel_diff(pixels, changed, tolerance=16)
+        self.assertEqual(int(mask.sum()), 25)
+        self.assertAlmostEqual(ratio, 25 / (120 * 200))
+        ratio, _ = pixel_diff(pixels, changed, tolerance=16, ignore=[(0, 0, 20, 20)])
+        self.assertEqual(ratio, 0.0)
+
+
+class TestVisualBaselines(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.baselines = VisualBaselines(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_statuses(self):
+        pixels = panel()
+        VisualBaselines(self.directory, update=True).check("panel", encode_png(pixels))
+        self.baselines = VisualBaselines(self.directory)
+        self.assertEqual(self.baselines.check("panel", encode_png(pixels)).status, "identical")
+
+        # Same image, different encoding: decided by the perceptual hash
+        reencoded = filtered_png(pixels, [1, 2])
+        self.assertEqual(self.baselines.check("panel", reencoded).status, "unchanged")
+
+        speck = pixels.copy()
+        speck[60, 60] = 0
+        self.assertEqual(self.baselines.check("panel", encode_png(speck)).status, "within tolerance")
+
+        recolored = pixels.copy()
+        recolored[70:100, 10:120] = (200, 20, 20)
+        result = VisualBaselines(self.directory).check("panel", encode_png(recolored))
+        self.assertEqual(result.status, "changed")
+        self.assertFalse(result.passed)
+        self.assertTrue(result.diff_path.endswith("panel.diff.png"))
+
+        self.assertEqual(self.baselines.check("panel", encode_png(pixels[:100])).status, "size changed")
+
+    def test_missing_baseline_fails(self):
+        result = self.baselines.check("panel", encode_png(panel()))
+        self.assertEqual(result.status, MISSING_BASELINE)
+        self.assertFalse(result.passed)
+        # Nothing is recorded outside an update, so the next run fails too
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(self.baselines.check("panel", encode_png(panel())).status, MISSING_BASELINE)
+
+    def test_update_replaces_baseline(self):
+        pixels = panel()
+        self.assertEqual(VisualBaselines(self.directory, update=True).check("panel", encode_png(pixels)).status,
+                         "new baseline")
+        inverted = 255 - pixels
+        updating = VisualBaselines(self.directory, update=True)
+        self.assertEqual(updating.check("panel", encode_png(inverted)).status, "new baseline")
+        self.assertEqual(VisualBaselines(self.directory).check("panel", encode_png(inverted)).status, "identical")
+
+    def test_without_pillow(self):
+        original = visual_compare.Image
+        visual_compare.Image = None
+        try:
+            pixels = panel()
+            np.testing.assert_array_equal(decode_png(filtered_png(pixels, [0, 1, 2])), pixels)
+            # No slow per-byte fallback for Average/Paeth rows
+            with self.assertRaisesRegex(ValueError, "Pillow"):
+                decode_png(filtered_png(pixels, [4, 3]))
+        finally:
+            visual_compare.Image = original
+
+
+if __name__ == "__main__":
+    unittest.main()
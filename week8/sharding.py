@@ -0,0 +1,172 @@
+"""
+Parallel sharded test execution for run_tests.py.
+
+The collected tests are split into N shards balanced by their historical
+durations (from the HistoryStore), each shard runs in
+its own pytest process with its own browser pool, and the per-shard JUnit
+XML files are merged into the single timestamped report the runner
+produces. pytest-html reports cannot be merged, so the HTML output is a
+summary page built from the merged JUnit XML that links to each shard's
+own pytest-html report.
+"""
+
+import heapq
+import html
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+
+from history_store import HistoryStore, junit_key
+
+# Duration assumed for tests with no history
+DEFAULT_DURATION = 5.0
+
+
+def collect_test_ids(pytest_args):
+    """Return the node ids pytest would run for these arguments."""
+    # -q only prints one node id per line when no other verbosity flag is given
+    pytest_args = [arg for arg in pytest_args if arg not in ("-v", "-vv", "-q", "--verbose", "--quiet")]
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", *pytest_args],
+        capture_output=True, text=True
+    )
+    return [line.strip() for line in result.stdout.splitlines() if "::" in line]
+
+
+def partition(test_ids, durations, workers):
+    """Split tests into balanced shards, longest tests first (LPT scheduling)."""
+    known = [durations[junit_key(t)] for t in test_ids if junit_key(t) in durations]
+    default = sorted(known)[len(known) // 2] if known else DEFAULT_DURATION
+    weighted = sorted(
+        ((durations.get(junit_key(t), default), t) for t in test_ids), reverse=True
+    )
+
+    shards = [[] for _ in range(workers)]
+    heap = [(0.0, index) for index in range(workers)]
+    for duration, test_id in weighted:
+        load, index = heapq.heappop(heap)
+        shards[index].append(test_id)
+        heapq.heappush(heap, (load + duration, index))
+    return [shard for shard in shards if shard]
+
+
+def merge_junit(shard_reports, output_file, wall_time):
+    """Merge per-shard JUnit XML files into one report."""
+    merged = ET.Element("testsuite", name="pytest")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0}
+    for report in shard_reports:
+        if not os.path.exists(report):
+            continue
+        for suite in ET.parse(report).getroot().iter("testsuite"):
+            for key in totals:
+                totals[key] += int(suite.get(key, 0))
+            for case in suite.findall("testcase"):
+                merged.append(case)
+
+    for key, value in totals.items():
+        merged.set(key, str(value))
+    merged.set("time", f"{wall_time:.3f}")
+    merged.set("timestamp", time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+    root = ET.Element("testsuites")
+    root.append(merged)
+    ET.ElementTree(root).write(output_file, encoding="utf-8", xml_declaration=True)
+    return totals
+
+
+def write_html_summary(junit_file, html_file, shard_html_reports):
+    """Write an HTML report for a sharded run from the merged JUnit XML."""
+    suite = ET.parse(junit_file).getroot().find("testsuite")
+    rows = []
+    for case in suite.findall("testcase"):
+        outcome = "passed"
+        for tag in ("failure", "error", "skipped"):
+            if case.find(tag) is not None:
+                outcome = tag
+        rows.append(
+            f"<tr class='{outcome}'><td>{html.escape(case.get('classname', ''))}</td>"
+            f"<td>{html.escape(case.get('name', ''))}</td><td>{outcome}</td>"
+            f"<td>{float(case.get('time', 0)):.2f}</td></tr>"
+        )
+    links = "".join(
+        f"<li><a href='{html.escape(os.path.basename(path))}'>{html.escape(os.path.basename(path))}</a></li>"
+        for path in shard_html_reports if os.path.exists(path)
+    )
+
+    with open(html_file, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Test Report</title>"
+            "<style>body{font-family:sans-serif}td,th{padding:2px 8px;text-align:left}"
+            ".failure,.error{background:#fdd}.skipped{background:#eee}</style></head><body>"
+            f"<h1>Test Report</h1><p>{suite.get('tests')} tests, {suite.get('failures')} failures, "
+            f"{suite.get('errors')} errors, {suite.get('skipped')} skipped in {suite.get('time')}s</p>"
+            "<table><tr><th>Class</th><th>Test</th><th>Outcome</th><th>Seconds</th></tr>"
+            + "".join(rows) + "</table>"
+            + f"<h2>Shard reports</h2><ul>{links}</ul></body></html>"
+        )
+
+
+def run_sharded(test_paths, pytest_options, workers, junit_file, html_file=None, durations=None):
+    """Run the tests under test_paths across worker processes.
+
+    pytest_options (markers, -k expressions, verbosity, ...) are used for
+    collection and passed to every shard. Returns the pytest exit code of
+    the overall run (0 only if every shard passed).
+    """
+    test_ids = collect_test_ids([*test_paths, *pytest_options])
+    if not test_ids:
+        print("No tests collected")
+        return 5
+
+    if durations is None:
+        store = HistoryStore()
+        durations = store.average_durations()
+        store.close()
+    shards = partition(test_ids, durations, workers)
+    base = os.path.splitext(junit_file)[0]
+
+    processes = []
+    shard_reports = []
+    shard_html_reports = []
+    start = time.perf_counter()
+    for index, shard in enumerate(shards):
+        shard_xml = f"{base}_shard{index}.xml"
+        args = [sys.executable, "-m", "pytest", *pytest_options, *shard, "--junitxml", shard_xml]
+        if html_file:
+            shard_html = f"{os.path.splitext(html_file)[0]}_shard{index}.html"
+            args.extend(["--html", shard_html, "--self-contained-html"])
+            shard_html_reports.append(shard_html)
+        shard_reports.append(shard_xml)
+
+        estimate = sum(durations.get(junit_key(t), DEFAULT_DURATION) for t in shard)
+        print(f"Shard {index}: {len(shard)} tests, ~{estimate:.0f}s expected")
+        log = open(f"{base}_shard{index}.log", "w")
+        # TEST_SHARD gives each shard its own browser cache directory (see resource_blocker.py)
+        env = dict(os.environ, TEST_SHARD=str(index))
+        processes.append((subprocess.Popen(args, stdout=log, stderr=subprocess.STDOUT, env=env), log))
+
+    exit_codes = []
+    for process, log in processes:
+        exit_codes.append(process.wait())
+        log.close()
+    wall_time = time.perf_counter() - start
+
+    totals = merge_junit(shard_reports, junit_file, wall_time)
+    for report in shard_reports:
+        if os.path.exists(report):
+            os.remove(report)
+    if html_file:
+        write_html_summary(junit_file, html_file, shard_html_reports)
+
+    print(
+        f"{totals['tests']} tests in {len(shards)} shards finished in {wall_time:.1f}s "
+        f"({totals['failures']} failures, {totals['errors']} errors)"
+    )
+
+    # Any failing shard fails the run; shards that selected nothing (5) do not
+    failed = [code for code in exit_codes if code not in (0, 5)]
+    if failed:
+        return failed[0]
+    return 5 if all(code == 5 for code in exit_codes) else 0
@@ -6,13 +6,18 @@ MSSE640 - Software Security Engineering
 This script demonstrates basic Selenium functionality without requiring the full test framework.
 """
 
+import argparse
+import os
 import time
 import sys
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium_tests.driver_resolver import resolve_chromedriver
+from site_archive import MODES as SITE_MODES, start_sites, stop_sites
 
 def setup_driver():
     """Setup Chrome WebDriver with basic options."""
@@ -25,16 +30,14 @@ def setup_driver():
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
         
-        # Try to use webdriver-manager to get ChromeDriver
-        try:
-            from webdriver_manager.chrome import ChromeDriverManager
-            driver_path = ChromeDriverManager().install()
-            driver = webdriver.Chrome(executable_path=driver_path, options=chrome_options)
-        except ImportError:
-            # Fallback to system ChromeDriver
-            driver = webdriver.Chrome(options=chrome_options)
+        # Resolve ChromeDriver once (configured path, local cache, download or PATH)
+        resolution = resolve_chromedriver()
         
+        start_time = time.perf_counter()
+        driver = webdriver.Chrome(service=Service(resolution.path), options=chrome_options)
         driver.implicitly_wait(10)
+        print(f"   Browser started in {time.perf_counter() - start_time:.2f}s "
+              f"(chromedriver from {resolution.source}, resolved in {resolution.seconds:.3f}s)")
         return driver
     except Exception as e:
         print(f"Error setting up WebDriver: {e}")
@@ -54,7 +57,7 @@ def test_cymbal_shops():
     try:
         # Navigate to the website
         print("🌐 Navigating to Cymbal Shops...")
-        driver.get("https://cymbal-shops.retail.cymbal.dev/")
+        driver.get(os.environ.get("CYMBAL_SHOPS_URL", "https://cymbal-shops.retail.cymbal.dev/"))
         time.sleep(3)
         
         # Check if page loaded
@@ -111,7 +114,7 @@ def test_triangle_classifier():
     try:
         # Navigate to the application
         print("🌐 Navigating to Triangle Classifier...")
-        driver.get("https://msse-640-2025summer.vercel.app/")
+        driver.get(os.environ.get("TRIANGLE_APP_URL", "https://msse-640-2025summer.vercel.app/"))
         time.sleep(3)
         
         # Check if page loaded
@@ -176,11 +179,26 @@ def main():
     print("MSSE640 - Software Security Engineering")
     print("="*60)
     
-    # Test Cymbal Shops
-    cymbal_success = test_cymbal_shops()
+    parser = argparse.ArgumentParser(description="Selenium demo")
+    parser.add_argument(
+        "--sites",
+        choices=SITE_MODES,
+        default="live",
+        help="Use the live sites, record them into site_archives/, or replay the archive locally"
+    )
+    args = parser.parse_args()
     
-    # Test Triangle Classifier
-    triangle_success = test_triangle_classifier()
+    site_servers = start_sites(args.sites)
+    try:
+        # Test Cymbal Shops
+        cymbal_success = test_cymbal_shops()
+        
+        # Test Triangle Classifier
+        triangle_success = test_triangle_classifier()
+    finally:
+        stop_sites(site_servers)
+        for server in site_servers:
+            print(server.summary())
     
     # Summary
     print("\n" + "="*60)
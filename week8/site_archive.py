@@ -0,0 +1,311 @@
+"""
+Record-and-replay stand-in for the sites under test.
+
+In record mode a local reverse proxy forwards every request for a site to
+its live origin and saves each exchange (request key, status, headers,
+body) into site_archives/<site>.json. In replay mode a local server answers
+from that archive without touching the network, so page loads take
+milliseconds and return the same content on every run.
+
+The page objects read their base URLs from CYMBAL_SHOPS_URL and
+TRIANGLE_APP_URL; start_sites() points those at the local servers. Only
+requests to the tested origins go through the stand-in; third-party
+resources (fonts, analytics) are still fetched by the browser directly.
+"""
+
+import base64
+import hashlib
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+MODES = ["live", "record", "replay"]
+DEFAULT_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_archives")
+
+# key_cookies: cookies that change what the site returns for the same URL
+Site = namedtuple("Site", "origin env_var key_cookies")
+
+SITES = {
+    "cymbal_shops": Site("https://cymbal-shops.retail.cymbal.dev", "CYMBAL_SHOPS_URL", ("shop_currency",)),
+    "triangle_classifier": Site("https://msse-640-2025summer.vercel.app", "TRIANGLE_APP_URL", ()),
+}
+
+# Headers that describe one connection rather than the resource
+HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-connection", "transfer-encoding", "te", "trailer",
+    "upgrade", "content-length", "strict-transport-security", "alt-svc",
+}
+
+TEXT_TYPES = ("text/", "application/javascript", "application/json", "application/xml", "image/svg")
+
+
+def request_key(method, path, body, cookies, key_cookies):
+    """Key identifying equivalent requests: method, path, body digest and relevant cookies."""
+    digest = hashlib.sha256(body or b"").hexdigest()[:16]
+    selected = ";".join(f"{name}={cookies.get(name, '')}" for name in key_cookies)
+    return f"{method} {path} {digest} {selected}"
+
+
+def parse_cookies(header):
+    cookies = {}
+    for part in (header or "").split(";"):
+        name, _, value = part.strip().partition("=")
+        if name:
+            cookies[name] = value
+    return cookies
+
+
+def local_set_cookie(value):
+    """Drop the Domain and Secure attributes so the cookie sticks on http://127.0.0.1."""
+    parts = [part for part in value.split(";")
+             if part.strip().split("=")[0].lower() not in ("domain", "secure")]
+    return ";".join(parts)
+
+
+class SiteArchive:
+    """Recorded exchanges of one site, stored as a JSON file."""
+
+    def __init__(self, path, origin, load=True):
+        self.path = path
+        self.origin = origin
+        self.exchanges = self._read() if load else {}
+        self._served = {}
+        self._lock = threading.Lock()
+
+    def _read(self):
+        exchanges = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                for exchange in json.load(f)["exchanges"]:
+                    exchanges.setdefault(exchange["key"], []).append(exchange)
+        return exchanges
+
+    def add(self, key, status, headers, body):
+        with self._lock:
+            self.exchanges.setdefault(key, []).append({
+                "key": key,
+                "status": status,
+                "headers": headers,
+                "body": base64.b64encode(body).decode("ascii"),
+            })
+
+    def lookup(self, key):
+        """Next recorded response for key; repeats the last one once all have been served."""
+        with self._lock:
+            responses = self.exchanges.get(key)
+            if not responses:
+                return None
+            index = self._served.get(key, 0)
+            self._served[key] = index + 1
+            exchange = responses[min(index, len(responses) - 1)]
+        return exchange["status"], exchange["headers"], base64.b64decode(exchange["body"])
+
+    def save(self):
+        """Write the archive, keeping entries on disk for requests not recorded this time."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        merged = self._read()
+        with self._lock:
+            merged.update(self.exchanges)
+        exchanges = [exchange for responses in merged.values() for exchange in responses]
+        with open(self.path, "w") as f:
+            json.dump({
+                "origin": self.origin,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "exchanges": exchanges,
+            }, f, indent=1)
+
+
+class SiteServer:
+    """Local HTTP server that records a site's traffic or replays it from the archive."""
+
+    def __init__(self, name, site, mode, archive_dir=DEFAULT_ARCHIVE_DIR, port=0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown site mode: {mode}")
+        path = os.path.join(archive_dir, f"{name}.json")
+        if mode == "replay" and not os.path.exists(path):
+            # Replaying an empty archive would answer every request with a 404
+            raise FileNotFoundError(f"No archive for {name} at {path}; record one with --sites record")
+        self.name = name
+        self.site = site
+        self.mode = mode
+        # Recording replaces earlier responses for the requests it sees
+        self.archive = SiteArchive(path, site.origin, load=(mode == "replay"))
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._local = threading.local()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self._thread = None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                server.handle(self)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = handle_request
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.mode == "record":
+            self.archive.save()
+
+    def summary(self):
+        if self.mode == "record":
+            return f"{self.name}: recorded {self.recorded} exchanges into {self.archive.path}"
+        return f"{self.name}: {self.hits} replayed, {self.misses} not in {self.archive.path}"
+
+    def handle(self, request):
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        key = request_key(
+            request.command, request.path, body,
+            parse_cookies(request.headers.get("Cookie")), self.site.key_cookies
+        )
+
+        if self.mode == "record":
+            status, headers, response_body = self._forward(request, body)
+            self.archive.add(key, status, headers, response_body)
+            self.recorded += 1
+        else:
+            response = self.archive.lookup(key)
+            if response is None:
+                self.misses += 1
+                status, headers = 404, [["Content-Type", "text/plain"]]
+                response_body = f"Not in archive: {key}\n".encode()
+            else:
+                self.hits += 1
+                status, headers, response_body = response
+
+        self._respond(request, status, headers, response_body)
+
+    def _connection(self):
+        # One keep-alive connection to the origin per server thread
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            origin = urlsplit(self.site.origin)
+            connection_class = http.client.HTTPSConnection if origin.scheme == "https" else http.client.HTTPConnection
+            connection = self._local.connection = connection_class(origin.netloc, timeout=30)
+        return connection
+
+    def _forward(self, request, body):
+        headers = {}
+        for name, value in request.headers.items():
+            lower = name.lower()
+            if lower in HOP_HEADERS or lower == "host":
+                continue
+            if lower in ("origin", "referer"):
+                value = value.replace(self.base_url, self.site.origin)
+            headers[name] = value
+        # Archive plain bodies so they can be rewritten and inspected
+        headers["Accept-Encoding"] = "identity"
+
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(request.command, request.path, body=body or None, headers=headers)
+                response = connection.getresponse()
+                response_body = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+        return response.status, [[name, value] for name, value in response.getheaders()], response_body
+
+    def _respond(self, request, status, headers, body):
+        content_type = ""
+        out_headers = []
+        for name, value in headers:
+            lower = name.lower()
+            # send_response() adds its own Date and Server headers
+            if lower in HOP_HEADERS or lower in ("date", "server"):
+                continue
+            if lower == "content-type":
+                content_type = value
+            elif lower == "location":
+                value = value.replace(self.site.origin, self.base_url)
+            elif lower == "set-cookie":
+                value = local_set_cookie(value)
+            out_headers.append((name, value))
+
+        if content_type.startswith(TEXT_TYPES):
+            body = body.replace(self.site.origin.encode(), self.base_url.encode())
+
+        request.send_response(status)
+        for name, value in out_headers:
+            request.send_header(name, value)
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        if request.command != "HEAD":
+            request.wfile.write(body)
+
+
+def start_sites(mode, archive_dir=DEFAULT_ARCHIVE_DIR):
+    """Start a local server per site and point the page objects at it.
+
+    Returns the started servers; in live mode nothing is started and the
+    page objects keep their live URLs. Replaying a site that has no archive
+    raises FileNotFoundError.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown site mode: {mode}")
+    if mode == "live":
+        return []
+
+    servers = []
+    try:
+        for name, site in SITES.items():
+            server = SiteServer(name, site, mode, archive_dir)
+            os.environ[site.env_var] = server.start() + "/"
+            servers.append(server)
+    except Exception:
+        stop_sites(servers)
+        raise
+    return servers
+
+
+def stop_sites(servers):
+    """Stop the servers, saving the archives when recording."""
+    for server in servers:
+        server.stop()
+        os.environ.pop(server.site.env_var, None)
+
+
+if __name__ == "__main__":
+    # Serve the sites until interrupted, e.g. to browse a recorded archive
+    mode = sys.argv[1] if len(sys.argv) > 1 else "replay"
+    servers = start_sites(mode)
+    for server in servers:
+        print(f"{server.name}: {server.base_url}/ ({mode})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_sites(servers)
+        for server in servers:
+            print(server.summary())
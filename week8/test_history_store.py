@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+from history_store import HistoryStore, junit_key, slope
+
+
+def junit_report(cases, root="testsuites"):
+    """JUnit XML text for cases of (classname, name, time, outcome tag or None, {property: value})."""
+    body = ""
+    for classname, name, time, outcome, properties in cases:
+        body += f'<testcase classname="{classname}" name="{name}" time="{time}">'
+        if properties:
+            body += "<properties>" + "".join(
+                f'<property name="{key}" value="{value}"/>' for key, value in properties.items()
+            ) + "</properties>"
+        if outcome:
+            body += f'<{outcome} message="x"/>'
+        body += "</testcase>"
+    suite = f'<testsuite name="pytest" time="1.5" timestamp="2024-01-01T00:00:00">{body}</testsuite>'
+    return suite if root == "testsuite" else f"<testsuites>{suite}</testsuites>"
+
+
+class TestHistoryHelpers(unittest.TestCase):
+    """Test the node id to JUnit key conversion and the trend slope."""
+
+    def test_junit_key(self):
+        """Test converting node ids with module paths, classes and parameters."""
+        self.assertEqual(junit_key("test_a.py::test_x"), "test_a.test_x")
+        self.assertEqual(
+            junit_key("selenium_tests/test_triangle.py::TestTriangle::test_type"),
+            "selenium_tests.test_triangle.TestTriangle.test_type"
+        )
+        # Parameters are kept as they are, even with separators inside
+        self.assertEqual(junit_key("test_a.py::test_x[1-2]"), "test_a.test_x[1-2]")
+        self.assertEqual(junit_key("test_a.py::test_x[a/b::c.py]"), "test_a.test_x[a/b::c.py]")
+
+    def test_slope(self):
+        """Test the least-squares slope of durations per run."""
+        self.assertEqual(slope([]), 0.0)
+        self.assertEqual(slope([3.0]), 0.0)
+        self.assertEqual(slope([1.0, 2.0, 3.0]), 1.0)
+        self.assertEqual(slope([2.0, 2.0, 2.0, 2.0]), 0.0)
+
+
+class TestHistoryStore(unittest.TestCase):
+    """Test loading JUnit reports and ordering tests by their history."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.directory, "history.db"))
+        self.reports = 0
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.directory)
+
+    def ingest(self, cases, root="testsuites"):
+        self.reports += 1
+        path = os.path.join(self.directory, f"junit_report_{self.reports}.xml")
+        with open(path, "w") as f:
+            f.write(junit_report(cases, root))
+        return self.store.ingest_junit(path)
+
+    def test_ingest_junit(self):
+        """Test outcomes, durations and numeric properties of one report."""
+        run_id = self.ingest([
+            ("test_a", "test_pass", 1.0, None, {"nav.load": "120.5", "browser": "chrome"}),
+            ("test_a", "test_fail", 2.0, "failure", {}),
+            ("test_a", "test_error", 0.5, "error", {}),
+            ("test_a", "test_skip", 0.0, "skipped", {}),
+        ])
+        self.assertIsNotNone(run_id)
+        rows = self.store.connection.execute(
+            "SELECT test, outcome, duration FROM results WHERE run_id = ? ORDER BY test", (run_id,)
+        ).fetchall()
+        self.assertEqual(rows, [
+            ("test_a.test_error", "error", 0.5),
+            ("test_a.test_fail", "failure", 2.0),
+            ("test_a.test_pass", "passed", 1.0),
+            ("test_a.test_skip", "skipped", 0.0),
+        ])
+        # Only numeric properties are metrics
+        self.assertEqual(self.store.metric_averages(), {"test_a.test_pass": {"nav.load": 120.5}})
+        self.assertEqual(
+            self.store.connection.execute("SELECT started_at, total_time FROM runs").fetchone(),
+            ("2024-01-01T00:00:00", 1.5)
+        )
+
+    def test_ingest_junit_skips_loaded_and_broken_reports(self):
+        """Test that a report is loaded once and unreadable reports are ignored."""
+        self.assertIsNotNone(self.ingest([("test_a", "test_x", 1.0, None, {})], root="testsuite"))
+        path = os.path.join(self.directory, "junit_report_1.xml")
+        self.assertIsNone(self.store.ingest_junit(path))
+
+        broken = os.path.join(self.directory, "broken.xml")
+        with open(broken, "w") as f:
+            f.write("<testsuites><testsuite>")
+        self.assertIsNone(self.store.ingest_junit(broken))
+        self.assertIsNone(self.store.ingest_junit(os.path.join(self.directory, "missing.xml")))
+        self.assertEqual(self.store.connection.execute("SELECT COUNT(*) FROM runs").fetchone(), (1,))
+
+    def test_order(self):
+        """Test failed-first, longest-first and fastest-first ordering."""
+        self.ingest([("t", "a", 1.0, "failure", {}), ("t", "b", 3.0, None, {}), ("t", "c", 2.0, None, {})])
+        self.ingest([("t", "a", 1.0, None, {}), ("t", "b", 3.0, "failure", {}), ("t", "c", 2.0, None, {})])
+        tests = ["t.new", "t.a", "t.b", "t.c"]
+
+        # Most recent failure first; tests that never failed keep their order
+        self.assertEqual(self.store.order(tests, "failed-first"), ["t.b", "t.a", "t.new", "t.c"])
+        # Tests with no history go last either way
+        self.assertEqual(self.store.order(tests, "longest-first"), ["t.b", "t.c", "t.a", "t.new"])
+        self.assertEqual(self.store.order(tests, "fastest-first"), ["t.a", "t.c", "t.b", "t.new"])
+        with self.assertRaises(ValueError):
+            self.store.order(tests, "random")
+
+    def test_trends(self):
+        """Test duration trends, steepest slowdown first, over the last runs."""
+        for run in range(4):
+            self.ingest([
+                ("t", "slower", 1.0 + run, None, {}),
+                ("t", "steady", 2.0, None, {}),
+                ("t", "faster", 5.0 - run, None, {}),
+                ("t", "skipped", 9.0, "skipped", {}),
+            ])
+        trends = self.store.trends()
+        self.assertEqual([entry[0] for entry in trends], ["t.slower", "t.steady", "t.faster"])
+        self.assertEqual(trends[0], ("t.slower", 4, 1.0, 4.0, 2.5, 1.0))
+
+        self.assertEqual(self.store.trends(pattern="fast"), [("t.faster", 4, 5.0, 2.0, 3.5, -1.0)])
+        self.assertEqual(self.store.trends(pattern="slower", last_runs=2), [("t.slower", 2, 3.0, 4.0, 3.5, 1.0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,219 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from impact_map import changed_functions, changed_lines, select_tests
+
+PAGES = '''\
+TIMEOUT = 10
+
+
+class Page:
+    def open(self):
+        return "open"
+
+    def click(self):
+        def wait():
+            return True
+        return wait()
+'''
+
+TESTS = '''\
+from pages import Page
+
+
+def test_open():
+    assert Page().open() == "open"
+
+
+def test_click():
+    assert Page().click()
+'''
+
+
+def git(root, *args):
+    """Run git in root with a fixed identity; returns stdout."""
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stdout
+
+
+class TestImpactMap(unittest.TestCase):
+    """Test change detection and test selection on a throwaway git repository."""
+
+    def setUp(self):
+        self.root = os.path.realpath(tempfile.mkdtemp())
+        self.cwd = os.getcwd()
+        os.makedirs(os.path.join(self.root, "week8"))
+        self.write("week8/pages.py", PAGES)
+        self.write("week8/test_pages.py", TESTS)
+        git(self.root, "init", "-q")
+        self.commit("initial")
+        self.map_path = os.path.join(self.root, "impact_map.json")
+        with open(self.map_path, "w") as f:
+            json.dump({
+                "commit": git(self.root, "rev-parse", "HEAD").strip(),
+                "tests": {
+                    "week8/test_pages.py::test_open": {
+                        "week8/pages.py": ["Page.open"], "week8/test_pages.py": ["test_open"]
+                    },
+                    "week8/test_pages.py::test_click": {
+                        "week8/pages.py": ["Page.click", "Page.click.<locals>.wait"],
+                        "week8/test_pages.py": ["test_click"],
+                    },
+                },
+            }, f)
+        with open(os.path.join(self.root, ".gitignore"), "w") as f:
+            # Keep the map (and this file) out of the untracked files
+            f.write("impact_map.json\n.gitignore\n")
+        os.chdir(self.root)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.root)
+
+    def write(self, path, text):
+        with open(os.path.join(self.root, path), "w") as f:
+            f.write(text)
+
+    def edit(self, path, old, new):
+        with open(os.path.join(self.root, path)) as f:
+            text = f.read()
+        self.write(path, text.replace(old, new))
+
+    def commit(self, message):
+        git(self.root, "add", "-A")
+        git(self.root, "commit", "-q", "-m", message)
+
+    def test_changed_lines(self):
+        """Test changed line numbers, new and untracked files, and commit ranges."""
+        base = git(self.root, "rev-parse", "HEAD").strip()
+        self.edit("week8/pages.py", 'return "open"', 'return "opened"')
+        self.write("week8/extra.py", "x = 1\n")
+        self.assertEqual(changed_lines("HEAD", self.root), {"week8/pages.py": {6}, "week8/extra.py": None})
+
+        self.commit("change")
+        self.edit("week8/pages.py", "TIMEOUT = 10", "TIMEOUT = 20")
+        # Commit range: only the committed change, not the working tree edit
+        self.assertEqual(changed_lines(base, self.root, "HEAD"), {"week8/pages.py": {6}, "week8/extra.py": None})
+        self.assertEqual(changed_lines(base, self.root)["week8/pages.py"], {1, 6})
+
+    def test_changed_functions(self):
+        """Test mapping lines to the innermost function, and module-level changes to None."""
+        path = os.path.join(self.root, "week8/pages.py")
+        self.assertEqual(changed_functions(path, {6}), {"Page.open"})
+        self.assertEqual(changed_functions(path, {10, 8}), {"Page.click.<locals>.wait", "Page.click"})
+        self.assertIsNone(changed_functions(path, {1}))
+        self.assertIsNone(changed_functions(path, {6, 1}))
+
+    def test_selects_tests_using_changed_functions(self):
+        """Test that only the tests that ran a changed function are selected."""
+        self.edit("week8/pages.py", 'return "open"', 'return "opened"')
+        tests, reason = select_tests(self.map_path)
+        self.assertEqual(tests, ["week8/test_pages.py::test_open"])
+        self.assertIn("1 of 2", reason)
+
+        self.edit("week8/pages.py", "TIMEOUT = 10", "TIMEOUT = 20")
+        tests, _ = select_tests(self.map_path)
+        self.assertEqual(tests, ["week8/test_pages.py::test_click", "week8/test_pages.py::test_open"])
+
+    def test_full_run_fallbacks(self):
+        """Test the cases where the map cannot be trusted."""
+        self.assertEqual(select_tests(os.path.join(self.root, "missing.json")), (None, "no impact map recorded"))
+
+        self.write("week8/conftest.py", "")
+        tests, reason = select_tests(self.map_path)
+        self.assertIsNone(tests)
+        self.assertIn("conftest.py", reason)
+        os.remove(os.path.join(self.root, "week8/conftest.py"))
+
+        self.write("week8/test_new.py", "def test_new():\n    pass\n")
+        tests, reason = select_tests(self.map_path)
+        self.assertIsNone(tests)
+        self.assertIn("not in the impact map", reason)
+
+    def test_new_tests_committed_after_recording(self):
+        """Test that tests added between the recording and base are not missed."""
+        self.write("week8/test_new.py", "def test_new():\n    pass\n")
+        self.commit("add a test")
+        tests, reason = select_tests(self.map_path, base="HEAD")
+        self.assertIsNone(tests)
+        self.assertIn("week8/test_new.py", reason)
+
+    def test_stale_when_mapped_files_changed_after_recording(self):
+        """Test that commits touching mapped files after the recording force a full run."""
+        self.edit("week8/pages.py", 'return "open"', 'return "opened"')
+        self.commit("change a page")
+        tests, reason = select_tests(self.map_path, base="HEAD")
+        self.assertIsNone(tests)
+        self.assertIn("stale", reason)
+
+    def test_session_setup_runs_everything(self):
+        """Test that changes to code run by shared fixtures force a full run."""
+        self.write("week8/pool.py", "def start():\n    return 1\n\n\ndef unused():\n    return 2\n")
+        self.commit("add a pool")
+        with open(self.map_path) as f:
+            impact_map = json.load(f)
+        impact_map["commit"] = git(self.root, "rev-parse", "HEAD").strip()
+        impact_map["session"] = {"week8/pool.py": ["<module>", "start"], "week8/pages.py": ["<module>"]}
+        with open(self.map_path, "w") as f:
+            json.dump(impact_map, f)
+
+        self.edit("week8/pool.py", "return 1", "return 3")
+        tests, reason = select_tests(self.map_path)
+        self.assertIsNone(tests)
+        self.assertIn("session setup", reason)
+
+        # Functions session setup never ran, and module-level changes to files tests use, stay selective
+        self.edit("week8/pool.py", "return 3", "return 1")
+        self.edit("week8/pool.py", "return 2", "return 4")
+        self.assertEqual(select_tests(self.map_path)[0], [])
+        self.edit("week8/pages.py", "TIMEOUT = 10", "TIMEOUT = 20")
+        self.assertEqual(len(select_tests(self.map_path)[0]), 2)
+
+    def test_recorder_attributes_shared_fixtures_to_the_session(self):
+        """Test that a session fixture's code is recorded as session setup, not against the first test."""
+        self.write("week8/pool.py", "def start():\n    return 1\n")
+        self.write("week8/conftest.py", (
+            "import pytest\nimport pool\n\n\n"
+            "@pytest.fixture(scope=\"session\", autouse=True)\ndef shared():\n    return pool.start()\n"
+        ))
+        self.commit("add a session fixture")
+        os.remove(self.map_path)
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "impact_map", "--record-impact", self.map_path,
+             "-p", "no:cacheprovider", "test_pages.py"],
+            cwd=os.path.join(self.root, "week8"), env=env, capture_output=True, check=True
+        )
+        with open(self.map_path) as f:
+            impact_map = json.load(f)
+
+        self.assertIn("start", impact_map["session"]["week8/pool.py"])
+        self.assertIn("shared", impact_map["session"]["week8/conftest.py"])
+        for test_id in ("week8/test_pages.py::test_open", "week8/test_pages.py::test_click"):
+            self.assertNotIn("week8/pool.py", impact_map["tests"][test_id])
+        self.assertIn("Page.open", impact_map["tests"]["week8/test_pages.py::test_open"]["week8/pages.py"])
+
+    def test_not_an_ancestor(self):
+        """Test that a map recorded on another branch forces a full run."""
+        with open(self.map_path) as f:
+            impact_map = json.load(f)
+        git(self.root, "checkout", "-q", "-b", "other")
+        self.write("week8/notes.txt", "notes\n")
+        self.commit("other branch")
+        impact_map["commit"] = git(self.root, "rev-parse", "HEAD").strip()
+        with open(self.map_path, "w") as f:
+            json.dump(impact_map, f)
+        git(self.root, "checkout", "-q", "-")
+        tests, reason = select_tests(self.map_path)
+        self.assertIsNone(tests)
+        self.assertIn("not an ancestor", reason)
+
+
+if __name__ == "__main__":
+    unittest.main()
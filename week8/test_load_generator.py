@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import unittest
+from load_generator import DEFAULT_TRIANGLES, percentile, run_load
+from triangle_service import app, serve_builtin
+
+LATENCY_KEYS = ["max", "mean", "p50", "p95", "p99"]
+
+
+class TestPercentile(unittest.TestCase):
+    """Test the nearest-rank percentile."""
+
+    def test_percentile(self):
+        """Test ranks, bounds and the empty list."""
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+        self.assertEqual(percentile(values, 0.50), 5)
+        self.assertEqual(percentile(values, 0.95), 10)
+        self.assertEqual(percentile(values, 0.0), 1)
+        self.assertEqual(percentile(values, 1.0), 10)
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+
+class TestRunLoad(unittest.TestCase):
+    """Test both load modes against the built-in triangle service on an ephemeral port."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        ports = []
+
+        def ready(port):
+            ports.append(port)
+            started.set()
+
+        cls.task = cls.loop.create_task(serve_builtin(app, "127.0.0.1", 0, ready))
+
+        def run():
+            try:
+                cls.loop.run_until_complete(cls.task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                cls.loop.close()
+
+        cls.thread = threading.Thread(target=run, daemon=True)
+        cls.thread.start()
+        if not started.wait(5):
+            raise RuntimeError("Built-in triangle service did not start")
+        cls.url = f"http://127.0.0.1:{ports[0]}/api/identify-triangle"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.call_soon_threadsafe(cls.task.cancel)
+        cls.thread.join(5)
+
+    def assert_report(self, report, requests):
+        self.assertEqual(report["requests"], requests)
+        self.assertEqual(report["completed"], requests)
+        self.assertEqual(report["failures"], 0)
+        # The default triangles cycle through valid sides (200) and rejected ones (400)
+        self.assertEqual(set(report["statuses"]), {"200", "400"})
+        self.assertEqual(sum(report["statuses"].values()), requests)
+        self.assertEqual(sorted(report["latency_ms"]), LATENCY_KEYS)
+        latency = report["latency_ms"]
+        self.assertLessEqual(latency["p50"], latency["p95"])
+        self.assertLessEqual(latency["p95"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+
+    def test_closed_loop(self):
+        """Test a fixed number of requests from concurrent workers over keep-alive connections."""
+        requests = 4 * len(DEFAULT_TRIANGLES)
+        report = asyncio.run(run_load(self.url, "closed", concurrency=3, requests=requests))
+        self.assert_report(report, requests)
+        self.assertEqual((report["mode"], report["concurrency"], report["connections"]), ("closed", 3, 3))
+
+    def test_open_loop(self):
+        """Test requests issued at a fixed rate, with fewer connections than requests in flight."""
+        requests = 2 * len(DEFAULT_TRIANGLES)
+        report = asyncio.run(run_load(self.url, "open", rate=200.0, requests=requests, connections=2))
+        self.assert_report(report, requests)
+        self.assertEqual((report["mode"], report["rate_rps"], report["connections"]), ("open", 200.0, 2))
+        # The last request is not even sent before its scheduled time
+        self.assertGreaterEqual(report["elapsed_s"], (requests - 1) / 200.0)
+
+    def test_requires_a_limit(self):
+        """Test that a run needs a duration or a request count, and a known mode."""
+        with self.assertRaises(ValueError):
+            asyncio.run(run_load(self.url))
+        with self.assertRaises(ValueError):
+            asyncio.run(run_load(self.url, "ramp", requests=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
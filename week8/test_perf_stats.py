@@ -0,0 +1,127 @@
+import itertools
+import json
+import math
+import os
+import shutil
+import tempfile
+import unittest
+import perf_stats
+from perf_stats import BaselineStore, _exact_upper_tail, compare, mann_whitney_greater, median
+
+
+def brute_force_upper_tail(u, m, n):
+    """P(U >= u) by enumerating every placement of the n current values among m + n ranks."""
+    placements = list(itertools.combinations(range(m + n), n))
+    # A current value at sorted position p beats the baseline values below it: p minus the current ones below
+    values = [sum(placement) - n * (n - 1) // 2 for placement in placements]
+    return sum(1 for value in values if value >= u) / len(placements)
+
+
+class TestPerfStats(unittest.TestCase):
+    """Test the Mann-Whitney regression check and the baseline store."""
+
+    def test_exact_upper_tail_matches_brute_force(self):
+        """Test the exact U distribution against enumerating every ordering."""
+        for m in range(1, 6):
+            for n in range(1, 6):
+                for u in range(m * n + 2):
+                    self.assertEqual(_exact_upper_tail(u, m, n), brute_force_upper_tail(u, m, n), (u, m, n))
+        # Half-integer U rounds up to the next attainable value
+        self.assertEqual(_exact_upper_tail(2.5, 3, 3), brute_force_upper_tail(3, 3, 3))
+
+    def test_mann_whitney_exact(self):
+        """Test U and the exact p value for samples without ties."""
+        u, p = mann_whitney_greater([1, 2, 3], [4, 5, 6])
+        self.assertEqual(u, 9)
+        self.assertEqual(p, 1 / 20)
+        u, p = mann_whitney_greater([4, 5, 6], [1, 2, 3])
+        self.assertEqual((u, p), (0, 1.0))
+        u, p = mann_whitney_greater([1, 3, 5], [2, 4, 6])
+        self.assertEqual(u, 6)
+        self.assertEqual(p, brute_force_upper_tail(6, 3, 3))
+        with self.assertRaises(ValueError):
+            mann_whitney_greater([], [1])
+
+    def test_mann_whitney_ties_use_normal_approximation(self):
+        """Test the tie-corrected normal approximation, worked out by hand."""
+        u, p = mann_whitney_greater([1, 2, 2, 3], [2, 3, 4, 5])
+        # Ranks 1, 3, 3, 5.5 | 3, 5.5, 7, 8; ties of 3 and 2 values
+        self.assertEqual(u, 13.5)
+        variance = 4 * 4 / 12 * (9 - (3 ** 3 - 3 + 2 ** 3 - 2) / (8 * 7))
+        self.assertAlmostEqual(p, 0.5 * math.erfc((13.5 - 8 - 0.5) / math.sqrt(variance) / math.sqrt(2)))
+        # Every value tied: no evidence either way
+        self.assertEqual(mann_whitney_greater([1, 1], [1, 1, 1]), (3.0, 1.0))
+
+    def test_normal_approximation_close_to_exact(self):
+        """Test that large samples without ties (past EXACT_LIMIT) get about the exact p value."""
+        m = n = perf_stats.EXACT_LIMIT + 5
+        baseline = [i * 2.0 for i in range(m)]
+        current = [i * 2.0 + 11 for i in range(n)]
+        u, p = mann_whitney_greater(baseline, current)
+        self.assertAlmostEqual(p, _exact_upper_tail(u, m, n), delta=0.005)
+
+    def test_compare(self):
+        """Test that a regression needs both significance and a large enough slowdown."""
+        baseline = [1.0, 1.01, 1.02, 1.03, 1.04, 1.05, 1.06, 1.07]
+        slower = [value * 1.5 for value in baseline]
+        comparison = compare("page_load", baseline, slower)
+        self.assertTrue(comparison.regressed)
+        self.assertAlmostEqual(comparison.change, 0.5)
+        self.assertEqual(comparison.baseline_median, median(baseline))
+
+        slightly_slower = [value + 0.1 for value in baseline]
+        comparison = compare("page_load", baseline, slightly_slower)
+        self.assertLess(comparison.p_value, perf_stats.ALPHA)
+        self.assertFalse(comparison.regressed)
+
+        self.assertFalse(compare("page_load", baseline, baseline[:4]).regressed)
+        self.assertEqual(compare("zero", [0.0, 0.0], [1.0, 2.0]).change, 0.0)
+
+    def test_median(self):
+        """Test the median of odd and even sized samples."""
+        self.assertEqual(median([3, 1, 2]), 2)
+        self.assertEqual(median([4, 1, 3, 2]), 2.5)
+
+
+class TestBaselineStore(unittest.TestCase):
+    """Test that saving baselines merges with what other processes wrote."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "perf_baselines.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_save_merges_metrics(self):
+        """Test that two stores updating different metrics keep each other's samples."""
+        first = BaselineStore(self.path)
+        second = BaselineStore(self.path)
+        self.assertIsNone(first.samples("home"))
+
+        second.update("search", [2.0, 2.1])
+        second.save()
+        first.update("home", [1.0, 1.1])
+        first.save()
+
+        with open(self.path) as f:
+            saved = json.load(f)
+        self.assertEqual(sorted(saved), ["home", "search"])
+        reloaded = BaselineStore(self.path)
+        self.assertEqual(reloaded.samples("home"), [1.0, 1.1])
+        self.assertEqual(reloaded.samples("search"), [2.0, 2.1])
+
+        # Updating a metric replaces only that metric
+        reloaded.update("search", [3.0])
+        reloaded.save()
+        self.assertEqual(BaselineStore(self.path).samples("search"), [3.0])
+        self.assertEqual(BaselineStore(self.path).samples("home"), [1.0, 1.1])
+
+    def test_save_without_updates_writes_nothing(self):
+        """Test that a store with no updates leaves the file alone."""
+        BaselineStore(self.path).save()
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
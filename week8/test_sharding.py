@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from sharding import merge_junit, partition
+
+
+def shard_report(path, cases, failures=0, errors=0, skipped=0):
+    """Write a one-suite JUnit report with the given test case names."""
+    suite = ET.Element(
+        "testsuite", name="pytest", tests=str(len(cases)),
+        failures=str(failures), errors=str(errors), skipped=str(skipped)
+    )
+    for name in cases:
+        ET.SubElement(suite, "testcase", classname="test_a", name=name, time="1.0")
+    root = ET.Element("testsuites")
+    root.append(suite)
+    ET.ElementTree(root).write(path)
+
+
+class TestPartition(unittest.TestCase):
+    """Test balancing tests over shards by their historical durations."""
+
+    def test_balances_by_duration(self):
+        """Test that the longest tests are spread out and every test runs once."""
+        tests = [f"test_a.py::test_{index}" for index in range(6)]
+        durations = {"test_a.test_0": 8.0, "test_a.test_1": 7.0, "test_a.test_2": 6.0,
+                     "test_a.test_3": 5.0, "test_a.test_4": 4.0, "test_a.test_5": 2.0}
+        shards = partition(tests, durations, 2)
+        self.assertEqual(sorted(test for shard in shards for test in shard), tests)
+        loads = [sum(durations[test.replace(".py::", ".")] for test in shard) for shard in shards]
+        # Longest processing time first: 8+5+4 and 7+6+2
+        self.assertEqual(sorted(loads), [15.0, 17.0])
+        self.assertEqual(shards[0][0], "test_a.py::test_0")
+
+    def test_unknown_tests_use_the_median(self):
+        """Test that tests without history weigh as much as the median known test."""
+        tests = ["test_a.py::test_new", "test_a.py::test_short", "test_a.py::test_mid", "test_a.py::test_long"]
+        durations = {"test_a.test_short": 1.0, "test_a.test_mid": 4.0, "test_a.test_long": 9.0}
+        # Weights 4 (median), 1, 4, 9: the long test fills one shard, the rest the other
+        self.assertEqual(
+            sorted(map(sorted, partition(tests, durations, 2))),
+            [["test_a.py::test_long"], ["test_a.py::test_mid", "test_a.py::test_new", "test_a.py::test_short"]]
+        )
+        # With no history at all every test weighs the same and they alternate
+        self.assertEqual(list(map(len, partition(tests, {}, 2))), [2, 2])
+
+    def test_empty_shards_dropped(self):
+        """Test that more workers than tests gives one shard per test."""
+        self.assertEqual(partition(["test_a.py::test_x"], {}, 4), [["test_a.py::test_x"]])
+        self.assertEqual(partition([], {}, 3), [])
+
+
+class TestMergeJunit(unittest.TestCase):
+    """Test merging the per-shard JUnit reports."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_merge_junit(self):
+        """Test that cases and totals are merged and missing shard reports are skipped."""
+        first = os.path.join(self.directory, "junit_shard0.xml")
+        second = os.path.join(self.directory, "junit_shard1.xml")
+        shard_report(first, ["test_x", "test_y"], failures=1)
+        shard_report(second, ["test_z"], errors=1, skipped=1)
+        output = os.path.join(self.directory, "junit.xml")
+
+        totals = merge_junit([first, second, os.path.join(self.directory, "junit_shard2.xml")], output, 12.3456)
+        self.assertEqual(totals, {"tests": 3, "failures": 1, "errors": 1, "skipped": 1})
+
+        suites = ET.parse(output).getroot().findall("testsuite")
+        self.assertEqual(len(suites), 1)
+        self.assertEqual([case.get("name") for case in suites[0].findall("testcase")], ["test_x", "test_y", "test_z"])
+        self.assertEqual(suites[0].get("tests"), "3")
+        self.assertEqual(suites[0].get("time"), "12.346")
+        self.assertIsNotNone(suites[0].get("timestamp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+import http.client
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import site_archive
+from site_archive import Site, SiteServer, local_set_cookie, parse_cookies, request_key, start_sites
+
+
+class Origin(BaseHTTPRequestHandler):
+    """A tiny live site: links to itself, a redirect, a cookie-dependent price and a cart."""
+
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def do_GET(self):
+        Origin.requests += 1
+        origin = f"http://127.0.0.1:{self.server.server_port}"
+        if self.path == "/":
+            self.reply(200, f'<a href="{origin}/price">Price</a>', "text/html",
+                       [("Set-Cookie", "session=abc; Domain=127.0.0.1; Secure; Path=/")])
+        elif self.path == "/go":
+            self.reply(302, "", "text/plain", [("Location", f"{origin}/price")])
+        elif self.path == "/price":
+            currency = parse_cookies(self.headers.get("Cookie")).get("shop_currency", "USD")
+            self.reply(200, f"10 {currency}", "text/plain")
+        else:
+            self.reply(404, "missing", "text/plain")
+
+    def do_POST(self):
+        Origin.requests += 1
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.reply(200, f"added {body.decode()}", "text/plain")
+
+    def reply(self, status, text, content_type, headers=()):
+        body = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fetch(base_url, path, method="GET", body=None, cookie=None):
+    """(status, headers, body text) of one request to a local server."""
+    connection = http.client.HTTPConnection(base_url.split("//")[1], timeout=5)
+    headers = {"Cookie": cookie} if cookie else {}
+    connection.request(method, path, body=body, headers=headers)
+    response = connection.getresponse()
+    result = response.status, dict(response.getheaders()), response.read().decode()
+    connection.close()
+    return result
+
+
+class TestRequestKeys(unittest.TestCase):
+    """Test how requests are matched to recorded exchanges."""
+
+    def test_request_key(self):
+        """Test that method, path, body and the key cookies tell requests apart, other cookies do not."""
+        key = request_key("GET", "/", b"", {"shop_currency": "EUR", "session": "1"}, ("shop_currency",))
+        self.assertEqual(key, request_key("GET", "/", None, {"shop_currency": "EUR"}, ("shop_currency",)))
+        self.assertNotEqual(key, request_key("GET", "/", b"", {"shop_currency": "USD"}, ("shop_currency",)))
+        self.assertNotEqual(key, request_key("POST", "/", b"", {"shop_currency": "EUR"}, ("shop_currency",)))
+        self.assertNotEqual(request_key("POST", "/cart", b"a", {}, ()), request_key("POST", "/cart", b"b", {}, ()))
+
+    def test_cookies(self):
+        """Test cookie header parsing and the local Set-Cookie rewrite."""
+        self.assertEqual(parse_cookies("a=1; b=2=3;  ;c="), {"a": "1", "b": "2=3", "c": ""})
+        self.assertEqual(parse_cookies(None), {})
+        self.assertEqual(local_set_cookie("id=1; Domain=.example.com; Secure; Path=/"), "id=1; Path=/")
+
+
+class TestSiteServer(unittest.TestCase):
+    """Test recording a local origin through the proxy and replaying it without the origin."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.origin = ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+        self.origin.daemon_threads = True
+        threading.Thread(target=self.origin.serve_forever, daemon=True).start()
+        self.origin_url = f"http://127.0.0.1:{self.origin.server_port}"
+        self.site = Site(self.origin_url, "TEST_SITE_URL", ("shop_currency",))
+        Origin.requests = 0
+
+    def tearDown(self):
+        self.origin.shutdown()
+        self.origin.server_close()
+        shutil.rmtree(self.directory)
+
+    def visit(self, base_url):
+        """The responses of one scripted visit, with the server's own URL written as BASE."""
+        responses = [
+            fetch(base_url, "/"),
+            fetch(base_url, "/go"),
+            fetch(base_url, "/price", cookie="shop_currency=EUR; session=abc"),
+            fetch(base_url, "/price", cookie="shop_currency=USD"),
+            fetch(base_url, "/cart", method="POST", body=b"OLJCESPC7Z"),
+        ]
+        return [
+            (status, {name: value.replace(base_url, "BASE") for name, value in headers.items()
+                      if name in ("Location", "Set-Cookie")}, body.replace(base_url, "BASE"))
+            for status, headers, body in responses
+        ]
+
+    def test_record_then_replay(self):
+        """Test that a replay answers the recorded requests the same way with the origin gone."""
+        recorder = SiteServer("shop", self.site, "record", self.directory)
+        recorder.start()
+        try:
+            recorded = self.visit(recorder.base_url)
+        finally:
+            recorder.stop()
+        self.assertEqual(recorder.recorded, 5)
+        self.assertEqual(Origin.requests, 5)
+
+        # Origin URLs in bodies and redirects point at the local server; cookies lose Domain and Secure
+        self.assertEqual(recorded[0], (200, {"Set-Cookie": "session=abc; Path=/"}, '<a href="BASE/price">Price</a>'))
+        self.assertEqual(recorded[1][:2], (302, {"Location": "BASE/price"}))
+        self.assertEqual([body for _, _, body in recorded[2:]], ["10 EUR", "10 USD", "added OLJCESPC7Z"])
+        with open(os.path.join(self.directory, "shop.json")) as f:
+            self.assertEqual(len(json.load(f)["exchanges"]), 5)
+
+        self.origin.shutdown()
+        replayer = SiteServer("shop", self.site, "replay", self.directory)
+        replayer.start()
+        try:
+            self.assertEqual(self.visit(replayer.base_url), recorded)
+            # The session cookie is not a key cookie, so it does not matter
+            self.assertEqual(fetch(replayer.base_url, "/price", cookie="shop_currency=EUR")[2], "10 EUR")
+            status, _, body = fetch(replayer.base_url, "/price", cookie="shop_currency=GBP")
+            self.assertEqual(status, 404)
+            self.assertIn("Not in archive", body)
+            self.assertEqual(fetch(replayer.base_url, "/cart", method="POST", body=b"66VCHSJNUP")[0], 404)
+        finally:
+            replayer.stop()
+        self.assertEqual((replayer.hits, replayer.misses), (6, 2))
+        self.assertEqual(Origin.requests, 5)
+
+    def test_replay_without_archive(self):
+        """Test that replaying a site that was never recorded fails at startup."""
+        with self.assertRaises(FileNotFoundError):
+            SiteServer("shop", self.site, "replay", self.directory)
+
+        # start_sites stops the servers it already started and leaves the environment alone
+        environment = {site.env_var: os.environ.get(site.env_var) for site in site_archive.SITES.values()}
+        first = next(iter(site_archive.SITES))
+        with open(os.path.join(self.directory, f"{first}.json"), "w") as f:
+            json.dump({"origin": "", "exchanges": []}, f)
+        with self.assertRaisesRegex(FileNotFoundError, "record one with --sites record"):
+            start_sites("replay", self.directory)
+        self.assertEqual({name: os.environ.get(name) for name in environment}, environment)
+
+
+if __name__ == "__main__":
+    unittest.main()
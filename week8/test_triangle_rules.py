@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import triangle_rules
+from triangle_rules import (
+    classify_batch, classify_codes, classify_triangle,
+    EQUILATERAL, ISOSCELES, SCALENE, NO_TYPE, VALID, NOT_POSITIVE, NOT_A_TRIANGLE
+)
+
+# Cases from the app's Jest suites: (a, b, c, type, error)
+CASES = [
+    (5, 5, 5, "Equilateral", None),
+    (2.5, 2.5, 2.5, "Equilateral", None),
+    (5, 5, 3, "Isosceles", None),
+    (5, 3, 5, "Isosceles", None),
+    (3, 5, 5, "Isosceles", None),
+    (3, 4, 5, "Scalene", None),
+    (7, 8, 9, "Scalene", None),
+    (0.1, 0.1, 0.15, "Isosceles", None),
+    (1, 1, 1.000000000000001, "Equilateral", None),
+    (1, 1, 1.999999999999999, "", "These sides cannot form a valid triangle"),
+    (1, 1, 2, "", "These sides cannot form a valid triangle"),
+    (1, 2, 3, "", "These sides cannot form a valid triangle"),
+    (0.1, 0.2, 0.3, "", "These sides cannot form a valid triangle"),
+    (1, 1, 10, "", "These sides cannot form a valid triangle"),
+    (0, 2, 3, "", "All sides must be positive numbers"),
+    (-1, 2, 3, "", "All sides must be positive numbers"),
+    (float("nan"), 2, 3, "", "All sides must be positive numbers"),
+    (float("inf"), 2, 3, "", "All sides must be positive numbers"),
+]
+
+class TestTriangleRules(unittest.TestCase):
+    """Test the Python port of classifyTriangle."""
+
+    def test_classify_triangle_matches_app(self):
+        """Test the scalar classifier against the app's own test cases."""
+        for a, b, c, expected_type, expected_error in CASES:
+            result = classify_triangle(a, b, c)
+            self.assertEqual(result["type"], expected_type, (a, b, c))
+            self.assertEqual(result.get("error"), expected_error, (a, b, c))
+            self.assertEqual(result["isValid"], expected_error is None)
+
+    def test_non_numbers_rejected(self):
+        """Test that non-numeric sides are rejected like non-number JSON values."""
+        self.assertEqual(classify_codes(None, 2, 3), (NO_TYPE, NOT_POSITIVE))
+        self.assertEqual(classify_codes("3", 4, 5), (NO_TYPE, NOT_POSITIVE))
+        self.assertEqual(classify_codes(True, 1, 1), (NO_TYPE, NOT_POSITIVE))
+
+    def test_batch_matches_scalar(self):
+        """Test that the batch classifier agrees with the scalar one."""
+        rng = np.random.default_rng(640)
+        sides = np.round(rng.uniform(-1, 6, size=(3, 5000)), 1)
+        # Add degenerate, equal and near-equal sides
+        sides[2, :1000] = sides[0, :1000] + sides[1, :1000]
+        sides[1, 1000:2000] = sides[0, 1000:2000]
+        sides[2, 2000:2500] = sides[0, 2000:2500] + 1e-11
+        sides = np.concatenate([sides, np.array([[case[i] for case in CASES] for i in range(3)])], axis=1)
+
+        types, errors = classify_batch(*sides)
+        for i in range(sides.shape[1]):
+            a, b, c = (float(x) for x in sides[:, i])
+            self.assertEqual((types[i], errors[i]), classify_codes(a, b, c), (a, b, c))
+
+        # Bools, numeric strings and ints too large for a double are not numbers to either path
+        odd = [("3", 4, 5), (3, 4, "5.0"), (True, True, True), (1, True, 1), (10**400, 1, 1), (3, 10**400, 5)]
+        types, errors = classify_batch(*zip(*odd))
+        for i, case in enumerate(odd):
+            self.assertEqual(classify_codes(*case), (NO_TYPE, NOT_POSITIVE), case)
+            self.assertEqual((types[i], errors[i]), classify_codes(*case), case)
+        types, errors = classify_batch(np.array([3, 1]), np.array(["4", "1"]), np.array([True, True]))
+        np.testing.assert_array_equal(errors, [NOT_POSITIVE, NOT_POSITIVE])
+
+    def test_batch_codes(self):
+        """Test batch type and error codes for a small array."""
+        types, errors = classify_batch([5, 5, 3, 1, 0], [5, 5, 4, 2, 1], [5, 3, 5, 3, 1])
+        np.testing.assert_array_equal(types, [EQUILATERAL, ISOSCELES, SCALENE, NO_TYPE, NO_TYPE])
+        np.testing.assert_array_equal(errors, [VALID, VALID, VALID, NOT_A_TRIANGLE, NOT_POSITIVE])
+        self.assertEqual(triangle_rules.TYPE_NAMES[types[0]], "Equilateral")
+
+    def test_batch_broadcasts(self):
+        """Test that scalar sides broadcast against arrays."""
+        types, errors = classify_batch(5, 5, np.array([5.0, 3.0, 10.0]))
+        np.testing.assert_array_equal(types, [EQUILATERAL, ISOSCELES, NO_TYPE])
+        np.testing.assert_array_equal(errors, [VALID, VALID, NOT_A_TRIANGLE])
+
+if __name__ == "__main__":
+    unittest.main()
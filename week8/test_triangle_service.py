@@ -0,0 +1,145 @@
+import asyncio
+import http.client
+import json
+import threading
+import unittest
+from triangle_service import app, serve_builtin
+
+def call(path, body, method="POST", chunks=None):
+    """Call the ASGI app directly; returns (status, headers, body bytes)."""
+    pieces = chunks if chunks is not None else [body]
+    messages = [
+        {"type": "http.request", "body": piece, "more_body": index < len(pieces) - 1}
+        for index, piece in enumerate(pieces)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": []}
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    return start["status"], dict(start["headers"]), b"".join(m.get("body", b"") for m in sent[1:])
+
+def post_json(body):
+    status, _, payload = call("/api/identify-triangle", body.encode() if isinstance(body, str) else body)
+    return status, json.loads(payload)
+
+class TestTriangleService(unittest.TestCase):
+    """Test the Python stand-in for /api/identify-triangle."""
+
+    def test_classifies_triangle(self):
+        """Test a valid request returns 200 with the classification."""
+        status, body = post_json('{"sideA": 3, "sideB": 4, "sideC": 5}')
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"sideA": 3, "sideB": 4, "sideC": 5, "type": "Scalene", "isValid": True})
+
+    def test_rule_errors_are_200(self):
+        """Test that rule violations are reported with status 200, like the route."""
+        status, body = post_json('{"sideA": 1, "sideB": 2, "sideC": 3}')
+        self.assertEqual(status, 200)
+        self.assertEqual(body["error"], "These sides cannot form a valid triangle")
+        status, body = post_json('{"sideA": -1, "sideB": 2.5, "sideC": 3}')
+        self.assertEqual(status, 200)
+        self.assertEqual(body["sideB"], 2.5)
+        self.assertEqual(body["error"], "All sides must be positive numbers")
+
+    def test_non_numbers_are_400(self):
+        """Test that non-number sides echo `side || 0` with status 400."""
+        status, body = post_json('{"sideA": "3", "sideB": null, "sideC": 0}')
+        self.assertEqual(status, 400)
+        self.assertEqual(body, {
+            "sideA": "3", "sideB": 0, "sideC": 0, "type": "", "isValid": False,
+            "error": "All sides must be valid numbers"
+        })
+        status, body = post_json('[1, 2, 3]')
+        self.assertEqual((status, body["sideA"], body["error"]), (400, 0, "All sides must be valid numbers"))
+
+    def test_invalid_json_is_400(self):
+        """Test that unparsable bodies and null give the invalid format error."""
+        for payload in ("", "{", "null", '{"sideA": NaN, "sideB": 1, "sideC": 1}', b"\xff"):
+            status, body = post_json(payload)
+            self.assertEqual(status, 400, payload)
+            self.assertEqual(body["error"], "Invalid request format", payload)
+            self.assertEqual((body["sideA"], body["sideB"], body["sideC"]), (0, 0, 0))
+
+    def test_method_and_path(self):
+        """Test that other methods and paths are rejected."""
+        self.assertEqual(call("/api/identify-triangle", b"", method="GET")[0], 405)
+        self.assertEqual(call("/api/unknown", b"{}")[0], 404)
+
+    def test_batch_json_array(self):
+        """Test the batch route with a JSON array."""
+        payload = json.dumps([
+            {"sideA": 5, "sideB": 5, "sideC": 5},
+            {"sideA": "x", "sideB": 1, "sideC": 1},
+            {"sideA": 5, "sideB": 5, "sideC": 3},
+        ]).encode()
+        status, headers, body = call("/api/identify-triangle/batch", payload)
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b"content-type"], b"application/x-ndjson")
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([r["type"] for r in results], ["Equilateral", "", "Isosceles"])
+        self.assertEqual(results[1]["error"], "All sides must be valid numbers")
+
+    def test_batch_ndjson_split_across_chunks(self):
+        """Test NDJSON input whose lines are split between body chunks."""
+        lines = b"".join(
+            json.dumps({"sideA": 3 + i, "sideB": 4 + i, "sideC": 5 + i}).encode() + b"\n" for i in range(2500)
+        ) + b"not json\n"
+        chunks = [lines[i:i + 777] for i in range(0, len(lines), 777)]
+        status, _, body = call("/api/identify-triangle/batch", None, chunks=chunks)
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(status, 200)
+        self.assertEqual(len(results), 2501)
+        self.assertEqual(results[0], {"sideA": 3, "sideB": 4, "sideC": 5, "type": "Scalene", "isValid": True})
+        self.assertEqual(results[-1]["error"], "Invalid request format")
+
+    def test_builtin_server(self):
+        """Test both routes over HTTP with the built-in server and a keep-alive connection."""
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        ports = []
+
+        def ready(port):
+            ports.append(port)
+            started.set()
+
+        task = loop.create_task(serve_builtin(app, "127.0.0.1", 0, ready))
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.assertTrue(started.wait(5))
+
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", ports[0], timeout=5)
+            connection.request("POST", "/api/identify-triangle", body='{"sideA": 2, "sideB": 2, "sideC": 3}')
+            response = connection.getresponse()
+            self.assertEqual((response.status, json.loads(response.read())["type"]), (200, "Isosceles"))
+
+            # Same connection, chunked NDJSON upload, chunked response
+            body = iter([b'{"sideA": 1, "sideB": 1, "sideC": 1}\n{"sideA"', b': 1, "sideB": 1, "sideC": 5}\n'])
+            connection.request("POST", "/api/identify-triangle/batch", body=body, encode_chunked=True,
+                               headers={"Transfer-Encoding": "chunked"})
+            response = connection.getresponse()
+            results = [json.loads(line) for line in response.read().splitlines()]
+            self.assertEqual([r["isValid"] for r in results], [True, False])
+            connection.close()
+        finally:
+            loop.call_soon_threadsafe(task.cancel)
+            thread.join(5)
+
+if __name__ == "__main__":
+    unittest.main()
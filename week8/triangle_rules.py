@@ -0,0 +1,131 @@
+"""
+Python reference port of the Triangle Classifier rules.
+
+classify_triangle() mirrors app/triagle-identification/lib/classifyTriangle.ts
+rule for rule: non-finite or non-positive sides are rejected, the triangle
+inequality and degenerate (flat) triangles are checked with the same 1e-10
+epsilon, and the type comparisons use that epsilon too. classify_batch()
+applies the same rules to NumPy arrays and returns integer type and error
+codes, so expected results for large test sets can be produced without the
+browser or the API.
+"""
+
+import math
+
+import numpy as np
+
+EPSILON = 1e-10
+
+# Type codes
+NO_TYPE = 0
+EQUILATERAL = 1
+ISOSCELES = 2
+SCALENE = 3
+TYPE_NAMES = {NO_TYPE: "", EQUILATERAL: "Equilateral", ISOSCELES: "Isosceles", SCALENE: "Scalene"}
+
+# Error codes
+VALID = 0
+NOT_POSITIVE = 1
+NOT_A_TRIANGLE = 2
+ERROR_MESSAGES = {
+    VALID: None,
+    NOT_POSITIVE: "All sides must be positive numbers",
+    NOT_A_TRIANGLE: "These sides cannot form a valid triangle",
+}
+
+
+def is_finite_number(x):
+    """Python equivalent of isFiniteNumber: a real number that is not NaN or infinite."""
+    if not isinstance(x, (int, float)) or isinstance(x, bool):
+        return False
+    try:
+        return math.isfinite(x)
+    except OverflowError:
+        # An int beyond the double range, which JavaScript would read as Infinity
+        return False
+
+
+def classify_codes(a, b, c):
+    """Classify one triangle, returning (type code, error code)."""
+    if not is_finite_number(a) or not is_finite_number(b) or not is_finite_number(c):
+        return NO_TYPE, NOT_POSITIVE
+    if a <= 0 or b <= 0 or c <= 0:
+        return NO_TYPE, NOT_POSITIVE
+
+    # Work in doubles, as JavaScript does, so sums round the same way
+    a, b, c = float(a), float(b), float(c)
+    if (a + b < c - EPSILON or a + c < b - EPSILON or b + c < a - EPSILON or
+            abs(a + b - c) < EPSILON or abs(a + c - b) < EPSILON or abs(b + c - a) < EPSILON):
+        return NO_TYPE, NOT_A_TRIANGLE
+
+    if abs(a - b) < EPSILON and abs(b - c) < EPSILON:
+        return EQUILATERAL, VALID
+    if abs(a - b) < EPSILON or abs(b - c) < EPSILON or abs(a - c) < EPSILON:
+        return ISOSCELES, VALID
+    return SCALENE, VALID
+
+
+def classify_triangle(a, b, c):
+    """Classify one triangle, returning the same fields as the TypeScript TriangleResponse."""
+    type_code, error_code = classify_codes(a, b, c)
+    result = {
+        "sideA": a,
+        "sideB": b,
+        "sideC": c,
+        "type": TYPE_NAMES[type_code],
+        "isValid": error_code == VALID,
+    }
+    if error_code != VALID:
+        result["error"] = ERROR_MESSAGES[error_code]
+    return result
+
+
+def _as_sides(sides):
+    """sides as a float64 array, NaN wherever an element is not a finite number.
+
+    NumPy arrays of numbers are converted directly. Anything else is checked
+    element by element with is_finite_number(): NumPy would read bools as
+    1 and 0 and numeric strings as numbers, which classify_codes() rejects.
+    """
+    if isinstance(sides, np.ndarray) and sides.dtype.kind in "iuf":
+        return sides.astype(np.float64, copy=False)
+    sides = np.asarray(sides, dtype=object)
+    values = np.fromiter(
+        (float(x) if is_finite_number(x) else math.nan for x in sides.flat), dtype=np.float64, count=sides.size
+    )
+    return values.reshape(sides.shape)
+
+
+def classify_batch(a, b, c):
+    """Classify arrays of sides at once.
+
+    a, b and c are array-likes that broadcast together; elements that are
+    not numbers (bools, strings, None) are rejected as in classify_codes().
+    Returns (types, errors): uint8 arrays of type codes and error codes
+    matching classify_codes() element for element.
+    """
+    a, b, c = np.broadcast_arrays(_as_sides(a), _as_sides(b), _as_sides(c))
+
+    # NaN compares false, so only finite positive sides pass
+    positive = np.isfinite(a) & np.isfinite(b) & np.isfinite(c) & (a > 0) & (b > 0) & (c > 0)
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        ab = a + b
+        ac = a + c
+        bc = b + c
+        invalid = (ab < c - EPSILON) | (ac < b - EPSILON) | (bc < a - EPSILON)
+        invalid |= np.abs(ab - c) < EPSILON
+        invalid |= np.abs(ac - b) < EPSILON
+        invalid |= np.abs(bc - a) < EPSILON
+        same_ab = np.abs(a - b) < EPSILON
+        same_bc = np.abs(b - c) < EPSILON
+        same_ac = np.abs(a - c) < EPSILON
+
+    valid = positive & ~invalid
+    errors = np.where(positive, np.where(invalid, NOT_A_TRIANGLE, VALID), NOT_POSITIVE).astype(np.uint8)
+    types = np.where(
+        same_ab & same_bc, EQUILATERAL,
+        np.where(same_ab | same_bc | same_ac, ISOSCELES, SCALENE)
+    ).astype(np.uint8)
+    types[~valid] = NO_TYPE
+    return types, errors
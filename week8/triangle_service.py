@@ -0,0 +1,398 @@
+"""
+Local Python stand-in for the Triangle Classifier API.
+
+app is a plain ASGI application that reproduces
+app/triagle-identification/app/api/identify-triangle/route.ts, including its
+400 responses, on top of the triangle_rules port:
+
+    POST /api/identify-triangle        {"sideA": 3, "sideB": 4, "sideC": 5}
+    POST /api/identify-triangle/batch  JSON array or NDJSON of the same objects
+
+The batch route streams one NDJSON result per input triangle, in order, each
+shaped exactly like the single route's response body. NDJSON input is
+classified as it arrives, so clients can stream millions of triangles over
+one request.
+
+serve() runs the app with uvicorn when it is installed and otherwise with a
+small built-in asyncio HTTP/1.1 server, so it also works on a test box with
+nothing but the standard library and NumPy.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+
+import numpy as np
+
+from triangle_rules import classify_batch, ERROR_MESSAGES, TYPE_NAMES, VALID
+
+SINGLE_PATH = "/api/identify-triangle"
+BATCH_PATH = "/api/identify-triangle/batch"
+
+# Results per streamed response chunk
+BATCH_CHUNK = 1000
+
+INVALID_NUMBERS = "All sides must be valid numbers"
+INVALID_FORMAT = "Invalid request format"
+
+
+def _reject_constant(name):
+    # JSON.parse does not accept NaN or Infinity
+    raise ValueError(f"Invalid JSON constant {name}")
+
+
+def parse_json(text):
+    """Parse JSON the way JSON.parse does: numbers are doubles, no NaN/Infinity."""
+    return json.loads(text, parse_int=float, parse_constant=_reject_constant)
+
+
+def js_value(value):
+    """Convert a parsed value back to what JSON.stringify would output."""
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        if value.is_integer() and abs(value) < 1e21:
+            return int(value)
+    return value
+
+
+def js_or_zero(value):
+    """JavaScript's `value || 0`."""
+    if value is None or value is False or value == "" or (
+            isinstance(value, (int, float)) and not isinstance(value, bool) and (value == 0 or value != value)):
+        return 0
+    return value
+
+
+def is_number(value):
+    return isinstance(value, float)
+
+
+def error_body(sides, message):
+    return {
+        "sideA": js_value(sides[0]),
+        "sideB": js_value(sides[1]),
+        "sideC": js_value(sides[2]),
+        "type": "",
+        "isValid": False,
+        "error": message,
+    }
+
+
+def classify_requests(bodies):
+    """Turn parsed request bodies into (status, response body) pairs, like route.ts does."""
+    results = [None] * len(bodies)
+    numeric = []
+    for index, body in enumerate(bodies):
+        if body is None:
+            # Destructuring null throws, which the route reports as a bad request
+            results[index] = (400, error_body((0, 0, 0), INVALID_FORMAT))
+            continue
+        sides = [body.get(key) if isinstance(body, dict) else None for key in ("sideA", "sideB", "sideC")]
+        if all(is_number(side) for side in sides):
+            numeric.append((index, sides))
+        else:
+            results[index] = (400, error_body([js_or_zero(side) for side in sides], INVALID_NUMBERS))
+
+    if numeric:
+        sides = np.array([entry[1] for entry in numeric], dtype=np.float64).reshape(-1, 3)
+        types, errors = classify_batch(sides[:, 0], sides[:, 1], sides[:, 2])
+        for (index, (a, b, c)), type_code, error_code in zip(numeric, types.tolist(), errors.tolist()):
+            body = {
+                "sideA": js_value(a),
+                "sideB": js_value(b),
+                "sideC": js_value(c),
+                "type": TYPE_NAMES[type_code],
+                "isValid": error_code == VALID,
+            }
+            if error_code != VALID:
+                body["error"] = ERROR_MESSAGES[error_code]
+            results[index] = (200, body)
+    return results
+
+
+def parse_body(text):
+    """Parse one request body, returning None for anything JSON.parse would reject."""
+    try:
+        return parse_json(text)
+    except ValueError:
+        return None
+
+
+async def read_body(receive):
+    body = bytearray()
+    while True:
+        message = await receive()
+        body.extend(message.get("body", b""))
+        if not message.get("more_body"):
+            return bytes(body)
+
+
+async def send_json(send, status, body):
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+async def identify_triangle(receive, send):
+    """The single-triangle route."""
+    body = await read_body(receive)
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        text = ""
+    status, result = classify_requests([parse_body(text)])[0]
+    await send_json(send, status, result)
+
+
+async def ndjson_lines(receive, first):
+    """Yield complete lines of a streamed NDJSON body as they arrive."""
+    pending = first
+    while True:
+        *lines, pending = pending.split(b"\n")
+        if lines:
+            yield lines
+        message = await receive()
+        pending += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    lines = pending.split(b"\n")
+    if lines:
+        yield lines
+
+
+async def identify_triangle_batch(receive, send):
+    """The batch route: JSON array or NDJSON in, NDJSON out."""
+    started = False
+
+    async def emit(bodies):
+        nonlocal started
+        if not started:
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/x-ndjson")],
+            })
+            started = True
+        for start in range(0, len(bodies), BATCH_CHUNK):
+            results = classify_requests(bodies[start:start + BATCH_CHUNK])
+            chunk = "".join(json.dumps(body, separators=(",", ":")) + "\n" for _, body in results)
+            await send({"type": "http.response.body", "body": chunk.encode(), "more_body": True})
+
+    # Read until the first significant byte tells a JSON array from NDJSON
+    head = b""
+    more = True
+    while more and not head.strip():
+        message = await receive()
+        head += message.get("body", b"")
+        more = message.get("more_body", False)
+
+    if head.lstrip().startswith(b"["):
+        if more:
+            head += await read_body(receive)
+        try:
+            bodies = parse_json(head.decode("utf-8"))
+        except ValueError:
+            await send_json(send, 400, error_body((0, 0, 0), INVALID_FORMAT))
+            return
+        await emit(bodies)
+    else:
+        async def remaining():
+            return {"body": b"", "more_body": False}
+
+        async for lines in ndjson_lines(receive if more else remaining, head):
+            bodies = []
+            for line in lines:
+                line = line.strip()
+                if line:
+                    bodies.append(parse_body(line.decode("utf-8", "replace")))
+            if bodies:
+                await emit(bodies)
+
+    if not started:
+        await emit([])
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"].rstrip("/") or "/"
+    routes = {SINGLE_PATH: identify_triangle, BATCH_PATH: identify_triangle_batch}
+    if path not in routes:
+        await send_json(send, 404, {"error": "Not found"})
+    elif scope["method"] != "POST":
+        # Next.js answers methods a route does not export with 405
+        await send({"type": "http.response.start", "status": 405, "headers": [(b"allow", b"POST"), (b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+    else:
+        await routes[path](receive, send)
+
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection of the built-in server."""
+
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+    def __init__(self, app, reader, writer):
+        self.app = app
+        self.reader = reader
+        self.writer = writer
+
+    async def run(self):
+        try:
+            while await self.handle_request():
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writer.close()
+
+    async def handle_request(self):
+        try:
+            head = await self.reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return False
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, version = request_line.split(" ", 2)
+        headers = []
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(":")
+                headers.append((name.strip().lower(), value.strip()))
+        header_map = dict(headers)
+        keep_alive = version == "HTTP/1.1" and header_map.get("connection", "").lower() != "close"
+
+        chunked = "chunked" in header_map.get("transfer-encoding", "").lower()
+        remaining = int(header_map.get("content-length", 0) or 0)
+        body_done = not chunked and remaining == 0
+
+        async def receive():
+            nonlocal remaining, body_done
+            if body_done:
+                return {"type": "http.request", "body": b"", "more_body": False}
+            if chunked:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await self.reader.readline()) not in (b"\r\n", b""):
+                        pass
+                    body_done = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+                data = await self.reader.readexactly(size)
+                await self.reader.readexactly(2)
+                return {"type": "http.request", "body": data, "more_body": True}
+            data = await self.reader.readexactly(min(remaining, 65536))
+            remaining -= len(data)
+            body_done = remaining == 0
+            return {"type": "http.request", "body": data, "more_body": not body_done}
+
+        response = {"chunked": False, "started": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["started"] = True
+                status = message["status"]
+                lines = [f"HTTP/1.1 {status} {self.REASONS.get(status, '')}"]
+                names = set()
+                for name, value in message.get("headers", []):
+                    name = name.decode("latin-1") if isinstance(name, bytes) else name
+                    value = value.decode("latin-1") if isinstance(value, bytes) else value
+                    names.add(name.lower())
+                    lines.append(f"{name}: {value}")
+                if "content-length" not in names:
+                    response["chunked"] = True
+                    lines.append("transfer-encoding: chunked")
+                if not keep_alive:
+                    lines.append("connection: close")
+                self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if response["chunked"]:
+                    if body:
+                        self.writer.write(b"%x\r\n%s\r\n" % (len(body), body))
+                    if not message.get("more_body"):
+                        self.writer.write(b"0\r\n\r\n")
+                else:
+                    self.writer.write(body)
+                await self.writer.drain()
+
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": version.split("/")[1],
+            "method": method.upper(),
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+            "client": self.writer.get_extra_info("peername"),
+            "server": self.writer.get_extra_info("sockname"),
+        }
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            if not response["started"]:
+                await send({"type": "http.response.start", "status": 500, "headers": [(b"content-length", b"0")]})
+                await send({"type": "http.response.body", "body": b""})
+            return False
+
+        # Skip whatever the app did not read so the next request starts cleanly
+        while not body_done:
+            await receive()
+        return keep_alive
+
+
+async def serve_builtin(app, host="127.0.0.1", port=8000, ready=None):
+    """Serve an ASGI app with the built-in HTTP/1.1 server until cancelled."""
+    server = await asyncio.start_server(
+        lambda reader, writer: _Connection(app, reader, writer).run(), host, port
+    )
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def serve(host="127.0.0.1", port=8000, builtin=False):
+    """Run the service, with uvicorn when available."""
+    if not builtin:
+        try:
+            import uvicorn
+        except ImportError:
+            builtin = True
+        else:
+            uvicorn.run(app, host=host, port=port, log_level="warning")
+            return
+
+    print(f"Serving the triangle API on http://{host}:{port} (built-in server)")
+    try:
+        asyncio.run(serve_builtin(app, host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Triangle Classifier API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--builtin", action="store_true", help="Use the built-in server even if uvicorn is installed")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.builtin)